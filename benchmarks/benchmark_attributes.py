@@ -0,0 +1,106 @@
+"""Compares parsing large attribute files in full with json.loads to
+parsing only the keys that the reader uses.
+
+    python benchmarks/benchmark_attributes.py --sizes 1 10 100
+
+Each file has the multiscales and omero metadata of an image with a few
+channels, a plate with 384 wells, and acquisition metadata of another tool
+that makes up the rest of the size, like the attributes of large screens.
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Callable
+
+from napari_metadata._json_stream import ATTRIBUTE_SELECTION, loads_selected
+
+MB = 1_000_000
+
+
+def make_attributes(size: int) -> bytes:
+    attrs = {
+        "multiscales": [
+            {
+                "version": "0.4",
+                "axes": [
+                    {"name": "c", "type": "channel"},
+                    {"name": "y", "type": "space", "unit": "micrometer"},
+                    {"name": "x", "type": "space", "unit": "micrometer"},
+                ],
+                "datasets": [
+                    {
+                        "path": str(level),
+                        "coordinateTransformations": [
+                            {
+                                "type": "scale",
+                                "scale": [1, 2**level, 2**level],
+                            }
+                        ],
+                    }
+                    for level in range(5)
+                ],
+            }
+        ],
+        "omero": {
+            "channels": [
+                {"label": f"channel {c}", "window": {"start": 0, "end": 255}}
+                for c in range(4)
+            ],
+            "rdefs": {"model": "color"},
+        },
+        "plate": {
+            "rows": [{"name": chr(ord("A") + r)} for r in range(16)],
+            "columns": [{"name": str(c + 1)} for c in range(24)],
+            "wells": [
+                {
+                    "path": f"{chr(ord('A') + r)}/{c + 1}",
+                    "rowIndex": r,
+                    "columnIndex": c,
+                }
+                for r in range(16)
+                for c in range(24)
+            ],
+        },
+    }
+    event = {
+        "time": 12.5,
+        "stage": {"x": 1024.25, "y": -512.5, "z": 3.0},
+        "note": 'focus "ok"',
+        "tags": ["autofocus", "laser", None, True],
+    }
+    n_events = max(size - len(json.dumps(attrs)), 0) // len(json.dumps(event))
+    attrs["acquisition"] = {"events": [event] * n_events}
+    return json.dumps(attrs).encode()
+
+
+def measure(parse: Callable, data: bytes) -> str:
+    start = time.perf_counter()
+    parse(data)
+    elapsed = time.perf_counter() - start
+    # Tracing allocations slows parsing down, so it is measured separately.
+    tracemalloc.start()
+    parse(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return f"{elapsed:8.3f} s {peak / MB:10.1f} MB"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1, 10, 100], help="in MB"
+    )
+    args = parser.parse_args()
+    print(f"{'size':>7} {'parse':>8} {'time':>10} {'peak':>13}")
+    for size in args.sizes:
+        data = make_attributes(size * MB)
+        for name, parse in (
+            ("full", json.loads),
+            ("keys", lambda d: loads_selected(d, ATTRIBUTE_SELECTION)),
+        ):
+            print(f"{size:>4} MB {name:>8} {measure(parse, data)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Compares opening zarr arrays with many chunks as dask arrays to opening
+them as thin lazy views, which is what the reader does for large arrays.
+
+    python benchmarks/benchmark_open_array.py --chunks 100000 1000000
+
+Each array is 2D with 4x4 chunks that are never written, so the benchmark
+measures the overhead of the array type rather than reading or decoding.
+Viewing reads a small region of one row, like napari does for a canvas.
+"""
+import argparse
+import math
+import time
+import tracemalloc
+from typing import Any, Callable
+
+import dask.array as da
+import numpy as np
+import zarr
+
+from napari_metadata._lazy_array import LazyZarrArray
+
+CHUNK_SIZE = 4
+
+
+def make_array(n_chunks: int) -> zarr.Array:
+    side = math.isqrt(n_chunks) * CHUNK_SIZE
+    return zarr.zeros(
+        (side, side),
+        chunks=(CHUNK_SIZE, CHUNK_SIZE),
+        dtype=np.uint8,
+        store=zarr.MemoryStore(),
+    )
+
+
+def view(data: Any) -> np.ndarray:
+    return np.asarray(data[5, :64])
+
+
+def measure(open_array: Callable, n_chunks: int) -> str:
+    array = make_array(n_chunks)
+    tracemalloc.start()
+    start = time.perf_counter()
+    data = open_array(array)
+    opened = time.perf_counter()
+    view(data)
+    viewed = time.perf_counter()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (
+        f"{opened - start:8.3f} s {viewed - opened:8.3f} s "
+        f"{peak / 1e6:10.1f} MB"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--chunks", type=int, nargs="+", default=[10**5, 10**6, 10**7]
+    )
+    args = parser.parse_args()
+    print(
+        f"{'chunks':>10} {'array':>6} {'open':>10} {'view':>10} {'peak':>13}"
+    )
+    for n_chunks in args.chunks:
+        for name, open_array in (
+            ("dask", da.from_zarr),
+            ("lazy", LazyZarrArray),
+        ):
+            print(f"{n_chunks:>10} {name:>6} {measure(open_array, n_chunks)}")
+
+
+if __name__ == "__main__":
+    main()
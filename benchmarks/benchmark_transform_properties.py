@@ -0,0 +1,78 @@
+"""Compares the columnar transform_properties to the previous list-based
+implementation for label properties of increasing size.
+
+    python benchmarks/benchmark_transform_properties.py --sizes 10000 1000000
+
+Note that the largest default size of 10^7 labels needs several GB of RAM
+just to hold the input dictionaries.
+"""
+import argparse
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+from napari_metadata._reader import transform_properties
+
+
+def transform_properties_lists(
+    props: Optional[Dict[str, Dict]] = None
+) -> Optional[Dict[str, List]]:
+    """The previous implementation, kept here for comparison."""
+    if props is None:
+        return None
+    properties: Dict[str, List] = {}
+    for label_id, props_dict in props.items():
+        for key in props_dict.keys():
+            properties[key] = []
+    keys = list(properties.keys())
+    properties["index"] = []
+    for label_id, props_dict in props.items():
+        properties["index"].append(label_id)
+        for key in keys:
+            properties[key].append(props_dict.get(key, None))
+    return properties
+
+
+def make_props(size: int) -> Dict[int, Dict]:
+    # Every tenth label is missing its class to exercise masking.
+    return {
+        i: {"area": float(i % 1000), "roi": i}
+        if i % 10
+        else {"area": float(i % 1000), "roi": i, "class": "cell"}
+        for i in range(1, size + 1)
+    }
+
+
+def measure(func: Callable, size: int) -> str:
+    props = make_props(size)
+    start = time.perf_counter()
+    func(props)
+    seconds = time.perf_counter() - start
+    del props
+    # Measure memory separately, since tracing slows things down.
+    # The input is discarded after the call, like it is in the reader,
+    # so that only the memory kept by the output is counted.
+    tracemalloc.start()
+    result = func(make_props(size))  # noqa: F841
+    kept, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return f"{seconds:8.3f} s {kept / 1e6:10.1f} MB"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10**4, 10**6, 10**7]
+    )
+    args = parser.parse_args()
+    print(f"{'labels':>10} {'implementation':>15} {'time':>10} {'kept':>13}")
+    for size in args.sizes:
+        for name, func in (
+            ("lists", transform_properties_lists),
+            ("columns", transform_properties),
+        ):
+            print(f"{size:>10} {name:>15} {measure(func, size)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Measures the throughput and peak memory of writing a lazy image.
+
+    python benchmarks/benchmark_write.py --size 1024 --workers 1 4 16
+
+The source is a dask array backed by a zarr array on disk, like the data
+of a layer that was opened lazily. It is written to another zarr array
+chunk by chunk with the given numbers of workers, and with ome-zarr's
+write_multiscale (which uses dask) for comparison. Each write runs in a
+new process, so that its peak RSS is not that of an earlier write.
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import shutil
+import tempfile
+import time
+from multiprocessing.connection import Connection
+from typing import Optional, Tuple
+
+import dask.array as da
+import numpy as np
+import zarr
+
+from napari_metadata._chunk_writer import WriteOptions, write_array
+
+MB = 1_000_000
+CHUNK_SHAPE = (1, 1024, 1024)
+
+
+def make_source(path: str, size: int) -> None:
+    planes = max(1, size * MB // (2 * 4096 * 4096))
+    array = zarr.open_array(
+        path,
+        mode="w",
+        shape=(planes, 4096, 4096),
+        chunks=CHUNK_SHAPE,
+        dtype=np.uint16,
+    )
+    rng = np.random.default_rng(0)
+    for plane in range(planes):
+        # Noise on a gradient compresses a little, like real images.
+        gradient = np.arange(4096, dtype=np.uint16)[None, :]
+        noise = rng.integers(0, 64, size=(4096, 4096), dtype=np.uint16)
+        array[plane] = gradient + noise
+
+
+def write(
+    source_path: str,
+    target_path: str,
+    workers: Optional[int],
+    connection: Connection,
+) -> None:
+    source = da.from_zarr(source_path)
+    start = time.perf_counter()
+    if workers is None:
+        from ome_zarr.writer import write_multiscale
+
+        root = zarr.open_group(target_path, mode="w")
+        write_multiscale([source], root, axes="zyx")
+    else:
+        target = zarr.open_array(
+            target_path,
+            mode="w",
+            shape=source.shape,
+            chunks=source.chunksize,
+            dtype=source.dtype,
+        )
+        write_array(source, target, WriteOptions(max_workers=workers))
+    seconds = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    connection.send((seconds, peak_rss))
+
+
+def measure(
+    source_path: str, target_path: str, workers: Optional[int]
+) -> Tuple[float, int]:
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(
+        target=write, args=(source_path, target_path, workers, sender)
+    )
+    process.start()
+    result = receiver.recv()
+    process.join()
+    shutil.rmtree(target_path)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=1024, help="in MB")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        source_path = os.path.join(directory, "source.zarr")
+        target_path = os.path.join(directory, "target.zarr")
+        make_source(source_path, args.size)
+        nbytes = da.from_zarr(source_path).nbytes
+        print(f"writing {nbytes / MB:.0f} MB in chunks of {CHUNK_SHAPE}")
+        print(f"{'writer':>10} {'time':>10} {'speed':>12} {'peak RSS':>12}")
+        for workers in [None, *args.workers]:
+            seconds, peak = measure(source_path, target_path, workers)
+            name = "ome-zarr" if workers is None else f"{workers} workers"
+            print(
+                f"{name:>10} {seconds:8.2f} s {nbytes / MB / seconds:7.1f} "
+                f"MB/s {peak / MB:9.0f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""Reads the layers of a path in the background.
+
+The napari reader reads and transforms every node of a tree before it
+returns, which blocks the thread that calls it (usually the UI thread)
+until the whole tree is open. A ReadTask instead reads nodes on an
+executor and makes each layer available as soon as its node has been
+transformed, so that callers can iterate, await or be called back with
+layers while the rest of the tree is still opening.
+"""
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from dataclasses import dataclass
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+)
+
+from ome_zarr.reader import Node
+from ome_zarr.types import LayerData, PathLike
+
+from ._prefetch import TimePrefetch
+from ._reader import (
+    MAX_READ_WORKERS,
+    LevelSelection,
+    RegionOfInterest,
+    read_nodes,
+    transform_node,
+)
+
+LOGGER = logging.getLogger("napari_metadata._async_reader")
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+@dataclass(frozen=True)
+class LayerPlaceholder:
+    """A layer whose node has been found, but not yet transformed."""
+
+    name: str
+    future: Future
+
+    @property
+    def loading(self) -> bool:
+        return not self.future.done()
+
+
+class ReadTask:
+    """Reads the layers of a path in the background.
+
+    Nodes are found one after another and each is transformed on the
+    executor as soon as it is found. Layers are in the same order as the
+    napari reader returns them. Listeners are called, from any thread,
+    whenever a node is found, a layer is ready or the task is done.
+    """
+
+    def __init__(
+        self,
+        path: PathLike,
+        *,
+        executor: Optional[ThreadPoolExecutor] = None,
+        levels: Optional[LevelSelection] = None,
+        time_prefetch: Optional[TimePrefetch] = None,
+        roi: Optional[RegionOfInterest] = None,
+        series: Optional[Sequence[str]] = None,
+    ) -> None:
+        self._path = path
+        self._series = series
+        self._options = dict(
+            levels=levels, time_prefetch=time_prefetch, roi=roi
+        )
+        self._executor = _executor() if executor is None else executor
+        self._condition = threading.Condition()
+        self._placeholders: List[LayerPlaceholder] = []
+        self._found_all = False
+        self._cancel = threading.Event()
+        self._listeners: List[Callable[["ReadTask"], None]] = []
+        self._future = self._executor.submit(self._find_nodes)
+        self._future.add_done_callback(self._on_found_all)
+
+    @property
+    def path(self) -> PathLike:
+        return self._path
+
+    def placeholders(self) -> List[LayerPlaceholder]:
+        """Returns a placeholder for each node that has been found."""
+        with self._condition:
+            return list(self._placeholders)
+
+    def layers(self) -> List[LayerData]:
+        """Returns the layers that are ready and have no unready layers
+        before them.
+        """
+        layers = []
+        for placeholder in self.placeholders():
+            future = placeholder.future
+            if not future.done() or future.cancelled():
+                break
+            if future.exception() is not None:
+                break
+            if (layer := future.result()) is not None:
+                layers.append(layer)
+        return layers
+
+    def add_listener(self, listener: Callable[["ReadTask"], None]) -> None:
+        with self._condition:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[["ReadTask"], None]) -> None:
+        with self._condition:
+            self._listeners.remove(listener)
+
+    def cancel(self) -> bool:
+        """Stops finding nodes and cancels the transforms that have not
+        started. Returns False if the task was already done.
+        """
+        if self.done():
+            return False
+        self._cancel.set()
+        self._future.cancel()
+        for placeholder in self.placeholders():
+            placeholder.future.cancel()
+        self._notify()
+        return True
+
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def done(self) -> bool:
+        with self._condition:
+            return self._is_done()
+
+    def result(self, timeout: Optional[float] = None) -> List[LayerData]:
+        """Waits for and returns all the layers.
+
+        Raises a CancelledError if the task was cancelled, or the error of
+        the first node that could not be read.
+        """
+        with self._condition:
+            if not self._condition.wait_for(self._is_done, timeout):
+                raise FuturesTimeoutError()
+        return list(self)
+
+    def __iter__(self) -> Iterator[LayerData]:
+        """Yields each layer as soon as it and the layers before it are
+        ready.
+        """
+        for future in self._futures():
+            if (layer := future.result()) is not None:
+                yield layer
+        self._raise_if_failed()
+
+    async def __aiter__(self) -> AsyncIterator[LayerData]:
+        loop = asyncio.get_running_loop()
+        changed = asyncio.Event()
+
+        def notify(_: "ReadTask") -> None:
+            loop.call_soon_threadsafe(changed.set)
+
+        self.add_listener(notify)
+        try:
+            index = 0
+            while True:
+                with self._condition:
+                    found = self._placeholders[index:]
+                    found_all = self._found_all
+                for placeholder in found:
+                    try:
+                        layer = await asyncio.wrap_future(placeholder.future)
+                    except asyncio.CancelledError:
+                        if self.cancelled():
+                            break
+                        raise
+                    if layer is not None:
+                        yield layer
+                index += len(found)
+                if self.cancelled() or (found_all and not found):
+                    break
+                if not found:
+                    await changed.wait()
+                    changed.clear()
+        finally:
+            self.remove_listener(notify)
+        self._raise_if_failed()
+
+    def __repr__(self) -> str:
+        state = (
+            "cancelled"
+            if self.cancelled()
+            else "done"
+            if self.done()
+            else "running"
+        )
+        return f"{type(self).__name__}(path={self._path!r}, {state})"
+
+    def _find_nodes(self) -> None:
+        for node in read_nodes(self._path, series=self._series):
+            if self._cancel.is_set():
+                return
+            # Nodes without data (e.g. the group of labels) have no layer.
+            if not node.data:
+                continue
+            future = self._executor.submit(
+                transform_node, node, **self._options
+            )
+            with self._condition:
+                self._placeholders.append(
+                    LayerPlaceholder(
+                        name=_node_name(node, self._path), future=future
+                    )
+                )
+            # The task may have been cancelled after the node was found.
+            if self._cancel.is_set():
+                future.cancel()
+            future.add_done_callback(lambda _: self._notify())
+            self._notify()
+
+    def _futures(self) -> Iterator[Future]:
+        index = 0
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: index < len(self._placeholders) or self._found_all
+                )
+                if index >= len(self._placeholders):
+                    return
+                future = self._placeholders[index].future
+            index += 1
+            yield future
+
+    def _on_found_all(self, _: Future) -> None:
+        with self._condition:
+            self._found_all = True
+        self._notify()
+
+    def _is_done(self) -> bool:
+        return self._found_all and all(
+            p.future.done() for p in self._placeholders
+        )
+
+    def _raise_if_failed(self) -> None:
+        if self.cancelled():
+            raise CancelledError()
+        if (error := self._future.exception()) is not None:
+            raise error
+
+    def _notify(self) -> None:
+        with self._condition:
+            self._condition.notify_all()
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(self)
+            except Exception:
+                LOGGER.error("read task listener failed", exc_info=True)
+
+
+def read_ome_zarr_async(
+    path: PathLike,
+    *,
+    executor: Optional[ThreadPoolExecutor] = None,
+    levels: Optional[LevelSelection] = None,
+    time_prefetch: Optional[TimePrefetch] = None,
+    roi: Optional[RegionOfInterest] = None,
+    series: Optional[Sequence[str]] = None,
+) -> ReadTask:
+    """Starts reading the node tree at path in the background.
+
+    The options are the same as those of read_ome_zarr. If executor is
+    None, a shared executor with MAX_READ_WORKERS threads is used.
+    """
+    return ReadTask(
+        path,
+        executor=executor,
+        levels=levels,
+        time_prefetch=time_prefetch,
+        roi=roi,
+        series=series,
+    )
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(
+                max_workers=MAX_READ_WORKERS,
+                thread_name_prefix="napari-metadata-read",
+            )
+        return _EXECUTOR
+
+
+def _node_name(node: Node, path: PathLike) -> str:
+    name: Any = node.metadata.get("name")
+    if isinstance(name, list):
+        name = name[0] if len(name) == 1 else None
+    # The root node of a dataset may be named "/", so it is given the name
+    # of its path instead.
+    if name := str(name or "").strip("/"):
+        return name
+    return os.path.basename(str(path).rstrip("/"))
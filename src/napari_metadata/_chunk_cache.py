@@ -0,0 +1,269 @@
+"""Caches decoded chunks that are shared by all arrays that are read.
+
+Zarr arrays decode every chunk that they read from their chunk store.
+Arrays opened here instead read from a store that returns chunks that are
+already decoded, and whose metadata says that no decoding is needed. That
+store keeps recently read chunks in a least-recently-used cache with a
+bounded number of bytes, so that slicing a recently viewed region again
+reads and decodes nothing.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterator, Optional, Sequence
+
+import numcodecs
+import zarr
+from zarr.errors import ReadOnlyError
+from zarr.storage import BaseStore, KVStore
+
+from ._zip_store import archive_path
+
+LOGGER = logging.getLogger("napari_metadata._chunk_cache")
+
+
+@dataclass(frozen=True)
+class ChunkCacheStats:
+    hits: int
+    misses: int
+    size: int
+    nbytes: int
+    max_bytes: int
+
+
+class ChunkCache:
+    """A thread-safe least-recently-used cache with a bounded size in bytes.
+
+    Each entry belongs to a dataset, so that statistics can be reported
+    for each dataset as well as for the whole cache. Datasets should be
+    identified by their dataset_key.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 2**20) -> None:
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, max_bytes: int) -> None:
+        with self._lock:
+            self._max_bytes = max_bytes
+            self._evict()
+
+    def get(self, dataset: str, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            stats = self._dataset_counts(dataset)
+            if (dataset, key) in self._entries:
+                self._entries.move_to_end((dataset, key))
+                stats["hits"] += 1
+                return self._entries[(dataset, key)]
+            stats["misses"] += 1
+            return None
+
+    def put(self, dataset: str, key: Hashable, value: Any) -> None:
+        nbytes = _nbytes(value)
+        with self._lock:
+            if nbytes > self._max_bytes:
+                return
+            if (old := self._entries.pop((dataset, key), None)) is not None:
+                self._remove(dataset, _nbytes(old))
+            self._entries[(dataset, key)] = value
+            self._nbytes += nbytes
+            stats = self._dataset_counts(dataset)
+            stats["size"] += 1
+            stats["nbytes"] += nbytes
+            self._evict()
+
+    def discard(self, dataset: str, key: Hashable) -> None:
+        """Removes an entry, if it is in the cache."""
+        with self._lock:
+            if (value := self._entries.pop((dataset, key), None)) is not None:
+                self._remove(dataset, _nbytes(value))
+
+    def __contains__(self, dataset_and_key: Hashable) -> bool:
+        with self._lock:
+            return dataset_and_key in self._entries
+
+    def clear(self, dataset: Optional[str] = None) -> None:
+        """Removes the entries of one dataset or of the whole cache."""
+        with self._lock:
+            if dataset is None:
+                self._entries.clear()
+                self._nbytes = 0
+                self._stats.clear()
+                return
+            for key in [k for k in self._entries if k[0] == dataset]:
+                self._nbytes -= _nbytes(self._entries.pop(key))
+            self._stats.pop(dataset, None)
+
+    def stats(self, dataset: Optional[str] = None) -> ChunkCacheStats:
+        """Returns the statistics of one dataset or of the whole cache."""
+        with self._lock:
+            if dataset is None:
+                counts = self._stats.values()
+            else:
+                counts = [self._stats.get(dataset, {})]
+            return ChunkCacheStats(
+                hits=sum(c.get("hits", 0) for c in counts),
+                misses=sum(c.get("misses", 0) for c in counts),
+                size=sum(c.get("size", 0) for c in counts),
+                nbytes=sum(c.get("nbytes", 0) for c in counts),
+                max_bytes=self._max_bytes,
+            )
+
+    def _dataset_counts(self, dataset: str) -> Dict[str, int]:
+        if dataset not in self._stats:
+            self._stats[dataset] = dict(hits=0, misses=0, size=0, nbytes=0)
+        return self._stats[dataset]
+
+    def _remove(self, dataset: str, nbytes: int) -> None:
+        self._nbytes -= nbytes
+        stats = self._dataset_counts(dataset)
+        stats["size"] -= 1
+        stats["nbytes"] -= nbytes
+
+    def _evict(self) -> None:
+        while self._nbytes > self._max_bytes:
+            (dataset, _), value = self._entries.popitem(last=False)
+            self._remove(dataset, _nbytes(value))
+
+
+# The cache that is shared by all arrays opened by the reader.
+CHUNK_CACHE = ChunkCache()
+
+
+def dataset_key(path: str) -> str:
+    """Returns the key that identifies the dataset at path in the cache."""
+    path = str(path)
+    # All datasets in an archive change with it, so they share its key.
+    if (archive := archive_path(path)) is not None:
+        path = archive
+    if "://" in path:
+        return path.rstrip("/")
+    return str(Path(path).resolve())
+
+
+class DecodedChunkStore(BaseStore):
+    """A read-only store of the decoded chunks of one array."""
+
+    def __init__(
+        self,
+        store: BaseStore,
+        *,
+        url: str,
+        metadata: Dict[str, Any],
+        dataset: str,
+        cache: ChunkCache = CHUNK_CACHE,
+    ) -> None:
+        self._store = store
+        self._url = url
+        self._compressor = _get_codec(metadata.get("compressor"))
+        self._filters = [_get_codec(f) for f in metadata.get("filters") or []]
+        self._dataset = dataset
+        self._cache = cache
+
+    def __getitem__(self, key: str) -> Any:
+        if (chunk := self._get_cached(key)) is not None:
+            return chunk
+        return self._put_decoded(key, self._store[key])
+
+    def getitems(
+        self, keys: Sequence[str], *, contexts: Any = None
+    ) -> Dict[str, Any]:
+        chunks = {}
+        missing = []
+        for key in keys:
+            if (chunk := self._get_cached(key)) is not None:
+                chunks[key] = chunk
+            else:
+                missing.append(key)
+        if missing:
+            if contexts is None:
+                contexts = {}
+            encoded = self._store.getitems(
+                missing, contexts={k: contexts.get(k) for k in missing}
+            )
+            for key, data in encoded.items():
+                chunks[key] = self._put_decoded(key, data)
+        return chunks
+
+    def __contains__(self, key: str) -> bool:
+        cache_key = (self._dataset, (self._url, key))
+        return cache_key in self._cache or key in self._store
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._store)
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        raise ReadOnlyError()
+
+    def __delitem__(self, key: str) -> None:
+        raise ReadOnlyError()
+
+    def _get_cached(self, key: str) -> Optional[Any]:
+        return self._cache.get(self._dataset, (self._url, key))
+
+    def _put_decoded(self, key: str, data: Any) -> Any:
+        if self._compressor is not None:
+            data = self._compressor.decode(data)
+        for f in reversed(self._filters):
+            data = f.decode(data)
+        self._cache.put(self._dataset, (self._url, key), data)
+        return data
+
+
+def open_cached_array(
+    store: BaseStore,
+    *,
+    path: str,
+    metadata: Dict[str, Any],
+    url: str,
+    dataset: str,
+) -> zarr.Array:
+    """Opens the array at path in store whose decoded chunks are cached.
+
+    The metadata of the array must have already been read, so that
+    opening the array does not read anything. The url identifies the array
+    and the dataset identifies what it belongs to in the cache.
+    """
+    if metadata.get("dtype") == "|O":
+        # Object arrays need their codecs to know how to make objects.
+        return zarr.Array(
+            KVStore({_join(path, ".zarray"): metadata}),
+            path=path,
+            chunk_store=store,
+            read_only=True,
+        )
+    decoded_metadata = dict(metadata, compressor=None, filters=None)
+    chunk_store = DecodedChunkStore(
+        store, url=url, metadata=metadata, dataset=dataset
+    )
+    return zarr.Array(
+        KVStore({_join(path, ".zarray"): decoded_metadata}),
+        path=path,
+        chunk_store=chunk_store,
+        read_only=True,
+    )
+
+
+def _get_codec(config: Optional[Dict]) -> Optional[numcodecs.abc.Codec]:
+    return None if config is None else numcodecs.get_codec(dict(config))
+
+
+def _nbytes(value: Any) -> int:
+    return getattr(value, "nbytes", None) or len(value)
+
+
+def _join(path: str, key: str) -> str:
+    return f"{path}/{key}" if path else key
@@ -0,0 +1,171 @@
+"""Writes lazy arrays to zarr one chunk at a time.
+
+Writing a dask or zarr backed array with zarr or dask can read whole
+levels into memory before they are stored. Instead, the chunks of the
+target array are written concurrently on a thread pool: each reads only
+the region of the source that it covers, then encodes and stores it. The
+bytes of the chunks that are being written are bounded by a budget, so
+the memory used does not depend on the size of the source.
+"""
+import itertools
+import logging
+import math
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Deque, Iterable, Iterator, Optional, Tuple
+
+import dask
+import dask.array as da
+import numpy as np
+import zarr
+from dask.array.core import concatenate3
+from dask.core import flatten
+
+LOGGER = logging.getLogger("napari_metadata._chunk_writer")
+
+
+@dataclass(frozen=True)
+class WriteOptions:
+    """Options for writing the chunks of arrays.
+
+    At most max_workers chunks are written at the same time, and chunks
+    are only started while the chunks being written have fewer than
+    max_inflight_bytes bytes. A chunk that is larger than the budget is
+    written on its own.
+    """
+
+    max_workers: int = 4
+    max_inflight_bytes: int = 256 * 1024 * 1024
+
+    def __post_init__(self) -> None:
+        if self.max_workers < 1:
+            raise ValueError(
+                f"max_workers must be positive: {self.max_workers}"
+            )
+        if self.max_inflight_bytes < 1:
+            raise ValueError(
+                "max_inflight_bytes must be positive: "
+                f"{self.max_inflight_bytes}"
+            )
+
+
+class ByteBudget:
+    """Bounds the bytes that are in use by concurrent tasks."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self._max_bytes = max_bytes
+        self._used = 0
+        self._peak = 0
+        self._condition = threading.Condition()
+
+    @property
+    def peak(self) -> int:
+        """The most bytes that were in use at the same time."""
+        with self._condition:
+            return self._peak
+
+    def acquire(self, nbytes: int) -> None:
+        """Waits until nbytes fit in the budget, or nothing is in use."""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._used == 0
+                or self._used + nbytes <= self._max_bytes
+            )
+            self._used += nbytes
+            self._peak = max(self._peak, self._used)
+
+    def release(self, nbytes: int) -> None:
+        with self._condition:
+            self._used -= nbytes
+            self._condition.notify_all()
+
+
+def write_array(
+    source: Any,
+    target: zarr.Array,
+    options: Optional[WriteOptions] = None,
+    regions: Optional[Iterable[Tuple[slice, ...]]] = None,
+) -> ByteBudget:
+    """Writes source into target, one chunk of target at a time.
+
+    source may be any array that can be indexed with slices, such as a
+    numpy, dask or zarr array, and must have the same shape as target.
+    If regions is given, only those regions are written instead of every
+    chunk, which should each be one or more whole chunks of target.
+    Raises the first error of a chunk, after which no more chunks are
+    started. Returns the budget that bounded the chunks being written.
+    """
+    if options is None:
+        options = WriteOptions()
+    if tuple(source.shape) != tuple(target.shape):
+        raise ValueError(
+            f"source shape {source.shape} does not match "
+            f"target shape {target.shape}"
+        )
+    budget = ByteBudget(options.max_inflight_bytes)
+    itemsize = target.dtype.itemsize
+    failed = threading.Event()
+
+    def write_chunk(region: Tuple[slice, ...], nbytes: int) -> None:
+        try:
+            if not failed.is_set():
+                target[region] = read_region(source, region)
+        except BaseException:
+            failed.set()
+            raise
+        finally:
+            budget.release(nbytes)
+
+    pending: Deque[Future] = deque()
+    with ThreadPoolExecutor(max_workers=options.max_workers) as executor:
+        try:
+            if regions is None:
+                regions = chunk_regions(target)
+            for region in regions:
+                if failed.is_set():
+                    break
+                # Futures are bounded too, in case chunks are tiny.
+                while len(pending) >= 2 * options.max_workers:
+                    pending.popleft().result()
+                nbytes = math.prod(s.stop - s.start for s in region)
+                nbytes *= itemsize
+                budget.acquire(nbytes)
+                pending.append(executor.submit(write_chunk, region, nbytes))
+            while pending:
+                pending.popleft().result()
+        finally:
+            failed.set()
+            for future in pending:
+                future.cancel()
+    LOGGER.debug(
+        f"wrote {target.name} with at most {budget.peak} bytes in flight"
+    )
+    return budget
+
+
+def read_region(source: Any, region: Tuple[slice, ...]) -> np.ndarray:
+    """Reads a region of an array into memory."""
+    if isinstance(source, da.Array):
+        # The chunks are already written concurrently, so the tasks of a
+        # region are run on this thread. Only its tasks are kept, because
+        # ordering or optimizing the graph of the whole source for each
+        # chunk takes longer than computing it.
+        region_array = source[region]
+        keys = region_array.__dask_keys__()
+        graph = region_array.__dask_graph__().cull(set(flatten(keys)))
+        return concatenate3(dask.get(graph, keys))
+    return np.asarray(source[region])
+
+
+def chunk_regions(array: zarr.Array) -> Iterator[Tuple[slice, ...]]:
+    """Yields the region of each chunk of an array, in C order."""
+    grids = (
+        range(0, size, chunk) for size, chunk in zip(array.shape, array.chunks)
+    )
+    for starts in itertools.product(*grids):
+        yield tuple(
+            slice(start, min(start + chunk, size))
+            for start, chunk, size in zip(starts, array.chunks, array.shape)
+        )
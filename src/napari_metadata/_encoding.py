@@ -0,0 +1,231 @@
+"""Chooses how the chunks of an image are shaped and compressed when it is
+written.
+
+Chunks are shaped for how the image will be viewed: as 2D planes of its
+last two spatial dimensions, or as 3D blocks of its last three. The
+compressor is chosen by encoding a few chunks of the image with each
+candidate, so that it suits the image's dtype and content (e.g. integer
+images with few significant bits compress well with bit shuffling).
+"""
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from numcodecs import Blosc
+from numcodecs.abc import Codec
+
+from ._chunk_writer import read_region
+
+LOGGER = logging.getLogger("napari_metadata._encoding")
+
+# The attribute of an image group that records how its chunks were encoded.
+ENCODING_KEY = "napari-metadata-encoding"
+
+# The compressors that are tried, unless others are given.
+CANDIDATES: Tuple[Codec, ...] = (
+    Blosc(cname="lz4", clevel=5, shuffle=Blosc.SHUFFLE),
+    Blosc(cname="lz4", clevel=5, shuffle=Blosc.BITSHUFFLE),
+    Blosc(cname="zstd", clevel=3, shuffle=Blosc.SHUFFLE),
+    Blosc(cname="zstd", clevel=3, shuffle=Blosc.BITSHUFFLE),
+)
+
+# The number of dimensions of each chunk shape that can be accessed.
+ACCESS_DIMS = {"plane": 2, "block": 3}
+
+
+@dataclass(frozen=True)
+class EncodingOptions:
+    """Options for choosing the chunks and compressor of an image.
+
+    If chunks or compressor is None, it is chosen. Chunks have about
+    chunk_bytes bytes and span the dimensions that are viewed together
+    as set by access ("plane" or "block"). The compressor is the candidate
+    that encodes sample_chunks chunks of the image to the fewest bytes,
+    among those that are at most max_slowdown times slower than the
+    fastest candidate.
+    """
+
+    chunks: Optional[Tuple[int, ...]] = None
+    compressor: Optional[Codec] = None
+    access: str = "plane"
+    chunk_bytes: int = 1024 * 1024
+    candidates: Tuple[Codec, ...] = CANDIDATES
+    sample_chunks: int = 3
+    max_slowdown: float = 4.0
+
+    def __post_init__(self) -> None:
+        if self.access not in ACCESS_DIMS:
+            raise ValueError(
+                f"access must be one of {tuple(ACCESS_DIMS)}: {self.access}"
+            )
+        if self.chunk_bytes < 1:
+            raise ValueError(
+                f"chunk_bytes must be positive: {self.chunk_bytes}"
+            )
+        if self.compressor is None and not self.candidates:
+            raise ValueError("candidates must not be empty")
+        if self.sample_chunks < 1:
+            raise ValueError(
+                f"sample_chunks must be positive: {self.sample_chunks}"
+            )
+
+
+@dataclass(frozen=True)
+class Trial:
+    """The result of encoding sample chunks with a compressor."""
+
+    compressor: Codec
+    nbytes: int
+    encoded_nbytes: int
+    seconds: float
+
+    @property
+    def ratio(self) -> float:
+        return self.nbytes / max(self.encoded_nbytes, 1)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "compressor": self.compressor.get_config(),
+            "ratio": round(self.ratio, 3),
+            "seconds": round(self.seconds, 6),
+        }
+
+
+@dataclass(frozen=True)
+class Encoding:
+    """The chunks and compressor that an image is written with."""
+
+    chunks: Tuple[int, ...]
+    compressor: Codec
+    access: str
+    trials: Tuple[Trial, ...] = ()
+
+    def level_chunks(self, shape: Sequence[int]) -> Tuple[int, ...]:
+        """Returns the chunks of a level, which are no larger than it."""
+        return tuple(map(min, self.chunks, shape))
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "access": self.access,
+            "chunks": list(self.chunks),
+            "compressor": self.compressor.get_config(),
+            "trials": [trial.to_json() for trial in self.trials],
+        }
+
+
+def choose_encoding(
+    data: Any,
+    axes: List[Dict[str, str]],
+    options: Optional[EncodingOptions] = None,
+) -> Encoding:
+    """Chooses the chunks and compressor of an image with the given data
+    and axes, unless they are set by options.
+    """
+    if options is None:
+        options = EncodingOptions()
+    chunks = options.chunks
+    if chunks is None:
+        chunks = choose_chunks(
+            data.shape,
+            np.dtype(data.dtype).itemsize,
+            chunked_dims(axes, options.access),
+            options.chunk_bytes,
+        )
+    elif len(chunks) != len(data.shape):
+        raise ValueError(
+            f"chunks {chunks} do not match the shape {data.shape}"
+        )
+    if options.compressor is not None:
+        return Encoding(chunks, options.compressor, options.access)
+    samples = [
+        np.ascontiguousarray(read_region(data, region))
+        for region in sample_regions(data.shape, chunks, options.sample_chunks)
+    ]
+    trials = tuple(try_compressor(c, samples) for c in options.candidates)
+    fastest = min(trial.seconds for trial in trials)
+    chosen = min(
+        (t for t in trials if t.seconds <= options.max_slowdown * fastest),
+        key=lambda t: t.encoded_nbytes,
+    )
+    LOGGER.debug(
+        f"chose {chosen.compressor} with ratio {chosen.ratio:.2f} "
+        f"for chunks {chunks}"
+    )
+    return Encoding(chunks, chosen.compressor, options.access, trials)
+
+
+def chunked_dims(axes: List[Dict[str, str]], access: str) -> List[int]:
+    """Returns the dimensions that chunks span, which are the last spatial
+    dimensions, or the last dimensions if there are too few of those.
+    """
+    ndim = ACCESS_DIMS[access]
+    dims = [i for i, axis in enumerate(axes) if axis["type"] == "space"]
+    if len(dims) < min(ndim, len(axes)):
+        dims = list(range(len(axes)))
+    return dims[-ndim:]
+
+
+def choose_chunks(
+    shape: Sequence[int],
+    itemsize: int,
+    dims: Sequence[int],
+    chunk_bytes: int,
+) -> Tuple[int, ...]:
+    """Returns chunks that span dims with about chunk_bytes bytes, and have
+    a size of one in other dimensions.
+
+    The sizes of chunks in dims are powers of two that are as equal as
+    possible, except in dims that are smaller than that, whose chunks span
+    them so that the other dims can be larger.
+    """
+    chunks = [1] * len(shape)
+    items = max(chunk_bytes // itemsize, 1)
+    # Fit the smallest dims first, so that their leftover budget goes to
+    # the larger ones.
+    remaining = sorted(dims, key=lambda d: shape[d])
+    while remaining:
+        d = remaining.pop(0)
+        side = items ** (1 / (len(remaining) + 1))
+        if shape[d] <= side:
+            chunks[d] = max(shape[d], 1)
+        else:
+            chunks[d] = 2 ** max(int(math.log2(side)), 0)
+        items = max(items // chunks[d], 1)
+    return tuple(chunks)
+
+
+def sample_regions(
+    shape: Sequence[int], chunks: Sequence[int], count: int
+) -> List[Tuple[slice, ...]]:
+    """Returns the regions of up to count chunks that are evenly spread
+    through the grid of chunks, in C order.
+    """
+    grid = tuple(math.ceil(s / c) for s, c in zip(shape, chunks))
+    nchunks = math.prod(grid)
+    if nchunks == 0:
+        return []
+    indices = sorted({i * nchunks // count for i in range(count)})
+    regions = []
+    for index in indices:
+        position = np.unravel_index(index, grid)
+        regions.append(
+            tuple(
+                slice(p * c, min((p + 1) * c, s))
+                for p, c, s in zip(position, chunks, shape)
+            )
+        )
+    return regions
+
+
+def try_compressor(compressor: Codec, samples: List[np.ndarray]) -> Trial:
+    nbytes = encoded_nbytes = 0
+    start = time.perf_counter()
+    for sample in samples:
+        nbytes += sample.nbytes
+        encoded_nbytes += len(compressor.encode(sample))
+    return Trial(
+        compressor, nbytes, encoded_nbytes, time.perf_counter() - start
+    )
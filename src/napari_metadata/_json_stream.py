@@ -0,0 +1,178 @@
+"""Parses only the keys of JSON attributes that the reader uses.
+
+The attributes of large screens and of images with many channels can be
+tens of megabytes of JSON, most of which the reader never looks at (e.g.
+acquisition metadata written by other tools). json.loads builds every
+object in such a file, which takes seconds and many times the size of the
+file in memory. Instead, the top-level object is scanned key by key: the
+values of selected keys are decoded with json.loads, and other values are
+skipped by finding their end without building anything. Strings and other
+scalars are matched with regular expressions, and arrays and objects are
+skipped by counting the brackets outside of their strings with numpy, in
+windows of the data that grow from small. Small files are parsed with
+json.loads, which is faster when there is little to skip.
+"""
+import json
+import re
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import numpy as np
+from ome_zarr.types import JSONDict
+
+# Attribute files smaller than this are parsed in full.
+STREAMING_MIN_BYTES = 1 << 20
+
+# Maps keys to the selection of their value, which is None to select the
+# whole value, or another selection if the value is an object.
+Selection = Mapping[str, Optional["Selection"]]
+
+# The attributes used by the reader and by ome-zarr: the multiscales
+# (including their axes), the channels of images, plates, wells and labels.
+ATTRIBUTE_SELECTION: Selection = {
+    "multiscales": None,
+    "omero": {"channels": None, "rdefs": None, "name": None},
+    "plate": {
+        "acquisitions": None,
+        "columns": None,
+        "field_count": None,
+        "name": None,
+        "rows": None,
+        "version": None,
+        "wells": None,
+    },
+    "well": None,
+    "labels": None,
+    "image-label": None,
+    "bioformats2raw.layout": None,
+}
+
+# Windows of data in which the brackets of skipped containers are counted.
+MIN_WINDOW_BYTES = 1 << 12
+MAX_WINDOW_BYTES = 1 << 20
+
+_WHITESPACE = re.compile(rb"[ \t\n\r]*")
+_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_SCALAR = re.compile(rb"[^,:\]}\s]+")
+_ESCAPE = re.compile(rb"\\.", re.DOTALL)
+_QUOTE = ord('"')
+_OPENING_BRACE = ord("{")
+_CLOSING_BRACE = ord("}")
+_OPENING = frozenset(b"[{")
+
+
+def loads_attributes(data: bytes) -> JSONDict:
+    """Parses the keys of attributes that are used by the reader."""
+    if len(data) < STREAMING_MIN_BYTES:
+        return json.loads(data)
+    return loads_selected(data, ATTRIBUTE_SELECTION)
+
+
+def loads_selected(data: bytes, selection: Selection) -> Dict[str, Any]:
+    """Parses the selected keys of the JSON object in data.
+
+    Values that are skipped are only scanned for their end, so they are
+    not checked to be valid JSON.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    start = _skip_whitespace(data, 0)
+    value, end = _load_object(data, start, selection)
+    if _skip_whitespace(data, end) != len(data):
+        raise ValueError(f"extra data at byte {end}")
+    return value
+
+
+def _load_object(
+    data: bytes, pos: int, selection: Selection
+) -> Tuple[Dict[str, Any], int]:
+    _expect(data, pos, b"{")
+    values: Dict[str, Any] = {}
+    pos = _skip_whitespace(data, pos + 1)
+    if data.startswith(b"}", pos):
+        return values, pos + 1
+    while True:
+        if (match := _STRING.match(data, pos)) is None:
+            raise ValueError(f"expected a key at byte {pos}")
+        key = json.loads(match.group())
+        pos = _skip_whitespace(data, match.end())
+        _expect(data, pos, b":")
+        pos = _skip_whitespace(data, pos + 1)
+        if key not in selection:
+            pos = _skip_value(data, pos)
+        elif (subselection := selection[key]) is not None and (
+            data.startswith(b"{", pos)
+        ):
+            values[key], pos = _load_object(data, pos, subselection)
+        else:
+            end = _skip_value(data, pos)
+            values[key] = json.loads(data[pos:end])
+            pos = end
+        pos = _skip_whitespace(data, pos)
+        if data.startswith(b"}", pos):
+            return values, pos + 1
+        _expect(data, pos, b",")
+        pos = _skip_whitespace(data, pos + 1)
+
+
+def _skip_value(data: bytes, pos: int) -> int:
+    """Returns the position after the value that starts at pos."""
+    if pos >= len(data):
+        raise ValueError("unexpected end of data")
+    first = data[pos]
+    if first == ord('"'):
+        match = _STRING.match(data, pos)
+    elif first in _OPENING:
+        return _skip_container(data, pos)
+    else:
+        match = _SCALAR.match(data, pos)
+    if match is None:
+        raise ValueError(f"expected a value at byte {pos}")
+    return match.end()
+
+
+def _skip_container(data: bytes, pos: int) -> int:
+    """Returns the position after the array or object that starts at pos.
+
+    Brackets outside of strings are counted with numpy in windows of data
+    that grow from small, so that small containers are skipped quickly and
+    large ones in a few steps with a bounded amount of memory.
+    """
+    depth = 0
+    in_string = False
+    start = pos
+    size = MIN_WINDOW_BYTES
+    while start < len(data):
+        # Escaped characters (e.g. quotes) are replaced, so that every
+        # remaining quote starts or ends a string.
+        window = _ESCAPE.sub(b"__", data[start : start + size])  # noqa
+        # An escape that is cut by the end of the window is left for the
+        # next window.
+        if window.endswith(b"\\") and start + len(window) < len(data):
+            window = window[:-1]
+        chars = np.frombuffer(window, dtype=np.uint8)
+        inside = np.logical_xor.accumulate(chars == _QUOTE)
+        if in_string:
+            inside = ~inside
+        # Setting the 0x20 bit turns "[" into "{" and "]" into "}".
+        folded = chars | 0x20
+        opening = (folded == _OPENING_BRACE) & ~inside
+        closing = (folded == _CLOSING_BRACE) & ~inside
+        depths = np.cumsum(
+            opening.view(np.int8) - closing.view(np.int8), dtype=np.int32
+        )
+        if depths.min() <= -depth:
+            return start + int(np.argmax(depths <= -depth)) + 1
+        depth += int(depths[-1])
+        in_string = bool(inside[-1])
+        start += len(window)
+        size = min(2 * size, MAX_WINDOW_BYTES)
+    raise ValueError(f"unterminated value at byte {pos}")
+
+
+def _skip_whitespace(data: bytes, pos: int) -> int:
+    return _WHITESPACE.match(data, pos).end()
+
+
+def _expect(data: bytes, pos: int, token: bytes) -> None:
+    if not data.startswith(token, pos):
+        raise ValueError(f"expected {token.decode()!r} at byte {pos}")
@@ -0,0 +1,124 @@
+"""Reads tables of label properties that are stored in OME-Zarr.
+
+The layout follows the proposed NGFF tables specification [1]_, where an
+image group may contain a ``tables`` group of AnnData tables and each table
+annotates one of the image's labels. Only the ``obs`` dataframe of a table
+is used. Each of its columns is stored as a separate zarr array or group,
+so columns are read lazily and independently.
+
+.. [1] https://github.com/ome/ngff/pull/64
+"""
+import logging
+from typing import Dict, Iterator, Mapping, Optional, Tuple, Union
+
+import numpy as np
+import zarr
+from ome_zarr.io import ZarrLocation
+from zarr.storage import FSStore
+
+LOGGER = logging.getLogger("napari_metadata._label_table")
+
+# The name of the attribute of the obs group that stores its index column.
+INDEX_ATTRIBUTE = "_index"
+
+
+class LabelTable(Mapping[str, np.ndarray]):
+    """A read-only mapping from column name to column values.
+
+    Each column is read from the store when it is first accessed and is
+    then kept in memory.
+    """
+
+    def __init__(
+        self, group: zarr.Group, *, instance_key: Optional[str] = None
+    ) -> None:
+        self._obs: zarr.Group = group["obs"]
+        self._instance_key = instance_key
+        self._columns: Dict[str, np.ndarray] = {}
+
+    @property
+    def column_names(self) -> Tuple[str, ...]:
+        attrs = self._obs.attrs
+        if (names := attrs.get("column-order")) is None:
+            index_name = attrs.get(INDEX_ATTRIBUTE)
+            names = [k for k in self._obs.keys() if k != index_name]
+        return tuple(names)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name not in self._columns:
+            if name not in self.column_names:
+                raise KeyError(name)
+            self._columns[name] = read_column(self._obs[name])
+        return self._columns[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.column_names)
+
+    def __len__(self) -> int:
+        return len(self.column_names)
+
+    def index(self) -> np.ndarray:
+        """Returns the label values that identify each row."""
+        if self._instance_key is not None:
+            return self[self._instance_key]
+        index_name = self._obs.attrs.get(INDEX_ATTRIBUTE, INDEX_ATTRIBUTE)
+        return read_column(self._obs[index_name]).astype(np.int64)
+
+    def to_properties(self) -> Dict[str, np.ndarray]:
+        """Reads all columns as napari label properties."""
+        properties = {
+            name: self[name] for name in self if name != self._instance_key
+        }
+        properties["index"] = self.index()
+        return properties
+
+
+def read_column(column: Union[zarr.Array, zarr.Group]) -> np.ndarray:
+    """Reads all values of an AnnData dataframe column.
+
+    Missing values of categorical columns are None, and those of nullable
+    columns are NaN, so nullable integers and booleans are read as floats.
+    """
+    if isinstance(column, zarr.Array):
+        return column[...]
+    encoding = column.attrs.get("encoding-type")
+    if encoding == "categorical":
+        codes = column["codes"][...]
+        categories = column["categories"][...].astype(object)
+        values = categories[np.maximum(codes, 0)]
+        values[codes < 0] = None
+        return values
+    if encoding in ("nullable-integer", "nullable-boolean"):
+        values = column["values"][...].astype(np.float64)
+        values[column["mask"][...]] = np.nan
+        return values
+    raise ValueError(f"Unsupported column encoding: {encoding}")
+
+
+def find_label_table(location: ZarrLocation) -> Optional[LabelTable]:
+    """Finds the table that annotates the labels at the given location.
+
+    The labels are expected to be in the labels group of an image, which
+    is where its tables group is searched for.
+    """
+    tables = _open_group(location.subpath("../../tables"))
+    if tables is None:
+        return None
+    name = location.basename()
+    for table_name in tables.attrs.get("tables", []):
+        table = tables[table_name]
+        region = table.attrs.get("region", {})
+        region_path = region.get("path", "") if region else ""
+        if region_path.rstrip("/").split("/")[-1] == name:
+            return LabelTable(
+                table, instance_key=table.attrs.get("instance_key")
+            )
+    return None
+
+
+def _open_group(path: str) -> Optional[zarr.Group]:
+    try:
+        return zarr.open_group(FSStore(path, mode="r"), mode="r")
+    except Exception:
+        LOGGER.debug(f"no group at {path}", exc_info=True)
+        return None
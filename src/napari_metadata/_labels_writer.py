@@ -0,0 +1,242 @@
+"""Writes labels layers as OME-Zarr, rewriting only the chunks that were
+painted when they are saved where they were read from.
+
+The reader gives labels with a single level (or every labels image, if
+PAINT_MULTISCALE_LABELS is set) a PaintedArray, which records the chunks
+that painting, filling, undoing or redoing changed. Saving the labels to
+the dataset that they were read from then only rewrites those chunks and
+the tiles of the coarser levels that cover them, so saving takes time in
+proportion to what was painted rather than to the size of the labels.
+Labels that are written anywhere else are written in full.
+"""
+import itertools
+import logging
+import math
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import zarr
+from npe2.types import ArrayLike
+from ome_zarr.format import CurrentFormat
+from zarr.storage import FSStore
+
+from ._chunk_cache import CHUNK_CACHE, dataset_key
+from ._chunk_writer import WriteOptions, write_array
+from ._metadata_cache import METADATA_CACHE
+from ._metadata_writer import (
+    ATTRIBUTES_KEY,
+    read_json,
+    replace_json,
+    update_consolidated,
+)
+from ._painted_array import ChunkIndex, PaintedArray, chunk_region
+from ._pyramid import (
+    DOWNSAMPLE_FACTOR,
+    PyramidOptions,
+    downsampled_shape,
+    write_downsampled,
+)
+from ._writer import write_multiscale_image
+
+LOGGER = logging.getLogger("napari_metadata._labels_writer")
+
+# The pyramid that is built when labels are written in full, unless other
+# options are given. No pyramid is built if this is None.
+LABELS_PYRAMID: Optional[PyramidOptions] = None
+
+
+def write_labels(
+    path: str,
+    data: ArrayLike,
+    attributes: Dict[str, Any],
+    *,
+    pyramid: Optional[PyramidOptions] = None,
+    write_options: Optional[WriteOptions] = None,
+) -> List[str]:
+    """Writes labels layer data to path as OME-Zarr.
+
+    If data is a PaintedArray that was read from a labels image in the
+    dataset at path, only its painted chunks are rewritten.
+    Otherwise, path must not exist, and the labels are written to it in
+    full as a labels image, with a pyramid as set by pyramid, or
+    LABELS_PYRAMID if it is None. Coarser levels are made by taking the
+    nearest pixels, so that they only have labels of the finest level.
+    """
+    if (
+        isinstance(data, PaintedArray)
+        and data.url is not None
+        and is_within(data.url, path)
+    ):
+        update_labels(data, attributes, write_options)
+        CHUNK_CACHE.clear(data.dataset or dataset_key(path))
+        # Later reads, painting and undoing start from what was written.
+        data.clear()
+        return [path]
+    if pyramid is None:
+        pyramid = LABELS_PYRAMID
+    if pyramid is not None and pyramid.method != "nearest":
+        raise ValueError(f"labels cannot be downsampled by {pyramid.method}")
+    root = write_multiscale_image(
+        path, data, attributes, pyramid=pyramid, write_options=write_options
+    )
+    colored = [v for v in attributes.get("color") or {} if v is not None]
+    root.attrs["image-label"] = updated_image_label(
+        {"version": CurrentFormat().version}, colored, attributes
+    )
+    return [path]
+
+
+def update_labels(
+    data: PaintedArray,
+    attributes: Dict[str, Any],
+    write_options: Optional[WriteOptions] = None,
+) -> None:
+    """Rewrites the painted chunks of the labels image that data was read
+    from, and the tiles of its coarser levels that cover them.
+
+    Raises a ValueError if data does not have the shape of the finest
+    level of the image, or if its coarser levels were not downsampled by
+    a factor of two. Nothing is written in that case.
+    """
+    url = data.url
+    assert url is not None
+    group = zarr.open_group(url, mode="r+")
+    levels = [group[p] for p in level_paths(group)]
+    if data.shape != levels[0].shape:
+        raise ValueError(
+            f"labels of shape {data.shape} cannot be written to {url}, "
+            f"which has shape {levels[0].shape}"
+        )
+    level_dims = []
+    for previous, level in zip(levels, levels[1:]):
+        dims = [
+            d
+            for d, (a, b) in enumerate(zip(previous.shape, level.shape))
+            if a != b
+        ]
+        if level.shape != downsampled_shape(previous.shape, dims):
+            raise ValueError(
+                f"level {level.name} of {url} was not downsampled by a "
+                f"factor of {DOWNSAMPLE_FACTOR}, so it cannot be updated"
+            )
+        level_dims.append(dims)
+
+    # Chunks are painted in the grid of the array that was read.
+    painted = data.painted
+    regions = [
+        chunk_region(i, levels[0].chunks, levels[0].shape)
+        for i in sorted(
+            covering_chunks(painted.regions(data.shape), levels[0].chunks)
+        )
+    ]
+    write_array(data, levels[0], write_options, regions)
+    for previous, level, dims in zip(levels, levels[1:], level_dims):
+        covered = (downsampled_region(r, dims) for r in regions)
+        regions = [
+            chunk_region(i, level.chunks, level.shape)
+            for i in sorted(covering_chunks(covered, level.chunks))
+        ]
+        write_downsampled(
+            previous,
+            level,
+            dims,
+            write_options,
+            method="nearest",
+            regions=regions,
+        )
+
+    image_label = group.attrs.get("image-label", {})
+    updated = updated_image_label(image_label, painted.values, attributes)
+    if updated != image_label:
+        save_image_label(url, data.dataset or url, updated)
+        METADATA_CACHE.clear()
+    LOGGER.debug(f"rewrote {len(painted)} painted chunks of {url}")
+
+
+def save_image_label(
+    url: str, dataset: str, image_label: Dict[str, Any]
+) -> None:
+    """Saves the image-label attributes of the labels image at url.
+
+    The consolidated metadata of the groups between the image and the root
+    of its dataset is updated too, so that readers of it see the change.
+    """
+    store = FSStore(url, mode="a")
+    attrs = read_json(store, ATTRIBUTES_KEY)
+    attrs["image-label"] = image_label
+    replace_json(store, ATTRIBUTES_KEY, attrs)
+    url = dataset_key(url)
+    root = dataset_key(dataset) if is_within(url, dataset) else url
+    parts: List[str] = []
+    if url != root:
+        parts = url[len(root) :].strip("/").split("/")  # noqa
+    for n in range(len(parts) + 1):
+        parent = "/".join([root, *parts[:n]])
+        key = "/".join([*parts[n:], ATTRIBUTES_KEY])
+        update_consolidated(FSStore(parent, mode="a"), key, attrs)
+
+
+def updated_image_label(
+    image_label: Dict[str, Any],
+    values: Iterable[int],
+    attributes: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Returns image-label metadata with the colors of the given label
+    values that are set in the attributes of a layer and not yet listed.
+    """
+    colors = list(image_label.get("colors", []))
+    listed = {c.get("label-value") for c in colors}
+    layer_colors = attributes.get("color") or {}
+    for value in sorted(int(v) for v in values):
+        if value in listed or value not in layer_colors:
+            continue
+        rgba = np.round(np.asarray(layer_colors[value]) * 255)
+        colors.append(
+            {"label-value": value, "rgba": rgba.astype(int).tolist()}
+        )
+    if not colors:
+        return image_label
+    return {**image_label, "colors": colors}
+
+
+def level_paths(group: zarr.Group) -> List[str]:
+    """Returns the paths of the levels of a multiscale image, from finest
+    to coarsest.
+    """
+    datasets = group.attrs["multiscales"][0]["datasets"]
+    return [dataset["path"] for dataset in datasets]
+
+
+def is_within(url: str, path: str) -> bool:
+    """Returns True if url is path or inside it."""
+    url, path = dataset_key(url), dataset_key(path)
+    return url == path or url.startswith(path.rstrip("/") + "/")
+
+
+def downsampled_region(
+    region: Tuple[slice, ...], dims: Sequence[int]
+) -> Tuple[slice, ...]:
+    """Returns the region of a downsampled level that region covers."""
+    return tuple(
+        slice(
+            s.start // DOWNSAMPLE_FACTOR,
+            math.ceil(s.stop / DOWNSAMPLE_FACTOR),
+        )
+        if d in dims
+        else s
+        for d, s in enumerate(region)
+    )
+
+
+def covering_chunks(
+    regions: Iterable[Tuple[slice, ...]], chunks: Sequence[int]
+) -> Set[ChunkIndex]:
+    """Returns the indices of the chunks that cover regions."""
+    covering: Set[ChunkIndex] = set()
+    for region in regions:
+        ranges = (
+            range(s.start // c, (s.stop - 1) // c + 1)
+            for s, c in zip(region, chunks)
+        )
+        covering.update(itertools.product(*ranges))
+    return covering
@@ -0,0 +1,299 @@
+"""Lazy array-like views that napari can use as layer data.
+
+These only implement the parts of the array interface that napari needs
+to slice layer data (i.e. shape, dtype, ndim and __getitem__), so that
+wrapping an array never reads any of its data.
+"""
+from typing import Any, Optional, Sequence, Tuple
+
+import numpy as np
+import zarr
+
+
+class IndexedArray:
+    """A lazy view of an array at one index of one of its axes.
+
+    This works the same for any array-like (e.g. dask, zarr or numpy),
+    because it only indexes into the wrapped array when it is indexed.
+    """
+
+    def __init__(self, array: Any, axis: int, index: int) -> None:
+        ndim = len(array.shape)
+        if not -ndim <= axis < ndim:
+            raise ValueError(f"axis {axis} is out of bounds for {ndim} dims")
+        axis %= ndim
+        size = array.shape[axis]
+        if not -size <= index < size:
+            raise IndexError(
+                f"index {index} is out of bounds for axis {axis} "
+                f"with size {size}"
+            )
+        self._array = array
+        self._axis = axis
+        self._index = index % size
+
+    @property
+    def array(self) -> Any:
+        return self._array
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        shape = tuple(self._array.shape)
+        return shape[: self._axis] + shape[self._axis + 1 :]  # noqa
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._array.dtype
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape))
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getitem__(self, key: Any) -> Any:
+        key = expand_key(key, self.ndim)
+        key = key[: self._axis] + (self._index,) + key[self._axis :]  # noqa
+        # Arrays that return views like this one are read with their read
+        # method, so that indexing a view does not return another view.
+        if (read := getattr(self._array, "read", None)) is not None:
+            return read(key)
+        return self._array[key]
+
+    def __array__(self, dtype=None) -> np.ndarray:
+        return np.asarray(self[...], dtype=dtype)
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(shape={self.shape}, dtype={self.dtype}, "
+            f"array={type(self._array).__name__})"
+        )
+
+
+class SqueezedArray(IndexedArray):
+    """A lazy view of an array without one of its axes of length 1."""
+
+    def __init__(self, array: Any, axis: int) -> None:
+        ndim = len(array.shape)
+        if not -ndim <= axis < ndim:
+            raise ValueError(f"axis {axis} is out of bounds for {ndim} dims")
+        if array.shape[axis] != 1:
+            raise ValueError(
+                f"Cannot squeeze axis {axis % ndim} of length "
+                f"{array.shape[axis]}"
+            )
+        super().__init__(array, axis, 0)
+
+
+class CroppedArray:
+    """A lazy view of a box of an array.
+
+    Like IndexedArray, this only indexes into the wrapped array when it
+    is indexed, so only the data of the box is ever read.
+    """
+
+    def __init__(self, array: Any, box: Sequence[slice]) -> None:
+        shape = tuple(array.shape)
+        if len(box) != len(shape):
+            raise ValueError(
+                f"box has {len(box)} dims, but the array has {len(shape)}"
+            )
+        starts = []
+        stops = []
+        for b, size in zip(box, shape):
+            start, stop, step = b.indices(size)
+            if step != 1:
+                raise ValueError(f"box must have steps of 1: {b}")
+            starts.append(start)
+            stops.append(max(start, stop))
+        self._array = array
+        self._starts = tuple(starts)
+        self._shape = tuple(e - s for s, e in zip(starts, stops))
+
+    @property
+    def array(self) -> Any:
+        return self._array
+
+    @property
+    def starts(self) -> Tuple[int, ...]:
+        """The index of the first element of the box in the array."""
+        return self._starts
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self._shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._array.dtype
+
+    @property
+    def ndim(self) -> int:
+        return len(self._shape)
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self._shape))
+
+    def __len__(self) -> int:
+        return self._shape[0]
+
+    def __getitem__(self, key: Any) -> Any:
+        key = expand_key(key, self.ndim)
+        if (axis := single_index_axis(key)) is not None:
+            return IndexedArray(self, axis, key[axis])
+        return self.read(key)
+
+    def read(self, key: Any) -> np.ndarray:
+        """Reads the data at key, which is never a lazy view."""
+        key = expand_key(key, self.ndim)
+        key = tuple(
+            _offset_key(k, start, size)
+            for k, start, size in zip(key, self._starts, self._shape)
+        )
+        if (read := getattr(self._array, "read", None)) is not None:
+            return np.asarray(read(key))
+        return np.asarray(self._array[key])
+
+    def __array__(self, dtype=None) -> np.ndarray:
+        return np.asarray(self.read(...), dtype=dtype)
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(shape={self.shape}, dtype={self.dtype}, "
+            f"starts={self._starts}, array={type(self._array).__name__})"
+        )
+
+
+class LazyZarrArray:
+    """A thin view of a zarr array that reads chunks when it is indexed.
+
+    Unlike a dask array, this does not need a task per chunk, so opening
+    and slicing an array with millions of chunks is as cheap as for an
+    array with one chunk.
+    """
+
+    def __init__(self, array: zarr.Array) -> None:
+        self._array = array
+
+    @property
+    def array(self) -> zarr.Array:
+        return self._array
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self._array.shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._array.dtype
+
+    @property
+    def ndim(self) -> int:
+        return self._array.ndim
+
+    @property
+    def size(self) -> int:
+        return self._array.size
+
+    @property
+    def chunks(self) -> Tuple[Tuple[int, ...], ...]:
+        """The sizes of the chunks along each dimension, like dask."""
+        return tuple(
+            (c,) * (s // c) + ((s % c,) if s % c else ())
+            for s, c in zip(self.shape, self._array.chunks)
+        )
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getitem__(self, key: Any) -> Any:
+        key = expand_key(key, self.ndim)
+        if (axis := single_index_axis(key)) is not None:
+            return IndexedArray(self, axis, key[axis])
+        return self.read(key)
+
+    def read(self, key: Any) -> np.ndarray:
+        """Reads the data at key, which is never a lazy view."""
+        key = expand_key(key, self.ndim)
+        if any(isinstance(k, (np.ndarray, list)) for k in key):
+            return self._array.oindex[key]
+        return self._array[key]
+
+    def __array__(self, dtype=None) -> np.ndarray:
+        return np.asarray(self.read(...), dtype=dtype)
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(shape={self.shape}, dtype={self.dtype}, "
+            f"chunks={self.chunks})"
+        )
+
+
+def expand_key(key: Any, ndim: int) -> Tuple:
+    """Expands a basic index into a tuple with one entry per dimension.
+
+    Only integers, slices, arrays and a single Ellipsis are supported,
+    which is enough for how napari indexes into layer data.
+    """
+    if not isinstance(key, tuple):
+        key = (key,)
+    if any(k is None for k in key):
+        raise IndexError("Adding new axes is not supported")
+    n_ellipsis = sum(k is Ellipsis for k in key)
+    if n_ellipsis > 1:
+        raise IndexError("An index can only have a single ellipsis")
+    if n_ellipsis == 1:
+        i = next(i for i, k in enumerate(key) if k is Ellipsis)
+        fill = (slice(None),) * (ndim - len(key) + 1)
+        key = key[:i] + fill + key[i + 1 :]  # noqa
+    if len(key) > ndim:
+        raise IndexError(
+            f"Too many indices: array is {ndim}-dimensional, "
+            f"but {len(key)} were indexed"
+        )
+    return key + (slice(None),) * (ndim - len(key))
+
+
+def single_index_axis(key: Tuple) -> Optional[int]:
+    """Returns the axis that an expanded key indexes with an integer, if
+    it is the only one and every other axis is fully sliced.
+
+    This is how napari splits the channels of an image, which should not
+    read any data.
+    """
+    axes = [i for i, k in enumerate(key) if isinstance(k, (int, np.integer))]
+    if len(axes) != 1:
+        return None
+    full = slice(None)
+    if any(
+        not isinstance(k, slice) or k != full
+        for i, k in enumerate(key)
+        if i != axes[0]
+    ):
+        return None
+    return axes[0]
+
+
+def _offset_key(key: Any, start: int, size: int) -> Any:
+    """Returns the key of a box's dimension in the array that it is in."""
+    if isinstance(key, slice):
+        first, stop, step = key.indices(size)
+        if step < 0 and stop < 0:
+            return slice(start + first, start - 1 if start > 0 else None, step)
+        return slice(start + first, start + stop, step)
+    if isinstance(key, (int, np.integer)):
+        if not -size <= key < size:
+            raise IndexError(f"index {key} is out of bounds for size {size}")
+        return start + int(key) % size
+    indices = np.asarray(key)
+    if indices.dtype == bool:
+        indices = np.nonzero(indices)[0]
+    if np.any((indices < -size) | (indices >= size)):
+        raise IndexError(f"index out of bounds for size {size}")
+    return start + indices % size
@@ -0,0 +1,415 @@
+"""Caches metadata that is parsed from OME-Zarr attribute files.
+
+Entries are keyed by the path of an attribute file and its version
+(e.g. modification time or ETag), so that reopening an unchanged dataset
+skips reading and parsing its JSON, while any change to the file
+invalidates the entry.
+
+If a dataset has consolidated metadata (i.e. a ``.zmetadata`` file), that
+single file is read instead of the attribute files of all of its groups
+and arrays.
+
+Zarr v3 datasets are read through the same locations, which present the
+metadata of each node as the Zarr v2 files that ome-zarr reads.
+"""
+import json
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Optional, Tuple, Union
+
+import dask.array as da
+import zarr
+from ome_zarr.format import CurrentFormat, Format
+from ome_zarr.io import ZarrLocation
+from ome_zarr.types import JSONDict, PathLike
+from zarr.storage import BaseStore
+
+from ._chunk_cache import dataset_key, open_cached_array
+from ._json_stream import loads_attributes
+from ._lazy_array import LazyZarrArray
+from ._zarr_v3 import ZARR_JSON_KEY, ZarrV3Array, v2_metadata
+from ._zip_store import is_zip_path, zip_url
+
+LOGGER = logging.getLogger("napari_metadata._metadata_cache")
+
+# The keys of file info that identify the version of a file, in the order
+# of preference. Local files have mtime, object stores usually have ETag.
+VERSION_INFO_KEYS = ("mtime", "ETag", "etag", "LastModified", "last_modified")
+
+# The key of the file that stores the consolidated metadata of a dataset.
+CONSOLIDATED_METADATA_KEY = ".zmetadata"
+
+# The names of the files that consolidated metadata replaces.
+ZARR_METADATA_NAMES = (".zarray", ".zgroup", ".zattrs")
+
+# The maximum number of chunks of an array that is loaded as a dask array.
+# Larger arrays are loaded as thin views of their zarr arrays instead.
+MAX_DASK_CHUNKS = 10_000
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    size: int
+    max_size: int
+
+
+class MetadataCache:
+    """A thread-safe least-recently-used cache with a bounded size."""
+
+    def __init__(self, max_size: int = 1024) -> None:
+        self._max_size = max_size
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @max_size.setter
+    def max_size(self, max_size: int) -> None:
+        with self._lock:
+            self._max_size = max_size
+            self._evict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return self._entries[key]
+            self._misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                size=len(self._entries),
+                max_size=self._max_size,
+            )
+
+    def _evict(self) -> None:
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+
+# The cache that is shared by all reads in this process.
+METADATA_CACHE = MetadataCache()
+
+
+@dataclass
+class ConsolidatedMetadata:
+    """The metadata of all groups and arrays in a dataset.
+
+    Keys are paths relative to the root of the dataset, such as
+    ``0/.zarray``.
+    """
+
+    root: str
+    store: BaseStore
+    metadata: Dict[str, JSONDict]
+    version: Optional[Tuple]
+
+    def relative_path(self, path: str) -> Optional[str]:
+        """Returns a path relative to the root, or None if it is outside."""
+        root = self.root.rstrip("/") + "/"
+        path = path.rstrip("/") + "/"
+        if not path.startswith(root):
+            return None
+        return path[len(root) :].rstrip("/")  # noqa
+
+    def get(self, key: str) -> Optional[JSONDict]:
+        """Returns the metadata at key, or None if it is not known.
+
+        Missing metadata of a known group or array is empty. Groups and
+        arrays that were added after consolidating (e.g. labels written by
+        other tools) are not known, so their metadata must be read.
+        """
+        if key in self.metadata:
+            return self.metadata[key]
+        parent = key.rpartition("/")[0]
+        prefix = f"{parent}/" if parent else ""
+        for name in (".zgroup", ".zarray"):
+            if f"{prefix}{name}" in self.metadata:
+                return {}
+        return None
+
+
+class CachedZarrLocation(ZarrLocation):
+    """A zarr location that reads JSON through the process-wide cache.
+
+    Child locations created by ome-zarr's reader have the same type, so
+    the whole node tree shares the cache. They also share the consolidated
+    metadata of their root, if it has any, and its Zarr format.
+    """
+
+    def __init__(
+        self,
+        path: PathLike,
+        mode: str = "r",
+        fmt: Format = CurrentFormat(),
+        *,
+        consolidated: Optional[ConsolidatedMetadata] = None,
+        find_consolidated: bool = True,
+        dataset: Optional[str] = None,
+        zarr_format: Optional[int] = None,
+    ) -> None:
+        # Set before initializing the base class, which reads metadata.
+        self._consolidated = consolidated
+        self._dataset = dataset
+        self._zarr_format = zarr_format
+        self._find_consolidated = (
+            find_consolidated and consolidated is None and "r" in mode
+        )
+        super().__init__(path, mode=mode, fmt=fmt)
+        # The base class replaces its store if it detects another format,
+        # so chunks must be read with that store instead.
+        consolidated = self._consolidated
+        if consolidated is not None and consolidated.root == self.subpath():
+            consolidated.store = self.store
+        if self._dataset is None:
+            self._dataset = dataset_key(self.subpath())
+
+    @property
+    def dataset(self) -> str:
+        """The key of the dataset that this location belongs to."""
+        return self._dataset
+
+    @property
+    def zarr_format(self) -> Optional[int]:
+        """The Zarr format of this location, or None if it is unknown
+        (e.g. because nothing exists at this location).
+        """
+        return self._zarr_format
+
+    @property
+    def consolidated(self) -> Optional[ConsolidatedMetadata]:
+        """The consolidated metadata of this location, if any."""
+        if self._find_consolidated:
+            self._find_consolidated = False
+            self._consolidated = read_consolidated_metadata(self)
+        return self._consolidated
+
+    def create(self, path: str) -> "CachedZarrLocation":
+        return type(self)(
+            self.subpath(path),
+            mode=self.mode,
+            fmt=self.fmt,
+            consolidated=self.consolidated,
+            find_consolidated=False,
+            dataset=self.dataset,
+            zarr_format=self.zarr_format,
+        )
+
+    def open_array(self, subpath: str = "") -> Union[zarr.Array, ZarrV3Array]:
+        """Opens the array at subpath for reading.
+
+        Its decoded chunks are shared with all other arrays that are read
+        through the process-wide chunk cache. If the array is in
+        consolidated metadata, no metadata is read.
+        """
+        url = self.subpath(subpath)
+        store, path = self.store, subpath.strip("/")
+        metadata = self.get_json(f"{path}/.zarray" if path else ".zarray")
+        if metadata and self.zarr_format == 3:
+            return ZarrV3Array(
+                self.store.fs,
+                f"{self.store.path}/{path}",
+                metadata,
+                url=url,
+                dataset=self.dataset,
+            )
+        if (consolidated := self.consolidated) is not None:
+            if (relative_path := consolidated.relative_path(url)) is not None:
+                store, path = consolidated.store, relative_path
+        if not metadata:
+            # Let zarr raise the appropriate error.
+            return zarr.open_array(self.store, path=subpath, mode="r")
+        return open_cached_array(
+            store,
+            path=path,
+            metadata=metadata,
+            url=url,
+            dataset=self.dataset,
+        )
+
+    def load(
+        self, subpath: str = ""
+    ) -> Union[da.Array, LazyZarrArray, ZarrV3Array]:
+        """Loads the array at subpath lazily.
+
+        Arrays with many chunks are not returned as dask arrays, because
+        computing any part of them needs a task graph with every chunk.
+        """
+        array = self.open_array(subpath)
+        if isinstance(array, ZarrV3Array):
+            if array.nchunks > MAX_DASK_CHUNKS:
+                return array
+            return da.from_array(array, chunks=array.chunks, fancy=False)
+        if array.nchunks > MAX_DASK_CHUNKS:
+            return LazyZarrArray(array)
+        return da.from_zarr(array)
+
+    def cache_key(self, subpath: str) -> Optional[Tuple]:
+        """Returns the cache key of the file at subpath.
+
+        Returns None if the file does not exist or if its version cannot
+        be determined, in which case it should not be cached.
+        """
+        key = self._consolidated_key(subpath)
+        if key is not None and self.consolidated.get(key) is not None:
+            if (version := self.consolidated.version) is not None:
+                return version + (key,)
+        if (zarr_json := self._zarr_json_subpath(subpath)) is not None:
+            key = self.cache_key(zarr_json)
+            return None if key is None else key + (subpath,)
+        path = self.subpath(subpath)
+        try:
+            info = self.store.fs.info(path)
+        except Exception:
+            return None
+        for key in VERSION_INFO_KEYS:
+            if (version := info.get(key)) is not None:
+                return (path, str(version), info.get("size"))
+        return None
+
+    def get_json(self, subpath: str) -> JSONDict:
+        if (zarr_json := self._zarr_json_subpath(subpath)) is not None:
+            name = subpath.split("/")[-1]
+            return v2_metadata(self.get_json(zarr_json), name)
+        value = self._get_cached_json(subpath)
+        # The format of a dataset is found when its root is opened, which
+        # first reads .zarray and then .zgroup.
+        name = subpath.split("/")[-1]
+        if self._zarr_format is None and name in (".zarray", ".zgroup"):
+            if value:
+                self._zarr_format = 2
+            elif name == ".zgroup":
+                zarr_json = self._get_cached_json(
+                    subpath[: -len(name)] + ZARR_JSON_KEY
+                )
+                if zarr_json.get("zarr_format") == 3:
+                    self._zarr_format = 3
+                    return v2_metadata(zarr_json, name)
+        return value
+
+    def _get_cached_json(self, subpath: str) -> JSONDict:
+        if (key := self._consolidated_key(subpath)) is not None:
+            if (value := self.consolidated.get(key)) is not None:
+                return value
+        key = self.cache_key(subpath)
+        if key is None:
+            return self._read_json(subpath)
+        if (value := METADATA_CACHE.get(key)) is None:
+            value = self._read_json(subpath)
+            METADATA_CACHE.put(key, value)
+        return value
+
+    def _read_json(self, subpath: str) -> JSONDict:
+        name = subpath.split("/")[-1]
+        if name == ".zattrs":
+            return self._read_attributes(subpath)
+        if name != ZARR_JSON_KEY:
+            return super().get_json(subpath)
+        # The store would replace the dot in this key with its dimension
+        # separator, so read it from the file system instead.
+        try:
+            return json.loads(self.store.fs.cat_file(self.subpath(subpath)))
+        except FileNotFoundError:
+            return {}
+        except Exception:
+            LOGGER.exception(f"failed to read {subpath}")
+            return {}
+
+    def _read_attributes(self, subpath: str) -> JSONDict:
+        """Reads attributes like the base class reads JSON, but only parses
+        the keys that are used if the file is large.
+        """
+        try:
+            data = self.store.get(subpath)
+            if not data:
+                return {}
+            return loads_attributes(data)
+        except KeyError:
+            return {}
+        except Exception:
+            LOGGER.exception(f"failed to read {subpath}")
+            return {}
+
+    def _zarr_json_subpath(self, subpath: str) -> Optional[str]:
+        """Returns the subpath of the zarr.json file that replaces the
+        Zarr v2 metadata file at subpath, if this is a Zarr v3 location.
+        """
+        name = subpath.split("/")[-1]
+        if self._zarr_format != 3 or name not in ZARR_METADATA_NAMES:
+            return None
+        return subpath[: -len(name)] + ZARR_JSON_KEY
+
+    def _consolidated_key(self, subpath: str) -> Optional[str]:
+        """Returns the key of subpath in the consolidated metadata.
+
+        Returns None if there is no consolidated metadata or if subpath
+        is not one of the metadata files it contains.
+        """
+        if subpath.split("/")[-1] not in ZARR_METADATA_NAMES:
+            return None
+        if (consolidated := self.consolidated) is None:
+            return None
+        return consolidated.relative_path(self.subpath(subpath))
+
+
+def read_consolidated_metadata(
+    location: CachedZarrLocation,
+) -> Optional[ConsolidatedMetadata]:
+    """Reads the consolidated metadata at the root of a location.
+
+    Returns None if there is none, in which case each metadata file
+    should be read separately.
+    """
+    try:
+        metadata = location.get_json(CONSOLIDATED_METADATA_KEY)
+    except Exception:
+        LOGGER.debug("failed to read consolidated metadata", exc_info=True)
+        return None
+    if metadata.get("zarr_consolidated_format") != 1:
+        return None
+    return ConsolidatedMetadata(
+        root=location.subpath(""),
+        store=location.store,
+        metadata=metadata["metadata"],
+        version=location.cache_key(CONSOLIDATED_METADATA_KEY),
+    )
+
+
+def parse_cached_url(path: PathLike) -> Optional[CachedZarrLocation]:
+    """Like ome_zarr.io.parse_url, but returns a cached location.
+
+    Local zip archives are read directly, without extracting them.
+    """
+    try:
+        if is_zip_path(path):
+            path = zip_url(path)
+        location = CachedZarrLocation(path)
+    except Exception:
+        LOGGER.debug(f"failed to parse {path}", exc_info=True)
+        return None
+    return location if location.exists() else None
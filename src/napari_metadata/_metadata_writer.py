@@ -0,0 +1,301 @@
+"""Saves edited metadata in the attributes of the OME-Zarr it was read from.
+
+Only the attributes that differ from the original metadata of a layer are
+rewritten: the axes, the name, or the scale and translation of every
+level. No array is opened, so saving takes about as long as rewriting one
+small JSON file, whatever the size of the image.
+
+The attribute file is replaced atomically, so readers see either the old
+or the new attributes. Object stores replace whole objects, and local
+files are written next to the old ones and then renamed over them.
+"""
+import json
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from fsspec.implementations.local import LocalFileSystem
+from napari.layers import Image
+from ome_zarr.types import JSONDict
+from zarr.storage import FSStore
+from zarr.util import json_dumps
+
+from ._metadata_cache import (
+    CONSOLIDATED_METADATA_KEY,
+    METADATA_CACHE,
+    parse_cached_url,
+)
+from ._model import Axis, OriginalMetadata, extra_metadata, intern, source_path
+from ._writer import axis_to_ome
+from ._zip_store import is_zip_path
+
+if TYPE_CHECKING:
+    from napari.layers import Layer
+
+LOGGER = logging.getLogger("napari_metadata._metadata_writer")
+
+ATTRIBUTES_KEY = ".zattrs"
+
+ZARR_JSON_KEY = "zarr.json"
+
+# The versions of multiscales metadata that can be saved. Earlier versions
+# have no axes (0.1 and 0.2) or only the names of the axes (0.3), and later
+# ones are not stored in .zattrs.
+SAVABLE_VERSIONS = ("0.4",)
+
+
+@dataclass(frozen=True)
+class MetadataChanges:
+    """The metadata of a layer that differs from what was read.
+
+    Fields that did not change are None. The scale and translation are
+    those of the layer, which excludes any channel axis.
+    """
+
+    original: OriginalMetadata
+    axes: Optional[Tuple[Axis, ...]] = None
+    name: Optional[str] = None
+    scale: Optional[Tuple[float, ...]] = None
+    translate: Optional[Tuple[float, ...]] = None
+
+    def is_empty(self) -> bool:
+        return (
+            self.axes is None
+            and self.name is None
+            and self.scale is None
+            and self.translate is None
+        )
+
+
+def metadata_changes(layer: "Layer") -> Optional[MetadataChanges]:
+    """Returns how the metadata of a layer differs from its original
+    metadata, or None if it has no original metadata.
+    """
+    extras = extra_metadata(layer)
+    if extras is None or (original := extras.original) is None:
+        return None
+    axes = tuple(extras.axes)
+    scale = tuple(layer.scale)
+    translate = tuple(layer.translate)
+    return MetadataChanges(
+        original=original,
+        axes=None if axes == original.axes else axes,
+        name=None if layer.name == original.name else layer.name,
+        scale=None if scale == original.scale else scale,
+        translate=None if translate == original.translate else translate,
+    )
+
+
+def can_save_metadata(layer: Optional["Layer"]) -> bool:
+    """Returns True if the layer was read from an image whose metadata can
+    be saved in place. Its attributes are read through the metadata cache.
+    """
+    if not _was_read_from_image(layer):
+        return False
+    path = source_path(layer)
+    assert path is not None
+    location = parse_cached_url(path)
+    if location is None:
+        return False
+    try:
+        check_writable(location.store, location.zarr_format, path)
+        check_savable(location.root_attrs, path)
+    except ValueError:
+        return False
+    return True
+
+
+def check_writable(store: Any, zarr_format: Optional[int], path: str) -> None:
+    """Raises a ValueError if the attributes of the image at path, which is
+    in store, cannot be rewritten in place.
+
+    Only Zarr v2 datasets in local directories are rewritten. The
+    attributes of Zarr v3 datasets are in zarr.json, and remote stores are
+    often read-only (e.g. HTTP).
+    """
+    if zarr_format != 2:
+        raise ValueError(
+            f"cannot save the Zarr v{zarr_format} metadata of {path}, "
+            "only that of Zarr v2"
+        )
+    if not isinstance(getattr(store, "fs", None), LocalFileSystem):
+        raise ValueError(
+            f"cannot save the metadata of {path}, which is not local"
+        )
+
+
+def check_savable(attrs: JSONDict, path: str) -> None:
+    """Raises a ValueError if the multiscales metadata in the attributes of
+    the image at path cannot be saved.
+    """
+    if not attrs.get("multiscales"):
+        raise ValueError(f"{path} has no multiscales attributes to update")
+    version = attrs["multiscales"][0].get("version")
+    if version not in SAVABLE_VERSIONS:
+        raise ValueError(
+            f"cannot save the NGFF {version} metadata of {path}, only that "
+            f"of versions {', '.join(SAVABLE_VERSIONS)}"
+        )
+
+
+def save_metadata(layer: "Layer") -> bool:
+    """Saves the metadata of a layer that changed since it was read in the
+    attributes of the image that it was read from.
+
+    Returns True if any attributes were rewritten. Afterwards, the saved
+    metadata is the original metadata of the layer. Other layers that were
+    read from the same image (e.g. its other channels) keep theirs.
+    Raises a ValueError if the layer was not read from a local Zarr v2
+    image with multiscales attributes of a version in SAVABLE_VERSIONS.
+    """
+    if not _was_read_from_image(layer):
+        raise ValueError(f"cannot save the metadata of {layer.name} in place")
+    path = source_path(layer)
+    assert path is not None
+    changes = metadata_changes(layer)
+    assert changes is not None
+    if changes.is_empty():
+        return False
+    store = FSStore(path, mode="a")
+    attrs = read_json(store, ATTRIBUTES_KEY)
+    # Zarr v3 groups have no .zattrs, so zarr.json is only looked for then.
+    zarr_format = 3 if not attrs and ZARR_JSON_KEY in store else 2
+    check_writable(store, zarr_format, path)
+    check_savable(attrs, path)
+    attrs = apply_changes(attrs, changes)
+    replace_json(store, ATTRIBUTES_KEY, attrs)
+    update_consolidated(store, ATTRIBUTES_KEY, attrs)
+    # The cache is keyed by file versions, which may not change if the
+    # file is replaced within the resolution of its modification time.
+    METADATA_CACHE.clear()
+    extras = extra_metadata(layer)
+    assert extras is not None
+    extras.original = intern(
+        OriginalMetadata(
+            axes=tuple(extras.axes),
+            name=layer.name,
+            scale=tuple(layer.scale),
+            translate=tuple(layer.translate),
+        )
+    )
+    LOGGER.debug(f"saved metadata of {layer.name} to {path}")
+    return True
+
+
+def apply_changes(attrs: JSONDict, changes: MetadataChanges) -> JSONDict:
+    """Returns a copy of the attributes of an image with the changes.
+
+    The transforms of every level are changed like those of the layer, so
+    each level keeps its scale and translation relative to the others.
+    """
+    attrs = json.loads(json.dumps(attrs))
+    multiscale = attrs["multiscales"][0]
+    ome_axes: List[Dict[str, Any]] = multiscale["axes"]
+    channel_axis = next(
+        (i for i, a in enumerate(ome_axes) if a.get("type") == "channel"),
+        None,
+    )
+    if changes.axes is not None:
+        layer_axes = iter(changes.axes)
+        multiscale["axes"] = [
+            axis if i == channel_axis else axis_to_ome(next(layer_axes))
+            for i, axis in enumerate(ome_axes)
+        ]
+    if changes.name is not None and channel_axis is None:
+        multiscale["name"] = changes.name
+        # The reader names single channel images by their channel.
+        channels = attrs.get("omero", {}).get("channels", [])
+        if len(channels) == 1:
+            channels[0]["label"] = changes.name
+    if changes.scale is not None or changes.translate is not None:
+        ndim = len(ome_axes) - (channel_axis is not None)
+        ratios = [1.0] * ndim
+        if changes.scale is not None:
+            old = changes.original.scale or (1.0,) * ndim
+            ratios = [new / o for new, o in zip(changes.scale, old)]
+        shifts = [0.0] * ndim
+        if changes.translate is not None:
+            old = changes.original.translate or (0.0,) * ndim
+            shifts = [new - o for new, o in zip(changes.translate, old)]
+        if channel_axis is not None:
+            ratios.insert(channel_axis, 1.0)
+            shifts.insert(channel_axis, 0.0)
+        for dataset in multiscale["datasets"]:
+            dataset["coordinateTransformations"] = _moved_transforms(
+                dataset.get("coordinateTransformations", []), ratios, shifts
+            )
+    return attrs
+
+
+def _was_read_from_image(layer: Optional["Layer"]) -> bool:
+    if not isinstance(layer, Image):
+        return False
+    if (path := source_path(layer)) is None or is_zip_path(path):
+        return False
+    return metadata_changes(layer) is not None
+
+
+def _moved_transforms(
+    transforms: List[Dict[str, Any]],
+    ratios: List[float],
+    shifts: List[float],
+) -> List[Dict[str, Any]]:
+    scale = next((t for t in transforms if t["type"] == "scale"), None)
+    if scale is None:
+        scale = {"type": "scale", "scale": [1.0] * len(ratios)}
+        transforms = [scale, *transforms]
+    scale["scale"] = [s * r for s, r in zip(scale["scale"], ratios)]
+    if any(shifts):
+        translation = next(
+            (t for t in transforms if t["type"] == "translation"), None
+        )
+        if translation is None:
+            translation = {"type": "translation", "translation": shifts}
+            transforms.append(translation)
+        else:
+            translation["translation"] = [
+                t + s for t, s in zip(translation["translation"], shifts)
+            ]
+    return transforms
+
+
+def read_json(store: FSStore, key: str) -> JSONDict:
+    """Reads a JSON file of a store, or returns {} if it has none."""
+    try:
+        return json.loads(store[key])
+    except KeyError:
+        return {}
+
+
+def replace_json(store: FSStore, key: str, value: JSONDict) -> None:
+    """Atomically replaces a JSON file of a store."""
+    data = json_dumps(value)
+    if not isinstance(store.fs, LocalFileSystem):
+        store[key] = data
+        return
+    path = os.path.join(store.path, key)
+    descriptor, temp_path = tempfile.mkstemp(
+        prefix=f"{key}.", dir=os.path.dirname(path)
+    )
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def update_consolidated(store: FSStore, key: str, value: JSONDict) -> None:
+    """Updates a file in the consolidated metadata of the store, if it has
+    any, so that readers of that metadata see the change too.
+    """
+    consolidated = read_json(store, CONSOLIDATED_METADATA_KEY)
+    if key not in consolidated.get("metadata", {}):
+        return
+    consolidated["metadata"][key] = value
+    replace_json(store, CONSOLIDATED_METADATA_KEY, consolidated)
@@ -1,13 +1,14 @@
-from copy import deepcopy
-from dataclasses import dataclass
+from dataclasses import dataclass, fields, replace
 from typing import (
     TYPE_CHECKING,
     List,
     Optional,
     Protocol,
     Tuple,
+    TypeVar,
     runtime_checkable,
 )
+from weakref import WeakValueDictionary
 
 from ._axis_type import AxisType
 from ._space_units import SpaceUnits
@@ -18,6 +19,9 @@ if TYPE_CHECKING:
     from napari.layers import Layer
 
 
+T = TypeVar("T")
+
+
 @runtime_checkable
 class Axis(Protocol):
     name: str
@@ -29,7 +33,7 @@ class Axis(Protocol):
         ...
 
 
-@dataclass
+@dataclass(frozen=True)
 class SpaceAxis:
     name: str
     unit: SpaceUnits = SpaceUnits.NONE
@@ -41,7 +45,7 @@ class SpaceAxis:
         return str(self.unit)
 
 
-@dataclass
+@dataclass(frozen=True)
 class TimeAxis:
     name: str
     unit: TimeUnits = TimeUnits.NONE
@@ -53,7 +57,7 @@ class TimeAxis:
         return str(self.unit)
 
 
-@dataclass
+@dataclass(frozen=True)
 class ChannelAxis:
     name: str
 
@@ -66,6 +70,24 @@ class ChannelAxis:
 
 EXTRA_METADATA_KEY = "napari-metadata-plugin"
 
+# The key of the layer metadata that holds the path that a layer was read
+# from, when the layer was added by this plugin rather than by napari.
+SOURCE_PATH_KEY = "napari-metadata-source-path"
+
+# Maps the field values of an immutable dataclass to a shared instance.
+# Values are weakly referenced, so unused instances are not kept alive.
+_INTERNED: WeakValueDictionary = WeakValueDictionary()
+
+
+def intern(value: T) -> T:
+    """Returns a shared instance that is equal to the given frozen dataclass.
+
+    This is used to share the many identical axes and original metadata
+    that are made when reading images with many channels or nodes.
+    """
+    key = (type(value),) + tuple(getattr(value, f.name) for f in fields(value))
+    return _INTERNED.setdefault(key, value)
+
 
 @dataclass(frozen=True)
 class OriginalMetadata:
@@ -77,6 +99,12 @@ class OriginalMetadata:
 
 @dataclass
 class ExtraMetadata:
+    """The extra metadata of one layer.
+
+    The axes are immutable and may be shared with other layers, so they
+    are replaced rather than modified when they are set.
+    """
+
     axes: List[Axis]
     original: Optional[OriginalMetadata] = None
 
@@ -85,8 +113,9 @@ class ExtraMetadata:
 
     def set_axis_names(self, names: Tuple[str, ...]) -> None:
         assert len(self.axes) == len(names)
-        for axis, name in zip(self.axes, names):
-            axis.name = name
+        for i, (axis, name) in enumerate(zip(self.axes, names)):
+            if axis.name != name:
+                self.axes[i] = replace(axis, name=name)
 
     def get_space_unit(self) -> SpaceUnits:
         units = tuple(
@@ -95,9 +124,9 @@ class ExtraMetadata:
         return units[0] if len(set(units)) == 1 else SpaceUnits.NONE
 
     def set_space_unit(self, unit: SpaceUnits) -> None:
-        for axis in self.axes:
-            if isinstance(axis, SpaceAxis):
-                axis.unit = unit
+        for i, axis in enumerate(self.axes):
+            if isinstance(axis, SpaceAxis) and axis.unit != unit:
+                self.axes[i] = replace(axis, unit=unit)
 
     def get_time_unit(self) -> TimeUnits:
         units = tuple(
@@ -106,15 +135,22 @@ class ExtraMetadata:
         return units[0] if len(set(units)) == 1 else TimeUnits.NONE
 
     def set_time_unit(self, unit: TimeUnits) -> None:
-        for axis in self.axes:
-            if isinstance(axis, TimeAxis):
-                axis.unit = unit
+        for i, axis in enumerate(self.axes):
+            if isinstance(axis, TimeAxis) and axis.unit != unit:
+                self.axes[i] = replace(axis, unit=unit)
 
 
 def extra_metadata(layer: "Layer") -> Optional[ExtraMetadata]:
     return layer.metadata.get(EXTRA_METADATA_KEY)
 
 
+def source_path(layer: "Layer") -> Optional[str]:
+    """Returns the path that a layer was read from, or None."""
+    if (path := layer.source.path) is not None:
+        return str(path)
+    return layer.metadata.get(SOURCE_PATH_KEY)
+
+
 def coerce_extra_metadata(
     viewer: "ViewerModel", layer: "Layer"
 ) -> ExtraMetadata:
@@ -124,7 +160,7 @@ def coerce_extra_metadata(
             for name in viewer.dims.axis_labels[-layer.ndim :]  # noqa
         ]
         original = OriginalMetadata(
-            axes=tuple(deepcopy(axes)),
+            axes=tuple(axes),
             name=layer.name,
             scale=tuple(layer.scale),
             translate=tuple(layer.translate),
@@ -0,0 +1,274 @@
+"""A labels array that napari can paint without loading all of it.
+
+napari paints labels by assigning to their data with numpy indexing, which
+lazy arrays (e.g. dask) do not support. PaintedArray keeps the chunks that
+are painted in memory on top of the array that the labels were read from,
+and reads every other chunk from that array. It records which chunks were
+changed by painting, filling, undoing or redoing, so that saving the
+labels only writes those.
+"""
+import threading
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from ._lazy_array import expand_key
+
+ChunkIndex = Tuple[int, ...]
+
+
+class PaintedChunks:
+    """The chunks of an array that were painted, and the painted values."""
+
+    def __init__(self, chunks: Sequence[int]) -> None:
+        self.chunks = tuple(chunks)
+        self._indices: Set[ChunkIndex] = set()
+        self._values: Set[int] = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._indices)
+
+    @property
+    def values(self) -> FrozenSet[int]:
+        """The label values that were painted."""
+        with self._lock:
+            return frozenset(self._values)
+
+    def add(self, indices: Tuple[np.ndarray, ...], value: Any) -> None:
+        """Marks the chunks of the pixels at indices as painted with
+        value, which may be one value or one for each pixel.
+        """
+        grid = np.stack(
+            [np.asarray(i).ravel() // c for i, c in zip(indices, self.chunks)],
+            axis=-1,
+        )
+        chunks = {tuple(map(int, c)) for c in np.unique(grid, axis=0)}
+        values = set(np.unique(np.asarray(value)).tolist())
+        with self._lock:
+            self._indices.update(chunks)
+            self._values.update(values)
+
+    def regions(self, shape: Sequence[int]) -> List[Tuple[slice, ...]]:
+        """Returns the regions of the painted chunks, in C order."""
+        with self._lock:
+            indices = sorted(self._indices)
+        return [chunk_region(i, self.chunks, shape) for i in indices]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indices.clear()
+            self._values.clear()
+
+
+class PaintedArray:
+    """An array that can be painted, on top of one that cannot.
+
+    Reads return the painted chunks where there are any and the data of
+    the wrapped array elsewhere. Writes copy the chunks that they change
+    into memory the first time. Only basic indices (integers and slices)
+    and tuples of index arrays, which is how napari paints, are supported.
+
+    If the array was read from a labels image that can be updated, url
+    is its location and dataset is the key of its chunks in the cache.
+    """
+
+    def __init__(
+        self,
+        array: Any,
+        chunks: Optional[Sequence[int]] = None,
+        *,
+        url: Optional[str] = None,
+        dataset: Optional[str] = None,
+    ) -> None:
+        self._array = array
+        if chunks is None:
+            chunks = chunk_shape(array)
+        self._painted = PaintedChunks(chunks)
+        self._chunks: Dict[ChunkIndex, np.ndarray] = {}
+        self._url = url
+        self._dataset = dataset
+        self._lock = threading.RLock()
+
+    @property
+    def array(self) -> Any:
+        return self._array
+
+    @property
+    def painted(self) -> PaintedChunks:
+        return self._painted
+
+    @property
+    def url(self) -> Optional[str]:
+        return self._url
+
+    @property
+    def dataset(self) -> Optional[str]:
+        return self._dataset
+
+    @property
+    def chunks(self) -> Tuple[int, ...]:
+        return self._painted.chunks
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return tuple(self._array.shape)
+
+    @property
+    def dtype(self) -> np.dtype:
+        return np.dtype(self._array.dtype)
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape))
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        key = expand_key(key, self.ndim)
+        if all(_is_index_array(k) for k in key):
+            return self._read_points(key)
+        if any(_is_index_array(k) for k in key):
+            raise IndexError("index arrays must be given for every axis")
+        return self._read_box(key)
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        key = expand_key(key, self.ndim)
+        if all(_is_index_array(k) for k in key):
+            indices = np.broadcast_arrays(*map(np.asarray, key))
+        elif any(_is_index_array(k) for k in key):
+            raise IndexError("index arrays must be given for every axis")
+        else:
+            positions = _box_positions(key, self.shape)
+            indices = np.meshgrid(*positions, indexing="ij")
+            # Integer indices drop their axis from the shape of the value.
+            value_shape = tuple(
+                len(p) for p, k in zip(positions, key) if isinstance(k, slice)
+            )
+            value = np.broadcast_to(value, value_shape).ravel()
+        indices = [np.ravel(i) % s for i, s in zip(indices, self.shape)]
+        values = np.broadcast_to(
+            np.ravel(np.asarray(value, dtype=self.dtype)), indices[0].shape
+        )
+        if indices[0].size == 0:
+            return
+        grid = np.stack(
+            [i // c for i, c in zip(indices, self.chunks)], axis=-1
+        )
+        unique, inverse = np.unique(grid, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        with self._lock:
+            for n, index in enumerate(map(tuple, unique.tolist())):
+                chunk = self._chunk(index)
+                selected = inverse == n
+                local = tuple(
+                    i[selected] - j * c
+                    for i, j, c in zip(indices, index, self.chunks)
+                )
+                chunk[local] = values[selected]
+            self._painted.add(tuple(indices), values)
+
+    def __array__(self, dtype=None) -> np.ndarray:
+        return np.asarray(self[...], dtype=dtype)
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(shape={self.shape}, dtype={self.dtype}, "
+            f"painted={len(self._painted)}, url={self._url})"
+        )
+
+    def clear(self) -> None:
+        """Forgets what was painted, which must have been written to the
+        wrapped array, so that it is read from there again.
+        """
+        with self._lock:
+            self._chunks.clear()
+            self._painted.clear()
+
+    def _chunk(self, index: ChunkIndex) -> np.ndarray:
+        """Returns a painted chunk, which is copied when first painted."""
+        if (chunk := self._chunks.get(index)) is None:
+            region = chunk_region(index, self.chunks, self.shape)
+            chunk = np.array(self._array[region], dtype=self.dtype)
+            self._chunks[index] = chunk
+        return chunk
+
+    def _read_box(self, key: Tuple) -> np.ndarray:
+        data = np.asarray(self._array[key])
+        with self._lock:
+            chunks = list(self._chunks.items())
+        if not chunks:
+            return data
+        positions = _box_positions(key, self.shape)
+        data = np.array(data, dtype=self.dtype)
+        # Integer indices drop their axis, which is kept here.
+        box = data.reshape(tuple(len(p) for p in positions))
+        for index, chunk in chunks:
+            starts = [i * c for i, c in zip(index, self.chunks)]
+            inside = [
+                (p >= s) & (p < s + n)
+                for p, s, n in zip(positions, starts, chunk.shape)
+            ]
+            if not all(np.any(i) for i in inside):
+                continue
+            box[np.ix_(*(np.nonzero(i)[0] for i in inside))] = chunk[
+                np.ix_(
+                    *(p[i] - s for p, i, s in zip(positions, inside, starts))
+                )
+            ]
+        return data
+
+    def _read_points(self, key: Tuple) -> np.ndarray:
+        indices = [
+            i % s
+            for i, s in zip(
+                np.broadcast_arrays(*map(np.asarray, key)), self.shape
+            )
+        ]
+        if indices[0].size == 0:
+            return np.empty(indices[0].shape, dtype=self.dtype)
+        box = tuple(slice(int(i.min()), int(i.max()) + 1) for i in indices)
+        data = self._read_box(box)
+        return data[tuple(i - b.start for i, b in zip(indices, box))]
+
+
+def chunk_shape(array: Any) -> Tuple[int, ...]:
+    """Returns the shape of the chunks of an array (e.g. a dask or zarr
+    array), or that of its planes if it has no chunks.
+    """
+    chunks = getattr(array, "chunks", None)
+    if chunks is None:
+        shape = tuple(array.shape)
+        return (1,) * (len(shape) - 2) + shape[-2:]
+    # Dask arrays have the sizes of all chunks along each dimension.
+    return tuple(max(c) if isinstance(c, tuple) and c else c for c in chunks)
+
+
+def chunk_region(
+    index: ChunkIndex, chunks: Sequence[int], shape: Sequence[int]
+) -> Tuple[slice, ...]:
+    return tuple(
+        slice(i * c, min((i + 1) * c, s))
+        for i, c, s in zip(index, chunks, shape)
+    )
+
+
+def _is_index_array(key: Any) -> bool:
+    return isinstance(key, (np.ndarray, list))
+
+
+def _box_positions(key: Tuple, shape: Sequence[int]) -> List[np.ndarray]:
+    """Returns the positions that a basic index selects along each axis."""
+    positions = []
+    for k, size in zip(key, shape):
+        if isinstance(k, slice):
+            positions.append(np.arange(*k.indices(size)))
+        else:
+            positions.append(np.array([int(k) % size]))
+    return positions
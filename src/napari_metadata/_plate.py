@@ -0,0 +1,288 @@
+"""Reads high-content screening plates as a single lazy mosaic.
+
+The wells of a plate are discovered concurrently, then every field of
+every well becomes one tile of a mosaic at each pyramid level. The tiles
+are only opened and read when the mosaic is sliced, so opening a plate
+only reads metadata.
+"""
+import logging
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import zarr
+from ome_zarr.reader import Node
+
+from ._lazy_array import expand_key
+from ._metadata_cache import CachedZarrLocation
+
+LOGGER = logging.getLogger("napari_metadata._plate")
+
+# The maximum number of wells or tiles that are read at the same time.
+MAX_PLATE_WORKERS = 16
+
+
+@dataclass(frozen=True)
+class PlateLayout:
+    """Where each field of a plate is placed in its mosaic.
+
+    Wells are placed in the grid of plate rows and columns. The fields of
+    each well are placed in a nearly square grid within its well.
+    """
+
+    row_names: Tuple[str, ...]
+    column_names: Tuple[str, ...]
+    well_fields: Dict[Tuple[int, int], Tuple[str, ...]]
+    field_rows: int
+    field_columns: int
+
+    @property
+    def tile_rows(self) -> int:
+        return len(self.row_names) * self.field_rows
+
+    @property
+    def tile_columns(self) -> int:
+        return len(self.column_names) * self.field_columns
+
+    def field_path(self, tile_row: int, tile_column: int) -> Optional[str]:
+        """Returns the path to the field shown in a tile, if any."""
+        row, field_row = divmod(tile_row, self.field_rows)
+        column, field_column = divmod(tile_column, self.field_columns)
+        fields = self.well_fields.get((row, column), ())
+        index = field_row * self.field_columns + field_column
+        return fields[index] if index < len(fields) else None
+
+
+def discover_plate(
+    location: CachedZarrLocation, *, max_workers: Optional[int] = None
+) -> PlateLayout:
+    """Reads the metadata of every well in a plate concurrently."""
+    plate = location.root_attrs["plate"]
+    row_names = tuple(row["name"] for row in plate["rows"])
+    column_names = tuple(column["name"] for column in plate["columns"])
+    wells = plate["wells"]
+
+    def read_fields(well: Dict) -> Tuple[str, ...]:
+        well_attrs = location.get_json(f"{well['path']}/.zattrs")
+        images = well_attrs.get("well", {}).get("images", [])
+        return tuple(f"{well['path']}/{image['path']}" for image in images)
+
+    if max_workers is None:
+        max_workers = MAX_PLATE_WORKERS
+    max_workers = max(1, min(max_workers, len(wells)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        fields = list(executor.map(read_fields, wells))
+
+    well_fields: Dict[Tuple[int, int], Tuple[str, ...]] = {}
+    for well, well_field_paths in zip(wells, fields):
+        if "rowIndex" in well and "columnIndex" in well:
+            index = (well["rowIndex"], well["columnIndex"])
+        else:
+            row_name, column_name = well["path"].split("/")[:2]
+            index = (
+                row_names.index(row_name),
+                column_names.index(column_name),
+            )
+        well_fields[index] = well_field_paths
+
+    field_count = max((len(f) for f in well_fields.values()), default=1)
+    field_columns = math.ceil(math.sqrt(max(field_count, 1)))
+    field_rows = math.ceil(max(field_count, 1) / field_columns)
+    return PlateLayout(
+        row_names=row_names,
+        column_names=column_names,
+        well_fields=well_fields,
+        field_rows=field_rows,
+        field_columns=field_columns,
+    )
+
+
+class PlateMosaic:
+    """A lazy array of one pyramid level of a plate.
+
+    Each field of the plate is a tile in the last two dimensions. Tiles
+    without a field are filled with zeros. Indexing only opens and reads
+    the fields whose tiles overlap with the requested region.
+    """
+
+    def __init__(
+        self,
+        *,
+        location: CachedZarrLocation,
+        layout: PlateLayout,
+        level_path: str,
+        tile_shape: Sequence[int],
+        dtype: np.dtype,
+    ) -> None:
+        self._location = location
+        self._layout = layout
+        self._level_path = level_path
+        self._tile_shape = tuple(tile_shape)
+        self._dtype = np.dtype(dtype)
+        self._arrays: Dict[str, Optional[zarr.Array]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        *leading, height, width = self._tile_shape
+        return tuple(leading) + (
+            self._layout.tile_rows * height,
+            self._layout.tile_columns * width,
+        )
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._dtype
+
+    @property
+    def ndim(self) -> int:
+        return len(self._tile_shape)
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape))
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __array__(self, dtype=None) -> np.ndarray:
+        return np.asarray(self[...], dtype=dtype)
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        key = expand_key(key, self.ndim)
+        leading_key = key[:-2]
+        ys, squeeze_y = _indices(key[-2], self.shape[-2])
+        xs, squeeze_x = _indices(key[-1], self.shape[-1])
+        leading_shape = np.empty(self._tile_shape[:-2], dtype=bool)[
+            leading_key
+        ].shape
+        out = np.zeros(leading_shape + (len(ys), len(xs)), dtype=self.dtype)
+
+        height, width = self._tile_shape[-2:]
+        tasks = []
+        for tile_row, out_ys, tile_ys in _tile_spans(ys, height):
+            for tile_column, out_xs, tile_xs in _tile_spans(xs, width):
+                path = self._layout.field_path(tile_row, tile_column)
+                if path is not None:
+                    tasks.append((path, out_ys, out_xs, tile_ys, tile_xs))
+
+        def read_tile(task: Tuple) -> None:
+            path, out_ys, out_xs, tile_ys, tile_xs = task
+            if (array := self._open(path)) is None:
+                return
+            tile = array[leading_key + (tile_ys, tile_xs)]
+            out[..., out_ys, out_xs][
+                ..., : tile.shape[-2], : tile.shape[-1]  # noqa
+            ] = tile
+
+        if len(tasks) > 1:
+            max_workers = min(MAX_PLATE_WORKERS, len(tasks))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                list(executor.map(read_tile, tasks))
+        else:
+            for task in tasks:
+                read_tile(task)
+
+        if squeeze_x:
+            out = out[..., 0]
+        if squeeze_y:
+            out = out[..., 0, :] if not squeeze_x else out[..., 0]
+        return out
+
+    def _open(self, field_path: str) -> Optional[zarr.Array]:
+        with self._lock:
+            if field_path in self._arrays:
+                return self._arrays[field_path]
+        path = f"{field_path}/{self._level_path}"
+        try:
+            array = self._location.open_array(path)
+        except Exception:
+            LOGGER.warning(f"Failed to open plate field {path}")
+            array = None
+        with self._lock:
+            self._arrays[field_path] = array
+        return array
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(shape={self.shape}, dtype={self.dtype}, "
+            f"level_path={self._level_path!r})"
+        )
+
+
+def make_plate_node(
+    location: CachedZarrLocation, *, max_workers: Optional[int] = None
+) -> Optional[Node]:
+    """Makes a node whose data is a multiscale mosaic of a plate.
+
+    The metadata (e.g. axes and transforms) of the node is taken from the
+    first field of the plate, which is assumed to be the same as all other
+    fields.
+    """
+    layout = discover_plate(location, max_workers=max_workers)
+    first_field = next(
+        (f[0] for _, f in sorted(layout.well_fields.items()) if f), None
+    )
+    if first_field is None:
+        LOGGER.warning(f"No fields found in plate {location}")
+        return None
+    field_location = location.create(first_field)
+    node = Node(field_location, [field_location])
+    multiscales = field_location.root_attrs["multiscales"][0]
+    level_paths = [d["path"] for d in multiscales["datasets"]]
+    node.data = [
+        PlateMosaic(
+            location=location,
+            layout=layout,
+            level_path=level_path,
+            tile_shape=level.shape,
+            dtype=level.dtype,
+        )
+        for level_path, level in zip(level_paths, node.data)
+    ]
+    plate = location.root_attrs["plate"]
+    if name := plate.get("name"):
+        if not isinstance(node.metadata.get("name"), list):
+            node.metadata["name"] = name
+    node.metadata["metadata"] = {"plate": plate}
+    return node
+
+
+def _indices(key: Any, size: int) -> Tuple[np.ndarray, bool]:
+    if isinstance(key, slice):
+        return np.arange(*key.indices(size)), False
+    if isinstance(key, (int, np.integer)):
+        index = int(key) + size if key < 0 else int(key)
+        if not 0 <= index < size:
+            raise IndexError(f"index {key} is out of bounds for size {size}")
+        return np.array([index]), True
+    raise IndexError(f"Unsupported index for plate mosaic: {key}")
+
+
+def _tile_spans(
+    indices: np.ndarray, tile_size: int
+) -> List[Tuple[int, slice, slice]]:
+    """Splits sorted indices into tile index, output slice and tile slice.
+
+    Returns an empty list if there are no indices.
+    """
+    spans = []
+    if len(indices) == 0:
+        return spans
+    step = int(indices[1] - indices[0]) if len(indices) > 1 else 1
+    tiles = indices // tile_size
+    starts = np.flatnonzero(np.diff(tiles, prepend=tiles[0] - 1))
+    stops = np.append(starts[1:], len(indices))
+    for start, stop in zip(starts, stops):
+        local = indices[start:stop] % tile_size
+        spans.append(
+            (
+                int(tiles[start]),
+                slice(int(start), int(stop)),
+                slice(int(local[0]), int(local[-1]) + 1, step),
+            )
+        )
+    return spans
@@ -0,0 +1,305 @@
+"""Prefetches the timepoints of layer data that are near the one viewed.
+
+napari reads one timepoint at a time as the time slider moves, so each
+move waits for a whole timepoint to be read. Arrays here instead read the
+next and previous timepoints in the background after each read, using the
+same indices for the other dimensions (i.e. the same region), and drop any
+timepoints that are too far from the one that was last read.
+
+Timepoints are read by threads that are shared by all arrays, and are kept
+in the chunk cache, so that they count towards its byte budget.
+"""
+import itertools
+import logging
+import operator
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+from ._chunk_cache import CHUNK_CACHE, ChunkCache
+from ._lazy_array import IndexedArray, expand_key, single_index_axis
+
+LOGGER = logging.getLogger("napari_metadata._prefetch")
+
+# The number of threads that prefetch the timepoints of all arrays.
+MAX_PREFETCH_WORKERS = 2
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+
+# Identifies each array, so that arrays of one dataset (e.g. its levels)
+# do not share the cached timepoints.
+_ARRAY_IDS = itertools.count()
+
+
+@dataclass(frozen=True)
+class TimePrefetch:
+    """Options for prefetching the timepoints of an array.
+
+    The radius timepoints before and after each one that is read are
+    prefetched, and any timepoints that are more than window away from it
+    are evicted. Timepoints are kept for the max_regions regions that were
+    most recently read (e.g. one for each channel of an image).
+    """
+
+    radius: int = 2
+    window: int = 8
+    max_regions: int = 8
+
+    def __post_init__(self) -> None:
+        if self.radius < 0:
+            raise ValueError(f"radius must be non-negative: {self.radius}")
+        if self.window < self.radius:
+            raise ValueError(
+                f"window ({self.window}) must be at least the "
+                f"radius ({self.radius})"
+            )
+        if self.max_regions < 1:
+            raise ValueError(
+                f"max_regions must be positive: {self.max_regions}"
+            )
+
+
+@dataclass(frozen=True)
+class PrefetchStats:
+    hits: int
+    misses: int
+    prefetched: int
+    evicted: int
+    # The total time spent reading timepoints that were hits or misses.
+    hit_seconds: float
+    miss_seconds: float
+
+    @property
+    def hit_rate(self) -> float:
+        reads = self.hits + self.misses
+        return self.hits / reads if reads > 0 else 0.0
+
+    @property
+    def mean_hit_seconds(self) -> float:
+        return self.hit_seconds / self.hits if self.hits > 0 else 0.0
+
+    @property
+    def mean_miss_seconds(self) -> float:
+        return self.miss_seconds / self.misses if self.misses > 0 else 0.0
+
+
+class TimeSeriesArray:
+    """A lazy view of an array that prefetches the timepoints near the
+    last one that was read.
+
+    Reading a single timepoint is a hit if that timepoint was prefetched
+    (even if it is still being read) and is still in the cache, and a
+    miss otherwise. Reads of many timepoints are passed on to the wrapped
+    array.
+
+    Timepoints are kept in cache as entries of dataset, which should be
+    the dataset_key of the array, so that they are evicted with the other
+    entries of the dataset. Each array has its own dataset if it is None.
+    """
+
+    def __init__(
+        self,
+        array: Any,
+        time_axis: int,
+        prefetch: Optional[TimePrefetch] = None,
+        *,
+        dataset: Optional[str] = None,
+        cache: ChunkCache = CHUNK_CACHE,
+    ) -> None:
+        ndim = len(array.shape)
+        if not -ndim <= time_axis < ndim:
+            raise ValueError(
+                f"time_axis {time_axis} is out of bounds for {ndim} dims"
+            )
+        self._array = array
+        self._time_axis = time_axis % ndim
+        self._prefetch = TimePrefetch() if prefetch is None else prefetch
+        self._id = next(_ARRAY_IDS)
+        self._dataset = (
+            f"napari-metadata-prefetch-{self._id}"
+            if dataset is None
+            else dataset
+        )
+        self._cache = cache
+        self._lock = threading.Lock()
+        # The futures of the timepoints that were read or prefetched in each
+        # region, from the least to the most recently read region. Their
+        # data is in the cache.
+        self._regions: OrderedDict = OrderedDict()
+        self._counts = dict(hits=0, misses=0, prefetched=0, evicted=0)
+        self._seconds = dict(hits=0.0, misses=0.0)
+
+    @property
+    def array(self) -> Any:
+        return self._array
+
+    @property
+    def time_axis(self) -> int:
+        return self._time_axis
+
+    @property
+    def prefetch(self) -> TimePrefetch:
+        return self._prefetch
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return tuple(self._array.shape)
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._array.dtype
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape))
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getitem__(self, key: Any) -> Any:
+        key = expand_key(key, self.ndim)
+        if (axis := single_index_axis(key)) is not None:
+            return IndexedArray(self, axis, key[axis])
+        return self.read(key)
+
+    def read(self, key: Any) -> np.ndarray:
+        """Reads the data at key, which is never a lazy view."""
+        key = expand_key(key, self.ndim)
+        t = key[self._time_axis]
+        if not isinstance(t, (int, np.integer)) or any(
+            isinstance(k, (np.ndarray, list)) for k in key
+        ):
+            return np.asarray(self._array[key])
+        t = operator.index(t) % self.shape[self._time_axis]
+        other_key = key[: self._time_axis] + key[self._time_axis + 1 :]  # noqa
+        region = _hashable(other_key)
+        start = time.perf_counter()
+        with self._lock:
+            timepoints = self._region_timepoints(region)
+            self._evict(lambda s: abs(s - t) > self._prefetch.window)
+            future = timepoints.get(t)
+        data = None
+        if future is not None and not future.cancelled():
+            try:
+                future.result()
+                data = self._cache.get(self._dataset, self._key(region, t))
+            except Exception:
+                LOGGER.debug(f"failed to prefetch {t}", exc_info=True)
+        outcome = "hits" if data is not None else "misses"
+        if data is None:
+            data = self._read(t, other_key)
+            self._cache.put(self._dataset, self._key(region, t), data)
+            future = Future()
+            future.set_result(None)
+        with self._lock:
+            timepoints = self._region_timepoints(region)
+            timepoints[t] = future
+            self._counts[outcome] += 1
+            self._seconds[outcome] += time.perf_counter() - start
+            self._schedule(timepoints, t, other_key)
+        return data
+
+    def stats(self) -> PrefetchStats:
+        with self._lock:
+            return PrefetchStats(
+                hits=self._counts["hits"],
+                misses=self._counts["misses"],
+                prefetched=self._counts["prefetched"],
+                evicted=self._counts["evicted"],
+                hit_seconds=self._seconds["hits"],
+                miss_seconds=self._seconds["misses"],
+            )
+
+    def clear(self) -> None:
+        """Evicts all timepoints."""
+        with self._lock:
+            self._evict(lambda _: True)
+            self._regions.clear()
+
+    def __array__(self, dtype=None) -> np.ndarray:
+        return np.asarray(self.read(...), dtype=dtype)
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(shape={self.shape}, dtype={self.dtype}, "
+            f"time_axis={self._time_axis}, prefetch={self._prefetch})"
+        )
+
+    def _read(self, t: int, other_key: Tuple) -> np.ndarray:
+        axis = self._time_axis
+        key = other_key[:axis] + (t,) + other_key[axis:]
+        return np.asarray(self._array[key])
+
+    def _read_into_cache(self, t: int, other_key: Tuple) -> None:
+        data = self._read(t, other_key)
+        region = _hashable(other_key)
+        self._cache.put(self._dataset, self._key(region, t), data)
+        # The timepoint may have been evicted while it was read.
+        with self._lock:
+            evicted = t not in self._regions.get(region, {})
+        if evicted:
+            self._cache.discard(self._dataset, self._key(region, t))
+
+    def _key(self, region: Tuple, t: int) -> Hashable:
+        return (self._id, region, t)
+
+    def _region_timepoints(self, region: Tuple) -> Dict[int, Future]:
+        """Returns the timepoints of a region, which becomes the most
+        recently read one, evicting the least recently read regions.
+        """
+        if region not in self._regions:
+            self._regions[region] = {}
+        self._regions.move_to_end(region)
+        while len(self._regions) > self._prefetch.max_regions:
+            evicted, timepoints = self._regions.popitem(last=False)
+            for s, future in timepoints.items():
+                future.cancel()
+                self._cache.discard(self._dataset, self._key(evicted, s))
+            self._counts["evicted"] += len(timepoints)
+        return self._regions[region]
+
+    def _schedule(
+        self, timepoints: Dict[int, Future], t: int, other_key: Tuple
+    ) -> None:
+        n_timepoints = self.shape[self._time_axis]
+        for offset in range(1, self._prefetch.radius + 1):
+            for s in (t + offset, t - offset):
+                if 0 <= s < n_timepoints and s not in timepoints:
+                    timepoints[s] = _executor().submit(
+                        self._read_into_cache, s, other_key
+                    )
+                    self._counts["prefetched"] += 1
+
+    def _evict(self, should_evict: Callable[[int], bool]) -> None:
+        for region, timepoints in self._regions.items():
+            for s in [s for s in timepoints if should_evict(s)]:
+                timepoints.pop(s).cancel()
+                self._cache.discard(self._dataset, self._key(region, s))
+                self._counts["evicted"] += 1
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(
+                max_workers=MAX_PREFETCH_WORKERS,
+                thread_name_prefix="napari-metadata-prefetch",
+            )
+        return _EXECUTOR
+
+
+def _hashable(key: Tuple) -> Tuple:
+    return tuple(
+        (k.start, k.stop, k.step) if isinstance(k, slice) else k for k in key
+    )
@@ -0,0 +1,156 @@
+"""Builds the coarser levels of a multiscale image when it is written.
+
+Each level is the mean of 2x2 blocks of pixels of the previous level in
+the two downsampled dimensions (usually Y and X), or the first pixel of
+each block for labels, whose values cannot be averaged. Levels are lazy
+views of the previous level that are written chunk by chunk, so each
+chunk of a level only reads the region of the previous level that it
+covers.
+"""
+import math
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import zarr
+
+from ._chunk_writer import WriteOptions, write_array
+
+# The factor by which each level is smaller than the previous one.
+DOWNSAMPLE_FACTOR = 2
+
+# How the blocks of pixels of a level are reduced to one pixel of the next.
+DOWNSAMPLE_METHODS = ("mean", "nearest")
+
+
+@dataclass(frozen=True)
+class PyramidOptions:
+    """Options for building the coarser levels of an image.
+
+    Levels are added until the downsampled dimensions of the coarsest
+    level fit in a tile of tile_size pixels. Each pixel of a level is made
+    from a block of pixels of the previous one by method.
+    """
+
+    tile_size: int = 256
+    method: str = "mean"
+
+    def __post_init__(self) -> None:
+        if self.tile_size < 1:
+            raise ValueError(f"tile_size must be positive: {self.tile_size}")
+        if self.method not in DOWNSAMPLE_METHODS:
+            raise ValueError(
+                f"method must be one of {DOWNSAMPLE_METHODS}: {self.method}"
+            )
+
+    def level_shapes(
+        self, shape: Sequence[int], dims: Sequence[int]
+    ) -> List[Tuple[int, ...]]:
+        """Returns the shapes of the levels that are coarser than one of
+        shape, from finest to coarsest.
+        """
+        shapes: List[Tuple[int, ...]] = []
+        shape = tuple(shape)
+        while any(shape[d] > self.tile_size for d in dims):
+            shape = downsampled_shape(shape, dims)
+            shapes.append(shape)
+        return shapes
+
+
+def downsampled_shape(
+    shape: Sequence[int], dims: Sequence[int]
+) -> Tuple[int, ...]:
+    return tuple(
+        math.ceil(size / DOWNSAMPLE_FACTOR) if d in dims else size
+        for d, size in enumerate(shape)
+    )
+
+
+def downsample(
+    block: np.ndarray, dims: Sequence[int], method: str = "mean"
+) -> np.ndarray:
+    """Returns the means of the 2x2 blocks of pixels of block in dims, or
+    their first pixels if method is "nearest".
+
+    Blocks at the end of odd-sized dimensions are the means of the pixels
+    that they have. Integers are rounded to the nearest value.
+    """
+    if method == "nearest":
+        return block[
+            tuple(
+                slice(None, None, DOWNSAMPLE_FACTOR)
+                if d in dims
+                else slice(None)
+                for d in range(block.ndim)
+            )
+        ]
+    pad = [
+        (0, -size % DOWNSAMPLE_FACTOR if d in dims else 0)
+        for d, size in enumerate(block.shape)
+    ]
+    if any(after for _, after in pad):
+        # Repeating the last pixels does not change the means of blocks.
+        block = np.pad(block, pad, mode="edge")
+    split_shape: List[int] = []
+    mean_axes: List[int] = []
+    for d, size in enumerate(block.shape):
+        if d in dims:
+            split_shape.extend((size // DOWNSAMPLE_FACTOR, DOWNSAMPLE_FACTOR))
+            mean_axes.append(len(split_shape) - 1)
+        else:
+            split_shape.append(size)
+    means = block.reshape(split_shape).mean(
+        axis=tuple(mean_axes), dtype=np.float64
+    )
+    if np.issubdtype(block.dtype, np.integer) or block.dtype == bool:
+        means = np.rint(means)
+    return means.astype(block.dtype)
+
+
+class DownsampledArray:
+    """A lazy view of an array that is downsampled in some dimensions.
+
+    Only regions of slices with a step of one can be read, which are all
+    that are needed to write the chunks of a level.
+    """
+
+    def __init__(
+        self, source: zarr.Array, dims: Sequence[int], method: str = "mean"
+    ) -> None:
+        self._source = source
+        self._dims = tuple(dims)
+        self._method = method
+        self.shape = downsampled_shape(source.shape, dims)
+        self.dtype = source.dtype
+
+    def __getitem__(self, region: Tuple[slice, ...]) -> np.ndarray:
+        source_region = tuple(
+            slice(
+                s.start * DOWNSAMPLE_FACTOR,
+                min(s.stop * DOWNSAMPLE_FACTOR, self._source.shape[d]),
+            )
+            if d in self._dims
+            else s
+            for d, s in enumerate(region)
+        )
+        return downsample(
+            self._source[source_region], self._dims, self._method
+        )
+
+
+def write_downsampled(
+    source: zarr.Array,
+    target: zarr.Array,
+    dims: Sequence[int],
+    options: Optional[WriteOptions] = None,
+    *,
+    method: str = "mean",
+    regions: Optional[Iterable[Tuple[slice, ...]]] = None,
+) -> None:
+    """Writes the downsampled source into target, one chunk at a time.
+
+    If regions is given, only those regions of target are written.
+    """
+    write_array(
+        DownsampledArray(source, dims, method), target, options, regions
+    )
@@ -36,16 +36,29 @@ OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 
 import logging
+import math
+import time
 import warnings
-from copy import deepcopy
-from typing import Any, Dict, Iterator, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from functools import partial
+from itertools import chain, repeat
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
 
 import numpy as np
-from ome_zarr.io import parse_url
 from ome_zarr.reader import Label, Node, Reader
 from ome_zarr.types import LayerData, PathLike, ReaderFunction
 from vispy.color import Colormap
+from zarr.storage import FSStore
 
+from ._chunk_cache import CHUNK_CACHE
+from ._label_table import find_label_table
+from ._lazy_array import CroppedArray, SqueezedArray
+from ._metadata_cache import (
+    METADATA_CACHE,
+    CachedZarrLocation,
+    parse_cached_url,
+)
 from ._model import (
     EXTRA_METADATA_KEY,
     Axis,
@@ -53,9 +66,21 @@ from ._model import (
     OriginalMetadata,
     SpaceAxis,
     TimeAxis,
+    intern,
+)
+from ._painted_array import PaintedArray
+from ._plate import make_plate_node
+from ._prefetch import TimePrefetch, TimeSeriesArray
+from ._series import (
+    is_series_root,
+    list_series,
+    read_series_nodes,
+    summarize_series,
 )
 from ._space_units import SpaceUnits
 from ._time_units import TimeUnits
+from ._validation import validate_multiscales
+from ._zip_store import ZIP_PROTOCOL, is_zip_path, zip_url
 
 # MOD: change the name of the reader for this module.
 LOGGER = logging.getLogger("napari_metadata._reader")
@@ -71,193 +96,488 @@ METADATA_KEYS = (
     "metadata",
 )
 
+# MOD: the only keys that are inspected when probing a path.
+ROOT_METADATA_KEYS = (".zattrs", ".zgroup", "zarr.json")
+
+# MOD: the maximum number of paths that are opened at the same time.
+MAX_READ_WORKERS = 8
+
+# MOD: the percentile of an image's values that is used as its lower
+# contrast limit when its metadata has none. The upper limit is at 100
+# minus this percentile.
+CONTRAST_LIMITS_PERCENTILE = 0.1
+
+# MOD: the maximum number of values that are read to compute the contrast
+# limits of an image.
+MAX_CONTRAST_LIMITS_SAMPLES = 2**22
+
+
+@dataclass
+class PathReadResult:
+    """The outcome of reading one of many paths."""
+
+    path: PathLike
+    layers: List[LayerData] = field(default_factory=list)
+    seconds: float = 0
+    error: Optional[Exception] = None
+
+
+@dataclass(frozen=True)
+class NodeTemplate:
+    """Metadata derived from a node's attributes that is shared by all of
+    its channels and can be cached until those attributes change.
+    """
+
+    axes: Tuple[Axis, ...]
+    channel_axis: Optional[int]
+    time_axis: Optional[int]
+    # The scale and translation of each level, or None if it has none.
+    scales: Tuple[Optional[Tuple[float, ...]], ...]
+    translates: Tuple[Optional[Tuple[float, ...]], ...]
+
+    def level_transforms(
+        self, level: int
+    ) -> Tuple[Optional[Tuple[float, ...]], Optional[Tuple[float, ...]]]:
+        """Returns the scale and translation of a level."""
+        if level < len(self.scales):
+            return self.scales[level], self.translates[level]
+        return None, None
+
+
+@dataclass(frozen=True)
+class LevelSelection:
+    """Selects which levels of multiscale data are read.
+
+    The finest drop_finest levels are dropped first, then any levels with
+    more than max_bytes. The coarsest level is always kept, even if it is
+    too large.
+    """
+
+    max_bytes: Optional[int] = None
+    drop_finest: int = 0
+
+    def first_level(self, levels: Sequence[Any]) -> int:
+        """Returns the index of the finest level that is kept."""
+        last = len(levels) - 1
+        first = max(0, min(self.drop_finest, last))
+        if self.max_bytes is not None:
+            while first < last and _nbytes(levels[first]) > self.max_bytes:
+                first += 1
+            if _nbytes(levels[first]) > self.max_bytes:
+                LOGGER.warning(
+                    f"The coarsest level has {_nbytes(levels[first])} bytes, "
+                    f"which is more than the budget of {self.max_bytes}"
+                )
+        return first
+
+
+@dataclass(frozen=True)
+class RegionOfInterest:
+    """A box in world coordinates that restricts what is read.
+
+    The start and stop of the box are given for the last dimensions of the
+    layers, excluding any channel axis, and earlier dimensions are not
+    restricted. A pixel is in the box if any part of it overlaps the box.
+    """
+
+    start: Tuple[float, ...]
+    stop: Tuple[float, ...]
+
+    def __post_init__(self) -> None:
+        if len(self.start) != len(self.stop):
+            raise ValueError(
+                f"start has {len(self.start)} dims, "
+                f"but stop has {len(self.stop)}"
+            )
+        if not all(a < b for a, b in zip(self.start, self.stop)):
+            raise ValueError(
+                f"start {self.start} must be less than stop {self.stop}"
+            )
+        object.__setattr__(self, "start", tuple(map(float, self.start)))
+        object.__setattr__(self, "stop", tuple(map(float, self.stop)))
+
+    def box(
+        self,
+        shape: Sequence[int],
+        scale: Optional[Sequence[float]],
+        translate: Optional[Sequence[float]],
+    ) -> Tuple[slice, ...]:
+        """Returns the box of pixels of an array of shape that overlap
+        this region, given the array's scale and translation.
+
+        Raises a ValueError if no pixels overlap this region.
+        """
+        ndim = len(shape)
+        if len(self.start) > ndim:
+            raise ValueError(
+                f"region has {len(self.start)} dims, but the data has {ndim}"
+            )
+        scale = (1.0,) * ndim if scale is None else tuple(scale)
+        translate = (0.0,) * ndim if translate is None else tuple(translate)
+        box = [slice(None)] * ndim
+        first_dim = ndim - len(self.start)
+        for i, (a, b) in enumerate(zip(self.start, self.stop), first_dim):
+            # Pixel centers are at translate + index * scale.
+            s, t = scale[i], translate[i]
+            first = math.floor((a - t) / s + 0.5)
+            last = math.ceil((b - t) / s + 0.5)
+            first, last = max(first, 0), min(last, shape[i])
+            if first >= last:
+                raise ValueError(f"region {self} is outside of the data")
+            box[i] = slice(first, last)
+        return tuple(box)
+
+
+# MOD: the levels that are read, unless others are given. This keeps all
+# levels, but can be changed to limit the memory used by large images.
+LEVEL_SELECTION = LevelSelection()
+
+# MOD: how the timepoints of images with a time axis are prefetched, unless
+# other options are given. Nothing is prefetched if this is None.
+TIME_PREFETCH: Optional[TimePrefetch] = None
+
+# MOD: whether multiscale labels are read as only their finest level, which
+# napari can paint, instead of as all their levels, which it can only view.
+# Labels with a single level (e.g. after selecting levels) can always be
+# painted. Set this to True to edit multiscale labels.
+PAINT_MULTISCALE_LABELS = False
+
+# MOD: how many series of a bioformats2raw dataset are read, in order, unless
+# the series are given. Only the first is read, so that the arrays of the
+# others are never opened. Every series is read if this is None.
+SERIES_COUNT: Optional[int] = 1
+
+
+def _nbytes(data: Any) -> int:
+    return int(np.prod(data.shape)) * np.dtype(data.dtype).itemsize
+
 
 def napari_get_reader(path: PathLike) -> Optional[ReaderFunction]:
     """Returns a reader for supported paths that include IDR ID.
     - URL of the form: https://uk1s3.embassy.ebi.ac.uk/idr/zarr/v0.1/ID.zarr/
     The reader can be then be called using the path to read the file.
-    
+
     >>> reader = napari_get_reader(path)
     >>> layer_list = reader(path)
 
     """
-    if isinstance(path, list):
-        if len(path) > 1:
-            warnings.warn("more than one path is not currently supported")
-        path = path[0]
-    zarr = parse_url(path)
-    if zarr:
-        reader = Reader(zarr)
-        return transform(reader())
+    # MOD: accept many paths as long as they all look like zarr groups.
+    paths = path if isinstance(path, list) else [path]
+    # MOD: only probe the root metadata here and defer building the node
+    # tree until the reader is called.
+    if len(paths) > 0 and all(probe(p) for p in paths):
+        return read_ome_zarr
     # Ignoring this path
     return None
 
 
+def probe(path: PathLike) -> bool:
+    """Returns True if the root of path looks like a zarr group.
+
+    Only the existence of the root metadata files is checked, so no
+    child groups or arrays are opened.
+    """
+    try:
+        # MOD: also probe the root of a dataset in a zip archive.
+        if is_zip_path(path):
+            path = zip_url(path)
+        store = FSStore(str(path), mode="r")
+        return any(key in store for key in ROOT_METADATA_KEYS)
+    except Exception:
+        LOGGER.debug(f"failed to probe {path}", exc_info=True)
+        return False
+
+
+def read_ome_zarr(
+    path: PathLike,
+    *,
+    levels: Optional[LevelSelection] = None,
+    time_prefetch: Optional[TimePrefetch] = None,
+    roi: Optional[RegionOfInterest] = None,
+    series: Optional[Sequence[str]] = None,
+) -> List[LayerData]:
+    """Opens the node tree at path and returns its layer data.
+
+    If path is a list, the paths are read concurrently and the layer data
+    is concatenated in the same order as the paths. Failures are reported
+    as warnings, unless every path failed. If levels is None, the levels
+    of multiscale data are selected by LEVEL_SELECTION. If time_prefetch
+    is None, timepoints are prefetched as set by TIME_PREFETCH. If roi is
+    given, every level of each layer is lazily cropped to that region and
+    no data outside of it is read. If series is given, only those series
+    of bioformats2raw datasets are read, otherwise the first SERIES_COUNT.
+    """
+    options = dict(
+        levels=levels, time_prefetch=time_prefetch, roi=roi, series=series
+    )
+    if not isinstance(path, list):
+        return _read_path(path, **options)
+    results = read_paths(path, **options)
+    errors = [r.error for r in results if r.error is not None]
+    if len(results) > 0 and len(errors) == len(results):
+        raise errors[0]
+    layers: List[LayerData] = []
+    for result in results:
+        if result.error is None:
+            layers.extend(result.layers)
+        else:
+            warnings.warn(
+                f"Failed to read {result.path}: {result.error}", UserWarning
+            )
+    return layers
+
+
+def read_paths(
+    paths: Sequence[PathLike],
+    *,
+    max_workers: Optional[int] = None,
+    levels: Optional[LevelSelection] = None,
+    time_prefetch: Optional[TimePrefetch] = None,
+    roi: Optional[RegionOfInterest] = None,
+    series: Optional[Sequence[str]] = None,
+) -> List[PathReadResult]:
+    """Reads many paths on a bounded thread pool.
+
+    A failure to read one path does not stop the others from being read.
+    The results are in the same order as the given paths.
+    """
+    if len(paths) == 0:
+        return []
+    if max_workers is None:
+        max_workers = MAX_READ_WORKERS
+    max_workers = max(1, min(max_workers, len(paths)))
+    read = partial(
+        _timed_read_path,
+        levels=levels,
+        time_prefetch=time_prefetch,
+        roi=roi,
+        series=series,
+    )
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(read, paths))
+    for result in results:
+        LOGGER.info(f"read {result.path} in {result.seconds:.3f}s")
+    return results
+
+
+def _timed_read_path(
+    path: PathLike,
+    *,
+    levels: Optional[LevelSelection] = None,
+    time_prefetch: Optional[TimePrefetch] = None,
+    roi: Optional[RegionOfInterest] = None,
+    series: Optional[Sequence[str]] = None,
+) -> PathReadResult:
+    result = PathReadResult(path=path)
+    start = time.perf_counter()
+    try:
+        result.layers = _read_path(
+            path,
+            levels=levels,
+            time_prefetch=time_prefetch,
+            roi=roi,
+            series=series,
+        )
+    except Exception as e:
+        LOGGER.error(f"failed to read {path}", exc_info=True)
+        result.error = e
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def _read_path(
+    path: PathLike,
+    *,
+    levels: Optional[LevelSelection] = None,
+    time_prefetch: Optional[TimePrefetch] = None,
+    roi: Optional[RegionOfInterest] = None,
+    series: Optional[Sequence[str]] = None,
+) -> List[LayerData]:
+    return transform(
+        read_nodes(path, series=series),
+        levels=levels,
+        time_prefetch=time_prefetch,
+        roi=roi,
+    )()
+
+
+def read_nodes(
+    path: PathLike, *, series: Optional[Sequence[str]] = None
+) -> Iterator[Node]:
+    """Lazily reads the nodes of the tree at path, one at a time.
+
+    If series is given, only those series of a bioformats2raw dataset are
+    read, otherwise the first SERIES_COUNT.
+    """
+    # MOD: use a location that caches parsed attributes across reads.
+    zarr = parse_cached_url(path)
+    if zarr is None:
+        return
+    # MOD: chunks may have changed since the dataset was last read.
+    CHUNK_CACHE.clear(zarr.dataset)
+    # MOD: fail fast on invalid metadata, before any array is opened.
+    if "multiscales" in zarr.root_attrs:
+        validate_multiscales(zarr.root_attrs, url=zarr.path)
+    # MOD: read plates as one lazy mosaic instead of concatenating wells.
+    if "plate" in zarr.root_attrs:
+        node = make_plate_node(zarr)
+        if node is not None:
+            yield node
+    # MOD: read the series of bioformats2raw datasets concurrently, and only
+    # open the arrays of those that are selected.
+    elif is_series_root(zarr):
+        if series is None:
+            series = select_series(zarr)
+        yield from read_series_nodes(zarr, series=series)
+    else:
+        yield from Reader(zarr)()
+
+
+def select_series(location: CachedZarrLocation) -> List[str]:
+    """Returns the first SERIES_COUNT series of a bioformats2raw dataset.
+
+    The summaries of every series are logged when some are left out, so
+    that others can be read by giving their paths as series.
+    """
+    paths = list_series(location)
+    if SERIES_COUNT is None or len(paths) <= SERIES_COUNT:
+        return paths
+    summaries = "\n".join(map(str, summarize_series(location.path)))
+    LOGGER.info(
+        f"Reading {SERIES_COUNT} of the {len(paths)} series of "
+        f"{location.path}, which are:\n{summaries}"
+    )
+    return paths[:SERIES_COUNT]
+
+
 def transform_properties(
     props: Optional[Dict[str, Dict]] = None
-) -> Optional[Dict[str, List]]:
+) -> Optional[Dict[str, np.ndarray]]:
     """
     Transform properties
     Transform a dict of {label_id : {key: value, key2: value2}}
     with a key for every LABEL
-    into a dict of a key for every VALUE, with a list of values for each
+    into a dict of a key for every VALUE, with an array of values for each
     .. code::
         {
-            "index": [1381342, 1381343...]
-            "omero:roiId": [1381342, 1381343...],
-            "omero:shapeId": [1682567, 1682567...]
+            "index": array([1381342, 1381343...]),
+            "omero:roiId": array([1381342, 1381343...]),
+            "omero:shapeId": array([1682567, 1682567...])
         }
+
+    MOD: build one typed array per key instead of lists of boxed values.
+    Objects that do not have a key have NaN in numeric arrays, and None in
+    others.
     """
     if props is None:
         return None
 
-    properties: Dict[str, List] = {}
+    rows = list(props.values())
+    # Ordered union of all existing keys.
+    keys = dict.fromkeys(chain.from_iterable(rows))
+    properties: Dict[str, np.ndarray] = {
+        key: property_column(rows, key) for key in keys
+    }
+    index = list(props.keys())
+    properties["index"] = _as_column(index, set(map(type, index)))
+    return properties
 
-    # First, create lists for all existing keys...
-    for label_id, props_dict in props.items():
-        for key in props_dict.keys():
-            properties[key] = []
 
-    keys = list(properties.keys())
+def property_column(rows: List[Dict], key: str) -> np.ndarray:
+    """Returns the values of key in rows as one typed array.
 
-    properties["index"] = []
-    for label_id, props_dict in props.items():
-        properties["index"].append(label_id)
-        # ...in case some objects don't have all the keys
-        for key in keys:
-            properties[key].append(props_dict.get(key, None))
-    return properties
+    If some rows do not have the key or its value is None, those rows are
+    NaN in a float array if the other values are numbers, and None in an
+    object array otherwise.
+    """
+    values = list(map(dict.get, rows, repeat(key)))
+    types = set(map(type, values))
+    if type(None) not in types:
+        return _as_column(values, types)
+    types.discard(type(None))
+    if types <= {bool, int, float}:
+        # NaN has no integer or bool representation, so promote to float.
+        return np.fromiter(
+            (np.nan if value is None else value for value in values),
+            dtype=np.float64,
+            count=len(values),
+        )
+    return _object_column(values)
+
+
+def _as_column(values: List, types: Set[type]) -> np.ndarray:
+    if not types or types == {str}:
+        return np.asarray(values)
+    if types <= {bool, int, float}:
+        # Promote numbers like numpy does, but without inspecting each value.
+        dtype = (
+            np.float64
+            if float in types
+            else np.int64
+            if int in types
+            else np.bool_
+        )
+        try:
+            return np.fromiter(values, dtype=dtype, count=len(values))
+        except OverflowError:
+            pass
+    # Avoid numpy's coercion of mixed numbers and strings to strings.
+    return _object_column(values)
+
+
+def _object_column(values: List) -> np.ndarray:
+    # Assign each value, so that values that are sequences are kept as they
+    # are instead of becoming another dimension of the array.
+    column = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        column[i] = value
+    return column
 
 
 def transform_scale(
-    node_metadata: Dict, metadata: Dict, channel_axis: Optional[int]
+    node_metadata: Dict,
+    metadata: Dict,
+    channel_axis: Optional[int],
+    level: int = 0,
 ) -> None:
     """
     e.g. transformation is {"scale": [0.2, 0.06, 0.06]}
-    Get a list of these for each level in data. Just use first?
+    MOD: use the transforms of the given level.
     """
     if "coordinateTransformations" in node_metadata:
-        level_0_transforms = node_metadata["coordinateTransformations"][0]
-        for transf in level_0_transforms:
+        level_transforms = node_metadata["coordinateTransformations"][level]
+        for transf in level_transforms:
+            # MOD: copy the transforms to leave the cached attributes as
+            # they were.
             if "scale" in transf:
-                scale = transf["scale"]
+                scale = list(transf["scale"])
                 if channel_axis is not None:
                     scale.pop(channel_axis)
                 metadata["scale"] = tuple(scale)
             if "translation" in transf:
-                translate = transf["translation"]
+                translate = list(transf["translation"])
                 if channel_axis is not None:
                     translate.pop(channel_axis)
                 metadata["translate"] = tuple(translate)
 
 
-def transform(nodes: Iterator[Node]) -> Optional[ReaderFunction]:
+def transform(
+    nodes: Iterator[Node],
+    *,
+    levels: Optional[LevelSelection] = None,
+    time_prefetch: Optional[TimePrefetch] = None,
+    roi: Optional[RegionOfInterest] = None,
+) -> Optional[ReaderFunction]:
     def f(*args: Any, **kwargs: Any) -> List[LayerData]:
         results: List[LayerData] = list()
 
         for node in nodes:
-            data: List[Any] = node.data
-            metadata: Dict[str, Any] = {}
-            if data is None or len(data) < 1:
-                LOGGER.debug(f"skipping non-data {node}")
-            else:
-                LOGGER.debug(f"transforming {node}")
-                LOGGER.debug("node.metadata: %s" % node.metadata)
-
-                layer_type: str = "image"
-                channel_axis = None
-                try:
-                    ch_types = [axis["type"] for axis in node.metadata["axes"]]
-                    if "channel" in ch_types:
-                        channel_axis = ch_types.index("channel")
-                except Exception:
-                    LOGGER.error("Error reading axes: Please update ome-zarr")
-                    raise
-
-                transform_scale(node.metadata, metadata, channel_axis)
-
-                # MOD: squeeze a single level image.
-                if isinstance(data, list) and len(data) == 1:
-                    data = data[0]
-
-                # MOD: ensure that name is a list to handle single channel.
-                if name := node.metadata.get("name"):
-                    if channel_axis is None and isinstance(name, str):
-                        node.metadata["name"] = [name]
-
-                if node.load(Label):
-                    layer_type = "labels"
-                    for x in METADATA_KEYS:
-                        if x in node.metadata:
-                            metadata[x] = node.metadata[x]
-                    if channel_axis is not None:
-                        data = [
-                            np.squeeze(level, axis=channel_axis)
-                            for level in node.data
-                        ]
-
-                    # MOD: napari images don't support properties.
-                    properties = transform_properties(
-                        node.metadata.get("properties")
-                    )
-                    if properties is not None:
-                        metadata["properties"] = properties
-
-                else:
-                    # Handle the removal of vispy requirement from ome-zarr-py
-                    cms = node.metadata.get("colormap", [])
-                    for idx, cm in enumerate(cms):
-                        if not isinstance(cm, Colormap):
-                            cms[idx] = Colormap(cm)
-
-                    if channel_axis is not None:
-                        # multi-channel; Copy known metadata values
-                        metadata["channel_axis"] = channel_axis
-                        for x in METADATA_KEYS:
-                            if x in node.metadata:
-                                metadata[x] = node.metadata[x]
-                    else:
-                        # single channel image, so metadata just needs
-                        # single items (not lists)
-                        for x in METADATA_KEYS:
-                            if x in node.metadata:
-                                try:
-                                    metadata[x] = node.metadata[x][0]
-                                except Exception:
-                                    pass
-
-                # MOD: this plugin provides somewhere to put the axes
-                # and some extra metadata. We create an instance of extra
-                # metadata per channel.
-                axes = get_axes(node.metadata)
-                if channel_axis is None:
-                    if "metadata" not in metadata:
-                        metadata["metadata"] = dict()
-                    name = metadata.get("name")
-                    metadata["metadata"][EXTRA_METADATA_KEY] = make_extras(
-                        metadata=metadata,
-                        axes=axes,
-                        name=name,
-                    )
-                else:
-                    n_channels = (
-                        data[0] if isinstance(data, list) else data
-                    ).shape[channel_axis]
-                    meta = metadata.get("metadata", dict())
-                    if not isinstance(meta, list):
-                        metadata["metadata"] = [deepcopy(meta)] * n_channels
-                    name = metadata.get("name")
-                    if not isinstance(name, list):
-                        name = [name] * n_channels
-                    for n, m in zip(name, metadata["metadata"]):
-                        m[EXTRA_METADATA_KEY] = make_extras(
-                            metadata=metadata,
-                            axes=axes,
-                            name=n,
-                        )
-
-                rv: LayerData = (data, metadata, layer_type)
-                LOGGER.debug(f"Transformed: {rv}")
+            # MOD: transform each node on its own, so that nodes can also
+            # be transformed one at a time as they are read.
+            rv = transform_node(
+                node, levels=levels, time_prefetch=time_prefetch, roi=roi
+            )
+            if rv is not None:
                 results.append(rv)
 
         return results
@@ -265,21 +585,453 @@ def transform(nodes: Iterator[Node]) -> Optional[ReaderFunction]:
     return f
 
 
+def transform_node(
+    node: Node,
+    *,
+    levels: Optional[LevelSelection] = None,
+    time_prefetch: Optional[TimePrefetch] = None,
+    roi: Optional[RegionOfInterest] = None,
+) -> Optional[LayerData]:
+    """Returns the layer data of a node, or None if it has no data."""
+    # MOD: select which levels of multiscale data are kept.
+    if levels is None:
+        levels = LEVEL_SELECTION
+    # MOD: optionally prefetch the timepoints of images.
+    if time_prefetch is None:
+        time_prefetch = TIME_PREFETCH
+
+    data: List[Any] = node.data
+    metadata: Dict[str, Any] = {}
+    if data is None or len(data) < 1:
+        LOGGER.debug(f"skipping non-data {node}")
+        return None
+
+    LOGGER.debug(f"transforming {node}")
+    LOGGER.debug("node.metadata: %s" % node.metadata)
+
+    layer_type: str = "image"
+    # MOD: get the channel axis, transforms and axes from a
+    # template that may have been cached by an earlier read.
+    template = get_node_template(node)
+    channel_axis = template.channel_axis
+
+    # MOD: only keep the selected levels and use the transforms
+    # of the finest one that is kept.
+    first_level = levels.first_level(data)
+    data = data[first_level:]
+    scale, translate = template.level_transforms(first_level)
+    if scale is not None:
+        metadata["scale"] = scale
+    if translate is not None:
+        metadata["translate"] = translate
+
+    # MOD: lazily crop every level to the region of interest
+    # and move the crop to where it is in the full data.
+    if roi is not None:
+        data = crop_levels(data, roi, scale, translate, channel_axis)
+        metadata["translate"] = crop_translate(
+            data[0], scale, translate, channel_axis
+        )
+    coarsest = data[-1]
+
+    # MOD: keep extra metadata from nodes made by this plugin
+    # (e.g. the attributes of a plate).
+    if "metadata" in node.metadata:
+        metadata["metadata"] = dict(node.metadata["metadata"])
+
+    # MOD: squeeze a single level image.
+    if isinstance(data, list) and len(data) == 1:
+        data = data[0]
+
+    # MOD: ensure that name is a list to handle single channel.
+    # Labels use their metadata as is, so keep a single name.
+    if name := node.metadata.get("name"):
+        if channel_axis is None and isinstance(name, str):
+            if not node.load(Label):
+                node.metadata["name"] = [name]
+
+    if node.load(Label):
+        layer_type = "labels"
+        for x in METADATA_KEYS:
+            if x in node.metadata:
+                metadata[x] = node.metadata[x]
+        if channel_axis is not None:
+            # MOD: squeeze lazily so that no data is read and
+            # keep a single level squeezed too.
+            data = [
+                SqueezedArray(level, channel_axis)
+                for level in (data if isinstance(data, list) else [data])
+            ]
+            if len(data) == 1:
+                data = data[0]
+        # MOD: napari only paints a single level that can be assigned to.
+        if not isinstance(data, list) or PAINT_MULTISCALE_LABELS:
+            in_place = (
+                first_level == 0 and roi is None and channel_axis is None
+            )
+            data = paintable_labels(data, node, in_place=in_place)
+
+        # MOD: napari images don't support properties.
+        properties = transform_properties(node.metadata.get("properties"))
+        # MOD: fall back to a table stored next to the image.
+        if properties is None:
+            table = find_label_table(node.zarr)
+            if table is not None:
+                properties = table.to_properties()
+        if properties is not None:
+            metadata["properties"] = properties
+
+    else:
+        # Handle the removal of vispy requirement from ome-zarr-py
+        cms = node.metadata.get("colormap", [])
+        for idx, cm in enumerate(cms):
+            if not isinstance(cm, Colormap):
+                cms[idx] = Colormap(cm)
+
+        if channel_axis is not None:
+            # multi-channel; Copy known metadata values
+            metadata["channel_axis"] = channel_axis
+            for x in METADATA_KEYS:
+                if x in node.metadata:
+                    metadata[x] = node.metadata[x]
+        else:
+            # single channel image, so metadata just needs
+            # single items (not lists)
+            for x in METADATA_KEYS:
+                if x in node.metadata:
+                    try:
+                        metadata[x] = node.metadata[x][0]
+                    except Exception:
+                        pass
+
+        # MOD: always provide contrast limits, so that napari
+        # does not estimate them from the full resolution data.
+        metadata["contrast_limits"] = get_contrast_limits(
+            node,
+            channel_axis,
+            metadata.get("contrast_limits"),
+            coarsest,
+        )
+
+        # MOD: prefetch the timepoints near the one viewed.
+        # Labels are not wrapped, because napari paints into
+        # their data.
+        time_axis = template.time_axis
+        if time_prefetch is not None and time_axis is not None:
+            prefetch = partial(
+                TimeSeriesArray,
+                time_axis=time_axis,
+                prefetch=time_prefetch,
+                dataset=node.zarr.dataset,
+            )
+            if isinstance(data, list):
+                data = [prefetch(level) for level in data]
+            else:
+                data = prefetch(data)
+
+    # MOD: this plugin provides somewhere to put the axes
+    # and some extra metadata. We create an instance of extra
+    # metadata per channel.
+    axes = template.axes
+    if channel_axis is None:
+        if "metadata" not in metadata:
+            metadata["metadata"] = dict()
+        name = metadata.get("name")
+        metadata["metadata"][EXTRA_METADATA_KEY] = make_extras(
+            metadata=metadata,
+            axes=axes,
+            name=name,
+        )
+    else:
+        n_channels = (data[0] if isinstance(data, list) else data).shape[
+            channel_axis
+        ]
+        meta = metadata.get("metadata", dict())
+        if not isinstance(meta, list):
+            # MOD: make a shallow copy for each channel, so
+            # that each has its own extra metadata.
+            metadata["metadata"] = [dict(meta) for _ in range(n_channels)]
+        name = metadata.get("name")
+        if not isinstance(name, list):
+            name = [name] * n_channels
+        for n, m in zip(name, metadata["metadata"]):
+            m[EXTRA_METADATA_KEY] = make_extras(
+                metadata=metadata,
+                axes=axes,
+                name=n,
+            )
+
+    rv: LayerData = (data, metadata, layer_type)
+    LOGGER.debug(f"Transformed: {rv}")
+    return rv
+
+
+def crop_levels(
+    levels: Sequence[Any],
+    roi: RegionOfInterest,
+    scale: Optional[Tuple[float, ...]],
+    translate: Optional[Tuple[float, ...]],
+    channel_axis: Optional[int],
+) -> List[CroppedArray]:
+    """Lazily crops each level of multiscale data to a region of interest.
+
+    The scale and translation are those of the finest level. The box of
+    each coarser level is the one that covers the box of the finest level,
+    because napari positions coarser levels by their downsampling factors.
+    """
+    shape = list(levels[0].shape)
+    if channel_axis is not None:
+        shape.pop(channel_axis)
+    box = list(roi.box(shape, scale, translate))
+    if channel_axis is not None:
+        box.insert(channel_axis, slice(None))
+    cropped = []
+    for level in levels:
+        level_box = []
+        for b, size, level_size in zip(box, levels[0].shape, level.shape):
+            if b.start is None:
+                level_box.append(slice(None))
+                continue
+            factor = size / level_size
+            start = min(math.floor(b.start / factor), level_size - 1)
+            stop = max(math.ceil(b.stop / factor), start + 1)
+            level_box.append(slice(start, min(stop, level_size)))
+        cropped.append(CroppedArray(level, level_box))
+    return cropped
+
+
+def crop_translate(
+    cropped: CroppedArray,
+    scale: Optional[Tuple[float, ...]],
+    translate: Optional[Tuple[float, ...]],
+    channel_axis: Optional[int],
+) -> Tuple[float, ...]:
+    """Returns the translation of the finest level of cropped data."""
+    starts = list(cropped.starts)
+    if channel_axis is not None:
+        starts.pop(channel_axis)
+    if scale is None:
+        scale = (1.0,) * len(starts)
+    if translate is None:
+        translate = (0.0,) * len(starts)
+    return tuple(t + i * s for t, i, s in zip(translate, starts, scale))
+
+
+def paintable_labels(data: Any, node: Node, *, in_place: bool) -> Any:
+    """MOD: returns the finest level of labels as an array that napari can
+    paint.
+
+    If in_place is True and the labels are in a Zarr v2 dataset outside
+    of an archive, the array can be saved by only rewriting the chunks
+    that were painted.
+    """
+    finest = data[0] if isinstance(data, list) else data
+    url: Optional[str] = node.zarr.subpath("")
+    if (
+        not in_place
+        or node.zarr.zarr_format != 2
+        or url.startswith(f"{ZIP_PROTOCOL}:")
+    ):
+        url = None
+    return PaintedArray(finest, url=url, dataset=node.zarr.dataset)
+
+
+def get_node_template(node: Node) -> NodeTemplate:
+    """Gets the template of a node from the process-wide metadata cache,
+    making and caching it first if needed.
+
+    Any warnings about the node's axes are only emitted when the template
+    is first made.
+    """
+    key = None
+    if isinstance(node.zarr, CachedZarrLocation):
+        if (attrs_key := node.zarr.cache_key(".zattrs")) is not None:
+            key = (attrs_key, NodeTemplate.__name__)
+    if key is not None and (template := METADATA_CACHE.get(key)) is not None:
+        return template
+    template = make_node_template(node)
+    if key is not None:
+        METADATA_CACHE.put(key, template)
+    return template
+
+
+def make_node_template(node: Node) -> NodeTemplate:
+    # MOD: report all the problems with the metadata of nodes below the
+    # root too (e.g. labels), instead of the first one that is used.
+    if "multiscales" in node.zarr.root_attrs:
+        validate_multiscales(node.zarr.root_attrs, url=node.zarr.path)
+    channel_axis = None
+    time_axis = None
+    try:
+        ch_types = [axis["type"] for axis in node.metadata["axes"]]
+        if "channel" in ch_types:
+            channel_axis = ch_types.index("channel")
+        # MOD: also find the time axis, whose timepoints may be prefetched.
+        if "time" in ch_types:
+            time_axis = ch_types.index("time")
+    except Exception:
+        LOGGER.error("Error reading axes: Please update ome-zarr")
+        raise
+    level_metadata: List[Dict[str, Any]] = []
+    transforms = node.metadata.get("coordinateTransformations", [])
+    for level in range(len(transforms)):
+        metadata: Dict[str, Any] = {}
+        transform_scale(node.metadata, metadata, channel_axis, level)
+        level_metadata.append(metadata)
+    return NodeTemplate(
+        axes=tuple(get_axes(node.metadata)),
+        channel_axis=channel_axis,
+        time_axis=time_axis,
+        scales=tuple(m.get("scale") for m in level_metadata),
+        translates=tuple(m.get("translate") for m in level_metadata),
+    )
+
+
+def get_contrast_limits(
+    node: Node,
+    channel_axis: Optional[int],
+    contrast_limits: Any,
+    coarsest: Any = None,
+) -> List:
+    """Fills in any contrast limits that are missing from an image's
+    metadata (e.g. from the window of omero channels).
+
+    Missing limits are computed from the coarsest level of the image's
+    data, which is the last level of the node's data unless given.
+    Returns one pair of limits per channel if there is a channel axis.
+    Otherwise returns one pair of limits.
+    """
+    if channel_axis is None:
+        if _is_contrast_limits(contrast_limits):
+            return list(contrast_limits)
+        return get_computed_contrast_limits(node, None, coarsest)[0]
+    n_channels = node.data[0].shape[channel_axis]
+    if not (
+        isinstance(contrast_limits, list)
+        and len(contrast_limits) == n_channels
+    ):
+        contrast_limits = [None] * n_channels
+    if all(map(_is_contrast_limits, contrast_limits)):
+        return [list(limits) for limits in contrast_limits]
+    computed = get_computed_contrast_limits(node, channel_axis, coarsest)
+    return [
+        list(limits) if _is_contrast_limits(limits) else computed_limits
+        for limits, computed_limits in zip(contrast_limits, computed)
+    ]
+
+
+def get_computed_contrast_limits(
+    node: Node, channel_axis: Optional[int], coarsest: Any = None
+) -> List[List[float]]:
+    """Gets the contrast limits of each channel of the smallest level of a
+    node from the process-wide metadata cache, computing and caching them
+    first if needed.
+
+    If the smallest level is cropped, the limits are of the crop.
+    """
+    if coarsest is None:
+        coarsest = node.data[-1]
+    key = None
+    multiscales = node.zarr.root_attrs.get("multiscales", [{}])[0]
+    if datasets := multiscales.get("datasets"):
+        if isinstance(node.zarr, CachedZarrLocation):
+            array_key = node.zarr.cache_key(f"{datasets[-1]['path']}/.zarray")
+            if array_key is not None:
+                key = (
+                    array_key,
+                    "contrast_limits",
+                    channel_axis,
+                    CONTRAST_LIMITS_PERCENTILE,
+                )
+                if isinstance(coarsest, CroppedArray):
+                    key += (coarsest.starts, coarsest.shape)
+    if key is not None and (limits := METADATA_CACHE.get(key)) is not None:
+        return limits
+    limits = compute_contrast_limits(
+        coarsest,
+        channel_axis,
+        percentile=CONTRAST_LIMITS_PERCENTILE,
+        max_samples=MAX_CONTRAST_LIMITS_SAMPLES,
+    )
+    if key is not None:
+        METADATA_CACHE.put(key, limits)
+    return limits
+
+
+def compute_contrast_limits(
+    data: Any,
+    channel_axis: Optional[int],
+    *,
+    percentile: float,
+    max_samples: int,
+) -> List[List[float]]:
+    """Computes the contrast limits of each channel from a sample of data.
+
+    The sample is the middle plane of the non-spatial dimensions, which is
+    subsampled to at most about max_samples values.
+    """
+    ndim = len(data.shape)
+    spatial = [i for i in range(ndim) if i != channel_axis][-2:]
+    sampled = [i for i in range(ndim) if i == channel_axis or i in spatial]
+    n_samples = int(np.prod([data.shape[i] for i in sampled]))
+    step = max(1, math.ceil(math.sqrt(n_samples / max_samples)))
+    key = tuple(
+        slice(None, None, step)
+        if i in spatial
+        else slice(None)
+        if i == channel_axis
+        else size // 2
+        for i, size in enumerate(data.shape)
+    )
+    sample = np.asarray(data[key])
+    if channel_axis is None:
+        sample = sample.reshape(1, -1)
+    else:
+        channel_index = sampled.index(channel_axis)
+        sample = np.moveaxis(sample, channel_index, 0)
+        sample = sample.reshape(sample.shape[0], -1)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        lows, highs = np.nanpercentile(
+            sample.astype(np.float64), [percentile, 100 - percentile], axis=1
+        )
+    limits = []
+    for low, high in zip(lows.tolist(), highs.tolist()):
+        if not (np.isfinite(low) and np.isfinite(high)):
+            low, high = 0.0, 1.0
+        elif low >= high:
+            high = low + 1
+        limits.append([low, high])
+    return limits
+
+
+def _is_contrast_limits(limits: Any) -> bool:
+    return (
+        isinstance(limits, (list, tuple))
+        and len(limits) == 2
+        and all(isinstance(x, (int, float)) for x in limits)
+    )
+
+
 def make_extras(
-    *, metadata: dict, axes: List[Axis], name: Optional[str]
+    *, metadata: dict, axes: Sequence[Axis], name: Optional[str]
 ) -> ExtraMetadata:
     scale = tuple(metadata["scale"]) if "scale" in metadata else None
     translate = (
         tuple(metadata["translate"]) if "translate" in metadata else None
     )
-    original_meta = OriginalMetadata(
-        axes=deepcopy(axes),
-        name=name,
-        scale=scale,
-        translate=translate,
+    # MOD: the axes and original metadata are immutable, so share them
+    # across channels and nodes instead of copying them.
+    original_meta = intern(
+        OriginalMetadata(
+            axes=tuple(axes),
+            name=name,
+            scale=scale,
+            translate=translate,
+        )
     )
     return ExtraMetadata(
-        axes=deepcopy(axes),
+        axes=list(original_meta.axes),
         original=original_meta,
     )
 
@@ -297,8 +1049,12 @@ def get_axes(metadata: Dict) -> List[Axis]:
             "Using none for all instead.",
             UserWarning,
         )
-        for axis in space_axes:
-            axis.unit = SpaceUnits.NONE
+        axes = [
+            intern(replace(axis, unit=SpaceUnits.NONE))
+            if isinstance(axis, SpaceAxis)
+            else axis
+            for axis in axes
+        ]
     return axes
 
 
@@ -307,7 +1063,7 @@ def get_axis(axis: Dict) -> Optional[Axis]:
     unit = axis.get("unit", "none")
     axis_type = axis.get("type")
     if axis_type == "time":
-        return TimeAxis(name=name, unit=TimeUnits.from_name(unit))
+        return intern(TimeAxis(name=name, unit=TimeUnits.from_name(unit)))
     elif axis_type != "channel":
-        return SpaceAxis(name=name, unit=SpaceUnits.from_name(unit))
+        return intern(SpaceAxis(name=name, unit=SpaceUnits.from_name(unit)))
     return None
@@ -1,5 +1,3 @@
-import os
-from copy import deepcopy
 from typing import TYPE_CHECKING, Dict, List, Tuple
 
 import numpy as np
@@ -28,17 +26,17 @@ def read_ome_zarr_hipsc_mip() -> List["LayerData"]:
        measurements, 2x2 field of views (1.1.0) [Data set]. Zenodo.
        https://doi.org/10.5281/zenodo.7674571
     """
-    unzip_dir = pooch.retrieve(
+    # The archive is read directly, so it does not need to be extracted.
+    zip_path = pooch.retrieve(
         url="https://zenodo.org/record/7674571/files/"
         "20200812-CardiomyocyteDifferentiation14-Cycle1_mip.zarr.zip?"
         "download=1",
         known_hash="md5:93722285708d58a36a0a3ee413b2c8a1",
-        processor=pooch.Unzip(),
+        fname="20200812-CardiomyocyteDifferentiation14-Cycle1_mip.zarr.zip",
         progressbar=True,
     )
-    zarr_dir = os.path.split(unzip_dir[0])[0]
-    reader = napari_get_reader(zarr_dir)
-    return reader(zarr_dir)
+    reader = napari_get_reader(zip_path)
+    return reader(zip_path)
 
 
 def make_nuclei_md_sample_data() -> List["LayerData"]:
@@ -103,7 +101,7 @@ def _make_metadata(
     ]
     original = OriginalMetadata(
         name=name,
-        axes=tuple(deepcopy(axes)),
+        axes=tuple(axes),
         scale=scale,
         translate=(0,) * len(scale),
     )
@@ -0,0 +1,163 @@
+"""Reads the image series of datasets converted with bioformats2raw.
+
+bioformats2raw writes every series of a file as a multiscale image in a
+group of its own under one root, which has no image itself. The series are
+listed from the root metadata, then their node trees are read concurrently
+and only for the series that are read, so that the arrays of other series
+are never opened. A summary of every series can be made from metadata
+alone, before any series is read.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from ome_zarr.reader import Node, Reader
+from ome_zarr.types import PathLike
+
+from ._metadata_cache import CachedZarrLocation, parse_cached_url
+from ._validation import validate_multiscales
+
+LOGGER = logging.getLogger("napari_metadata._series")
+
+# The maximum number of series that are read at the same time.
+MAX_SERIES_WORKERS = 16
+
+# The key of the root attributes that marks a bioformats2raw dataset.
+LAYOUT_KEY = "bioformats2raw.layout"
+
+# The axes of multiscales before version 0.3, which do not list them.
+_DEFAULT_AXES = ("t", "c", "z", "y", "x")
+
+
+@dataclass(frozen=True)
+class SeriesSummary:
+    """What a series contains, as described by its metadata.
+
+    The shape and dtype are those of the finest level. Units are None for
+    axes without one.
+    """
+
+    path: str
+    name: str
+    shape: Tuple[int, ...]
+    dtype: np.dtype
+    axes: Tuple[str, ...]
+    units: Tuple[Optional[str], ...]
+
+    def __str__(self) -> str:
+        dims = ", ".join(
+            f"{axis}={size}" + (f" {unit}" if unit else "")
+            for axis, size, unit in zip(self.axes, self.shape, self.units)
+        )
+        return f"{self.name} ({self.path}): {dims}, {self.dtype}"
+
+
+def is_series_root(location: CachedZarrLocation) -> bool:
+    return LAYOUT_KEY in location.root_attrs
+
+
+def list_series(location: CachedZarrLocation) -> List[str]:
+    """Returns the paths of the series under a bioformats2raw root.
+
+    The series are listed in the OME group if it has them. Otherwise they
+    are the groups 0, 1, 2, ... up to the first that is not an image.
+    """
+    series = location.get_json("OME/.zattrs").get("series")
+    if isinstance(series, list):
+        return [str(path) for path in series]
+    paths: List[str] = []
+    while "multiscales" in location.get_json(f"{len(paths)}/.zattrs"):
+        paths.append(str(len(paths)))
+    return paths
+
+
+def summarize_series(
+    path: PathLike, *, max_workers: Optional[int] = None
+) -> List[SeriesSummary]:
+    """Returns a summary of every series of the dataset at path.
+
+    Only the metadata of each series and of its finest array are read,
+    concurrently. Series whose metadata cannot be read are left out.
+    Returns an empty list if path is not a bioformats2raw dataset.
+    """
+    location = parse_cached_url(path)
+    if location is None or not is_series_root(location):
+        return []
+    paths = list_series(location)
+    summaries = _map(
+        lambda p: _summarize(location, p), paths, max_workers=max_workers
+    )
+    return [s for s in summaries if s is not None]
+
+
+def read_series_nodes(
+    location: CachedZarrLocation,
+    *,
+    series: Optional[Sequence[str]] = None,
+    max_workers: Optional[int] = None,
+) -> Iterator[Node]:
+    """Reads the node trees of some series of a bioformats2raw root.
+
+    The trees are read concurrently, but their nodes are yielded in the
+    order of the series. If series is None, every series is read.
+    """
+    available = list_series(location)
+    paths = available if series is None else [str(p) for p in series]
+    if unknown := set(paths) - set(available):
+        raise ValueError(f"{location} has no series {sorted(unknown)}")
+    if len(paths) == 0:
+        LOGGER.warning(f"No series found in {location}")
+
+    def read_tree(path: str) -> List[Node]:
+        series_location = location.create(path)
+        attrs = series_location.root_attrs
+        if "multiscales" in attrs:
+            validate_multiscales(attrs, url=series_location.path)
+        nodes = list(Reader(series_location)())
+        if nodes and not nodes[0].metadata.get("name"):
+            nodes[0].metadata["name"] = path
+        return nodes
+
+    for nodes in _map(read_tree, paths, max_workers=max_workers):
+        yield from nodes
+
+
+def _summarize(
+    location: CachedZarrLocation, path: str
+) -> Optional[SeriesSummary]:
+    try:
+        multiscale = location.get_json(f"{path}/.zattrs")["multiscales"][0]
+        dataset = multiscale["datasets"][0]["path"]
+        array = location.get_json(f"{path}/{dataset}/.zarray")
+        shape = tuple(array["shape"])
+        dtype = np.dtype(array["dtype"])
+    except Exception:
+        LOGGER.warning(f"Failed to summarize series {path}", exc_info=True)
+        return None
+    axes = multiscale.get("axes") or _DEFAULT_AXES[-len(shape) :]  # noqa
+    names = tuple(a["name"] if isinstance(a, dict) else a for a in axes)
+    units = tuple(a.get("unit") if isinstance(a, dict) else None for a in axes)
+    return SeriesSummary(
+        path=path,
+        name=multiscale.get("name") or path,
+        shape=shape,
+        dtype=dtype,
+        axes=names,
+        units=units,
+    )
+
+
+def _map(
+    function: Callable[[str], Any],
+    paths: Sequence[str],
+    *,
+    max_workers: Optional[int],
+) -> Iterator[Any]:
+    if max_workers is None:
+        max_workers = MAX_SERIES_WORKERS
+    max_workers = max(1, min(max_workers, len(paths)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Results are yielded in the order of paths as soon as each is ready.
+        yield from executor.map(function, paths)
@@ -1,5 +1,8 @@
+from typing import List
+
 import pytest
 import numpy as np
+from zarr.storage import FSStore
 
 @pytest.fixture
 def rng() -> np.random.Generator:
@@ -9,3 +12,30 @@ def rng() -> np.random.Generator:
 @pytest.fixture
 def path(tmp_path) -> str:
     return str(tmp_path / "test.zarr")
+
+
+@pytest.fixture
+def store_keys(monkeypatch) -> List[str]:
+    """Records every key that is looked up in or read from an FSStore."""
+    keys: List[str] = []
+
+    contains = FSStore.__contains__
+    getitem = FSStore.__getitem__
+    getitems = FSStore.getitems
+
+    def record_contains(self, key):
+        keys.append(key)
+        return contains(self, key)
+
+    def record_getitem(self, key):
+        keys.append(key)
+        return getitem(self, key)
+
+    def record_getitems(self, keys_to_get, **kwargs):
+        keys.extend(keys_to_get)
+        return getitems(self, keys_to_get, **kwargs)
+
+    monkeypatch.setattr(FSStore, "__contains__", record_contains)
+    monkeypatch.setattr(FSStore, "__getitem__", record_getitem)
+    monkeypatch.setattr(FSStore, "getitems", record_getitems)
+    return keys
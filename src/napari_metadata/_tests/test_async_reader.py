@@ -0,0 +1,145 @@
+import asyncio
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import Iterator
+
+import numpy as np
+import pytest
+import zarr
+from ome_zarr.io import parse_url
+from ome_zarr.writer import write_image, write_labels
+
+from .. import _async_reader, _reader
+from .._async_reader import ReadTask, read_ome_zarr_async
+
+
+@pytest.fixture
+def image_path(path, rng) -> str:
+    """Writes an image with labels, which are read as two nodes."""
+    root = zarr.group(parse_url(path, mode="w").store)
+    data = rng.integers(0, 255, size=(2, 8, 10), dtype=np.uint8)
+    write_image(data, root, scaler=None, axes="cyx")
+    labels = rng.integers(0, 5, size=(8, 10), dtype=np.uint8)
+    write_labels(labels, root, name="cells", scaler=None, axes="yx")
+    return path
+
+
+@pytest.fixture
+def executor() -> Iterator[ThreadPoolExecutor]:
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        yield executor
+
+
+@pytest.fixture
+def gate(monkeypatch) -> threading.Event:
+    """Blocks transforming any node until the returned event is set."""
+    event = threading.Event()
+    transform_node = _async_reader.transform_node
+
+    def gated_transform_node(node, **kwargs):
+        assert event.wait(timeout=10)
+        return transform_node(node, **kwargs)
+
+    monkeypatch.setattr(_async_reader, "transform_node", gated_transform_node)
+    return event
+
+
+def assert_layers_equal(layers, expected) -> None:
+    assert [t for _, _, t in layers] == [t for _, _, t in expected]
+    assert [m.get("name") for _, m, _ in layers] == [
+        m.get("name") for _, m, _ in expected
+    ]
+    for (data, _, _), (expected_data, _, _) in zip(layers, expected):
+        np.testing.assert_array_equal(
+            np.asarray(data), np.asarray(expected_data)
+        )
+
+
+def test_read_task_yields_same_layers_as_reader(image_path, executor):
+    expected = _reader.read_ome_zarr(image_path)
+
+    task = read_ome_zarr_async(image_path, executor=executor)
+
+    assert_layers_equal(list(task), expected)
+    assert task.done()
+    assert not task.cancelled()
+    assert_layers_equal(task.result(), expected)
+
+
+def test_read_task_async_iteration(image_path, executor):
+    expected = _reader.read_ome_zarr(image_path)
+
+    async def read():
+        return [
+            layer async for layer in ReadTask(image_path, executor=executor)
+        ]
+
+    assert_layers_equal(asyncio.run(read()), expected)
+
+
+def test_read_task_shows_placeholders_until_layers_are_ready(
+    image_path, executor, gate
+):
+    task = ReadTask(image_path, executor=executor)
+    with pytest.raises(FuturesTimeoutError):
+        task.result(timeout=0.5)
+
+    placeholders = task.placeholders()
+    assert [p.name for p in placeholders] == ["test.zarr", "cells"]
+    assert all(p.loading for p in placeholders)
+    assert task.layers() == []
+    assert not task.done()
+
+    gate.set()
+
+    assert len(task.result(timeout=10)) == 2
+    assert not any(p.loading for p in task.placeholders())
+    assert len(task.layers()) == 2
+
+
+def test_read_task_calls_listeners(image_path, executor, gate):
+    calls = []
+    task = ReadTask(image_path, executor=executor)
+    task.add_listener(lambda t: calls.append(len(t.layers())))
+
+    gate.set()
+    task.result(timeout=10)
+
+    assert calls
+    assert calls[-1] == 2
+
+
+def test_cancel_read_task(image_path, executor, gate):
+    task = ReadTask(image_path, executor=executor)
+    while len(task.placeholders()) < 2:
+        pass
+
+    assert task.cancel()
+    gate.set()
+
+    assert task.cancelled()
+    with pytest.raises(CancelledError):
+        task.result(timeout=10)
+    with pytest.raises(CancelledError):
+        list(task)
+    assert task.done()
+    assert not task.cancel()
+
+
+def test_read_task_raises_error_of_node(image_path, executor, monkeypatch):
+    def fail(node, **kwargs):
+        raise ValueError("kermit")
+
+    monkeypatch.setattr(_async_reader, "transform_node", fail)
+    task = ReadTask(image_path, executor=executor)
+
+    with pytest.raises(ValueError, match="kermit"):
+        task.result(timeout=10)
+    assert task.layers() == []
+
+
+def test_read_task_of_non_zarr_path(tmp_path, executor):
+    task = ReadTask(str(tmp_path / "missing.zarr"), executor=executor)
+
+    assert task.result(timeout=10) == []
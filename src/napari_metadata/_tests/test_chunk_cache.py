@@ -0,0 +1,134 @@
+import numcodecs
+import numpy as np
+import pytest
+import zarr
+from ome_zarr.io import parse_url
+from ome_zarr.writer import write_image
+
+from .._chunk_cache import CHUNK_CACHE, ChunkCache, dataset_key
+from .._reader import napari_get_reader
+
+
+@pytest.fixture(autouse=True)
+def clear_chunk_cache():
+    CHUNK_CACHE.clear()
+    yield
+    CHUNK_CACHE.clear()
+
+
+@pytest.fixture
+def image_path(rng, path) -> str:
+    root = zarr.group(parse_url(path, mode="w").store)
+    write_image(
+        rng.integers(0, 255, size=(3, 16, 16), dtype=np.uint8),
+        root,
+        scaler=None,
+        axes="zyx",
+        storage_options={"chunks": (1, 8, 8)},
+    )
+    return path
+
+
+def is_chunk_key(key: str) -> bool:
+    return not key.split("/")[-1].startswith(".")
+
+
+def test_cache_evicts_least_recently_used_bytes():
+    cache = ChunkCache(max_bytes=20)
+    cache.put("a.zarr", "x", bytes(8))
+    cache.put("a.zarr", "y", bytes(8))
+    assert cache.get("a.zarr", "x") is not None
+
+    cache.put("b.zarr", "z", bytes(8))
+
+    assert cache.get("a.zarr", "y") is None
+    assert cache.get("a.zarr", "x") is not None
+    assert cache.get("b.zarr", "z") is not None
+    assert cache.stats().nbytes == 16
+
+
+def test_cache_does_not_keep_values_larger_than_budget():
+    cache = ChunkCache(max_bytes=4)
+
+    cache.put("a.zarr", "x", bytes(8))
+
+    assert cache.get("a.zarr", "x") is None
+    assert cache.stats().size == 0
+
+
+def test_cache_stats_per_dataset():
+    cache = ChunkCache()
+    cache.put("a.zarr", "x", bytes(8))
+    cache.put("b.zarr", "y", bytes(4))
+    cache.get("a.zarr", "x")
+    cache.get("a.zarr", "z")
+
+    a_stats = cache.stats("a.zarr")
+    b_stats = cache.stats("b.zarr")
+
+    assert (a_stats.hits, a_stats.misses, a_stats.size) == (1, 1, 1)
+    assert (a_stats.nbytes, b_stats.nbytes) == (8, 4)
+    assert cache.stats().nbytes == 12
+
+
+def test_cache_clear_one_dataset():
+    cache = ChunkCache()
+    cache.put("a.zarr", "x", bytes(8))
+    cache.put("b.zarr", "y", bytes(4))
+
+    cache.clear("a.zarr")
+
+    assert cache.get("a.zarr", "x") is None
+    assert cache.get("b.zarr", "y") is not None
+    assert cache.stats().nbytes == 4
+
+
+def test_cache_discard_one_entry():
+    cache = ChunkCache()
+    cache.put("a.zarr", "x", bytes(8))
+    cache.put("a.zarr", "y", bytes(4))
+
+    cache.discard("a.zarr", "x")
+    cache.discard("a.zarr", "z")
+
+    assert cache.get("a.zarr", "x") is None
+    assert cache.get("a.zarr", "y") is not None
+    assert cache.stats("a.zarr").size == 1
+    assert cache.stats().nbytes == 4
+
+
+def test_repeated_slice_reads_and_decodes_nothing(
+    image_path, store_keys, monkeypatch
+):
+    data = napari_get_reader(image_path)(image_path)[0][0]
+    expected = np.asarray(data[1, 2:10, 4:12])
+    decoded = []
+    decode = numcodecs.Blosc.decode
+
+    def record_decode(self, buf, out=None):
+        decoded.append(buf)
+        return decode(self, buf, out=out)
+
+    monkeypatch.setattr(numcodecs.Blosc, "decode", record_decode)
+    store_keys.clear()
+
+    actual = np.asarray(data[1, 2:10, 4:12])
+
+    np.testing.assert_array_equal(actual, expected)
+    assert not any(is_chunk_key(k) for k in store_keys)
+    assert decoded == []
+    stats = CHUNK_CACHE.stats(dataset_key(image_path))
+    assert stats.size == 4
+    assert stats.hits >= 4
+
+
+def test_layers_of_one_dataset_share_cache(image_path):
+    data = napari_get_reader(image_path)(image_path)[0][0]
+    other_data = napari_get_reader(image_path)(image_path)[0][0]
+    np.asarray(data[0])
+
+    np.asarray(other_data[0])
+
+    stats = CHUNK_CACHE.stats(dataset_key(image_path))
+    assert stats.size == 4
+    assert stats.hits == 4
@@ -0,0 +1,135 @@
+import threading
+from typing import List, Tuple
+
+import dask.array as da
+import numpy as np
+import pytest
+import zarr
+from napari.layers import Image
+
+from .._chunk_writer import ByteBudget, WriteOptions, write_array
+from .._encoding import EncodingOptions
+from .._writer import write_image
+
+
+class RecordingArray:
+    """Records the regions that are read from an array."""
+
+    def __init__(self, data: np.ndarray) -> None:
+        self._data = data
+        self.shape = data.shape
+        self.dtype = data.dtype
+        self.ndim = data.ndim
+        self.regions: List[Tuple[slice, ...]] = []
+        self._lock = threading.Lock()
+
+    def __getitem__(self, region: Tuple[slice, ...]) -> np.ndarray:
+        with self._lock:
+            self.regions.append(region)
+        return self._data[region]
+
+
+def make_target(shape, chunks, dtype=np.uint16) -> zarr.Array:
+    return zarr.zeros(
+        shape, chunks=chunks, dtype=dtype, store=zarr.MemoryStore()
+    )
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_write_array_reads_one_region_per_chunk(rng, max_workers):
+    data = rng.integers(0, 1000, size=(3, 50, 70), dtype=np.uint16)
+    source = RecordingArray(data)
+    target = make_target(data.shape, (1, 16, 32))
+
+    write_array(source, target, WriteOptions(max_workers=max_workers))
+
+    np.testing.assert_array_equal(target[:], data)
+    assert len(source.regions) == target.nchunks
+    assert all(
+        np.empty(data.shape)[region].size <= 16 * 32
+        for region in source.regions
+    )
+
+
+def test_write_array_bounds_bytes_in_flight(rng):
+    data = da.from_array(
+        rng.integers(0, 1000, size=(64, 64), dtype=np.uint16), chunks=16
+    )
+    target = make_target(data.shape, (16, 16))
+    chunk_bytes = 16 * 16 * 2
+
+    budget = write_array(
+        data,
+        target,
+        WriteOptions(max_workers=8, max_inflight_bytes=3 * chunk_bytes),
+    )
+
+    np.testing.assert_array_equal(target[:], data.compute())
+    assert chunk_bytes <= budget.peak <= 3 * chunk_bytes
+
+
+def test_write_array_writes_chunks_larger_than_budget(rng):
+    data = rng.random((20, 20))
+    target = make_target(data.shape, (10, 10), dtype=data.dtype)
+
+    budget = write_array(
+        data, target, WriteOptions(max_workers=4, max_inflight_bytes=1)
+    )
+
+    np.testing.assert_array_equal(target[:], data)
+    assert budget.peak == 10 * 10 * 8
+
+
+def test_write_array_raises_first_error(rng):
+    class FailingArray(RecordingArray):
+        def __getitem__(self, region):
+            super().__getitem__(region)
+            raise OSError("kermit")
+
+    source = FailingArray(rng.random((100, 100)))
+    target = make_target(source.shape, (10, 10), dtype=source.dtype)
+
+    with pytest.raises(OSError, match="kermit"):
+        write_array(source, target, WriteOptions(max_workers=2))
+
+    assert len(source.regions) < target.nchunks
+
+
+def test_write_array_checks_shape(rng):
+    with pytest.raises(ValueError, match="does not match"):
+        write_array(rng.random((4, 5)), make_target((5, 4), (2, 2)))
+
+
+def test_byte_budget_waits_for_release():
+    budget = ByteBudget(10)
+    budget.acquire(6)
+    acquired = threading.Event()
+
+    def acquire():
+        budget.acquire(6)
+        acquired.set()
+
+    thread = threading.Thread(target=acquire)
+    thread.start()
+    assert not acquired.wait(timeout=0.1)
+    budget.release(6)
+    assert acquired.wait(timeout=10)
+    thread.join()
+    assert budget.peak == 6
+
+
+def test_write_image_streams_lazy_data(rng, path):
+    data = rng.integers(0, 1000, size=(2, 40, 30), dtype=np.uint16)
+    recording = RecordingArray(data)
+    source = da.from_array(recording, chunks=(1, 20, 15))
+    image = Image(np.zeros((2, 40, 30), dtype=np.uint16))
+    _, metadata, _ = image.as_layer_data_tuple()
+
+    write_image(
+        path, source, metadata, encoding=EncodingOptions(chunks=(1, 20, 15))
+    )
+
+    written = zarr.open_array(f"{path}/0", mode="r")
+    assert written.chunks == (1, 20, 15)
+    np.testing.assert_array_equal(written[:], data)
+    assert max(data[r].size for r in recording.regions) == 20 * 15
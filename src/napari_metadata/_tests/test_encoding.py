@@ -0,0 +1,122 @@
+import math
+
+import numpy as np
+import pytest
+import zarr
+from napari.layers import Image
+from numcodecs import Blosc, Zstd
+
+from .._encoding import (
+    ENCODING_KEY,
+    EncodingOptions,
+    choose_chunks,
+    choose_encoding,
+    chunked_dims,
+    sample_regions,
+)
+from .._writer import write_image
+
+AXES = [
+    {"name": "t", "type": "time"},
+    {"name": "c", "type": "channel"},
+    {"name": "z", "type": "space"},
+    {"name": "y", "type": "space"},
+    {"name": "x", "type": "space"},
+]
+
+
+def test_chunked_dims():
+    assert chunked_dims(AXES, "plane") == [3, 4]
+    assert chunked_dims(AXES, "block") == [2, 3, 4]
+    assert chunked_dims(AXES[:3], "plane") == [1, 2]
+
+
+@pytest.mark.parametrize(
+    "shape, dims, expected",
+    [
+        ((3, 4096, 4096), [1, 2], (1, 512, 1024)),
+        ((64, 512, 512), [0, 1, 2], (64, 64, 128)),
+        # Small dims are spanned, so the others are larger.
+        ((3, 100, 8000), [1, 2], (1, 100, 4096)),
+        ((2, 40, 30), [1, 2], (1, 40, 30)),
+    ],
+)
+def test_choose_chunks(shape, dims, expected):
+    chunks = choose_chunks(shape, 2, dims, 1024 * 1024)
+
+    assert chunks == expected
+    assert math.prod(chunks) * 2 <= 1024 * 1024
+
+
+def test_sample_regions_are_spread_through_grid():
+    regions = sample_regions((4, 10), (1, 4), 3)
+
+    assert regions == [
+        (slice(0, 1), slice(0, 4)),
+        (slice(1, 2), slice(4, 8)),
+        (slice(2, 3), slice(8, 10)),
+    ]
+    assert sample_regions((0, 10), (1, 4), 3) == []
+
+
+def test_choose_encoding_picks_smallest_encoding(rng):
+    # Few significant bits compress better when bits are shuffled.
+    data = rng.integers(0, 16, size=(4, 64, 64), dtype=np.uint16)
+    options = EncodingOptions(
+        candidates=(
+            Blosc(cname="lz4", shuffle=Blosc.NOSHUFFLE),
+            Blosc(cname="zstd", shuffle=Blosc.BITSHUFFLE),
+        ),
+        max_slowdown=math.inf,
+    )
+
+    encoding = choose_encoding(data, AXES[2:], options)
+
+    assert encoding.chunks == (1, 64, 64)
+    assert encoding.compressor == options.candidates[1]
+    assert [t.encoded_nbytes < t.nbytes for t in encoding.trials] == [
+        True,
+        True,
+    ]
+    assert all(t.nbytes == 3 * 64 * 64 * 2 for t in encoding.trials)
+
+
+def test_choose_encoding_with_overrides(rng):
+    data = rng.random((8, 6))
+    options = EncodingOptions(chunks=(4, 3), compressor=Zstd())
+
+    encoding = choose_encoding(data, AXES[-2:], options)
+
+    assert encoding.chunks == (4, 3)
+    assert encoding.compressor == Zstd()
+    assert encoding.trials == ()
+    with pytest.raises(ValueError, match="do not match"):
+        choose_encoding(data, AXES[-2:], EncodingOptions(chunks=(4,)))
+
+
+def test_encoding_options_are_validated():
+    with pytest.raises(ValueError, match="access"):
+        EncodingOptions(access="row")
+    with pytest.raises(ValueError, match="candidates"):
+        EncodingOptions(candidates=())
+
+
+def test_write_image_records_encoding(rng, path):
+    data = rng.integers(0, 1000, size=(3, 40, 30), dtype=np.uint16)
+    _, metadata, _ = Image(data).as_layer_data_tuple()
+    options = EncodingOptions(
+        access="block", chunk_bytes=3 * 16 * 16 * 2, compressor=Zstd()
+    )
+
+    write_image(path, data, metadata, encoding=options)
+
+    root = zarr.open_group(path, mode="r")
+    assert root["0"].chunks == (3, 16, 16)
+    assert root["0"].compressor == Zstd()
+    np.testing.assert_array_equal(root["0"][:], data)
+    assert root.attrs[ENCODING_KEY] == {
+        "access": "block",
+        "chunks": [3, 16, 16],
+        "compressor": Zstd().get_config(),
+        "trials": [],
+    }
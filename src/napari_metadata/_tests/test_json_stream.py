@@ -0,0 +1,112 @@
+import json
+import os
+
+import numpy as np
+import pytest
+import zarr
+from ome_zarr.io import parse_url
+from ome_zarr.writer import write_image
+
+from .. import _json_stream
+from .._json_stream import loads_attributes, loads_selected
+from .._metadata_cache import METADATA_CACHE, parse_cached_url
+from .._reader import read_ome_zarr
+
+ATTRS = {
+    "extra": {"nested": [[1, 2, {"a": "]}"}], {}], "text": 'say "hi" \\'},
+    "multiscales": [{"version": "0.4", "axes": [{"name": "y"}]}],
+    "count": -1.5e3,
+    "omero": {
+        "channels": [{"label": "DAPI", "window": {"start": 0, "end": 9}}],
+        "rdefs": {"model": "color"},
+        "acquisition": ["ignored"] * 10,
+    },
+    "flags": [True, False, None],
+    "plate": {"wells": [{"path": "A/1"}], "rows": [{"name": "A"}]},
+    "unicode": "ümlaut {[",
+}
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_loads_selected_matches_json(indent):
+    data = json.dumps(ATTRS, indent=indent, ensure_ascii=False).encode()
+
+    values = loads_selected(
+        data, {"multiscales": None, "omero": {"channels": None}, "flags": None}
+    )
+
+    assert values == {
+        "multiscales": ATTRS["multiscales"],
+        "omero": {"channels": ATTRS["omero"]["channels"]},
+        "flags": ATTRS["flags"],
+    }
+
+
+def test_loads_selected_skips_every_kind_of_value():
+    data = json.dumps(ATTRS).encode()
+    keys = {key: None for key in ATTRS}
+
+    assert loads_selected(data, keys) == ATTRS
+    assert loads_selected(data, {}) == {}
+    assert loads_selected(b" { } ", {"a": None}) == {}
+
+
+@pytest.mark.parametrize("max_window", [2, 3, 8, 1 << 20])
+def test_loads_selected_skips_across_windows(monkeypatch, max_window):
+    monkeypatch.setattr(_json_stream, "MIN_WINDOW_BYTES", 2)
+    monkeypatch.setattr(_json_stream, "MAX_WINDOW_BYTES", max_window)
+    attrs = {
+        "escapes": ["\\", '\\"', "\\\\]", '"[{', {"\\": ["\\\\"]}],
+        "nested": [[[[[["deep"]]]]], {"a": [{"b": "}"}]}],
+        **ATTRS,
+    }
+    data = json.dumps(attrs).encode()
+
+    assert loads_selected(data, {key: None for key in attrs}) == attrs
+    assert loads_selected(data, {"unicode": None}) == {
+        "unicode": attrs["unicode"]
+    }
+
+
+def test_loads_selected_keeps_value_that_is_not_an_object():
+    data = b'{"omero": [1, 2]}'
+
+    assert loads_selected(data, {"omero": {"channels": None}}) == {
+        "omero": [1, 2]
+    }
+
+
+@pytest.mark.parametrize(
+    "data",
+    [b"[]", b'{"a": [1, 2}', b'{"a" 1}', b'{"a": 1,}', b'{"a": 1} 2', b"{"],
+)
+def test_loads_selected_invalid(data):
+    with pytest.raises(ValueError):
+        loads_selected(data, {"a": None})
+
+
+def test_loads_attributes_parses_small_files_in_full():
+    data = json.dumps(ATTRS).encode()
+
+    assert loads_attributes(data) == ATTRS
+
+
+def test_read_large_attributes(rng, path, monkeypatch):
+    root = zarr.group(parse_url(path, mode="w").store)
+    data = rng.random((2, 8, 10))
+    write_image(data, root, scaler=None, axes="cyx")
+    attrs_path = os.path.join(path, ".zattrs")
+    with open(attrs_path) as f:
+        attrs = json.load(f)
+    attrs["acquisition"] = [{"time": i} for i in range(1000)]
+    with open(attrs_path, "w") as f:
+        json.dump(attrs, f)
+    monkeypatch.setattr(_json_stream, "STREAMING_MIN_BYTES", 1000)
+    METADATA_CACHE.clear()
+
+    layers = read_ome_zarr(path)
+
+    np.testing.assert_array_equal(np.asarray(layers[0][0]), data)
+    root_attrs = parse_cached_url(path).root_attrs
+    assert "acquisition" not in root_attrs
+    assert root_attrs["multiscales"] == attrs["multiscales"]
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+import zarr
+from napari.layers import Image
+from ome_zarr.io import parse_url
+from ome_zarr.writer import write_labels
+
+from .._label_table import LabelTable, read_column
+from .._reader import napari_get_reader
+from .._writer import write_image
+
+
+@pytest.fixture
+def labels_path(rng, path) -> str:
+    image = Image(rng.random((5, 6)))
+    data, metadata, _ = image.as_layer_data_tuple()
+    write_image(path, data, metadata)
+    root = zarr.group(store=parse_url(path, mode="w").store)
+    labels = np.zeros((5, 6), dtype=np.uint8)
+    labels[:2, :2] = 3
+    labels[3:, 3:] = 7
+    write_labels(labels, root, name="cells", scaler=None)
+
+    tables = root.create_group("tables")
+    tables.attrs["tables"] = ["cells_table"]
+    table = tables.create_group("cells_table")
+    table.attrs.update(
+        {
+            "type": "ngff:region_table",
+            "region": {"path": "../labels/cells"},
+            "instance_key": "label",
+        }
+    )
+    obs = table.create_group("obs")
+    obs.attrs["column-order"] = ["label", "area", "kind"]
+    obs.array("label", np.array([3, 7]))
+    obs.array("area", np.array([4.0, 4.0]))
+    kind = obs.create_group("kind")
+    kind.attrs["encoding-type"] = "categorical"
+    kind.array("codes", np.array([1, -1], dtype=np.int8))
+    kind.array("categories", np.array(["round", "square"]), dtype=str)
+    return path
+
+
+def test_label_table_reads_columns_lazily(labels_path, store_keys):
+    root = zarr.open_group(parse_url(labels_path).store, mode="r")
+    table = LabelTable(root["tables/cells_table"], instance_key="label")
+    store_keys.clear()
+
+    area = table["area"]
+
+    np.testing.assert_array_equal(area, [4.0, 4.0])
+    assert any("/obs/area/" in key for key in store_keys)
+    assert not any("/obs/kind/" in key for key in store_keys)
+    assert not any("/obs/label/" in key for key in store_keys)
+
+
+def test_label_table_to_properties(labels_path):
+    root = zarr.open_group(parse_url(labels_path).store, mode="r")
+    table = LabelTable(root["tables/cells_table"], instance_key="label")
+
+    properties = table.to_properties()
+
+    assert tuple(properties) == ("area", "kind", "index")
+    np.testing.assert_array_equal(properties["index"], [3, 7])
+    assert properties["kind"].tolist() == ["square", None]
+
+
+def test_read_nullable_columns_with_missing_values(tmp_path):
+    group = zarr.open_group(str(tmp_path / "column.zarr"), mode="w")
+    count = group.create_group("count")
+    count.attrs["encoding-type"] = "nullable-integer"
+    count.array("values", np.array([3, 0, 5]))
+    count.array("mask", np.array([False, True, False]))
+
+    np.testing.assert_array_equal(read_column(count), [3, np.nan, 5])
+
+
+def test_read_labels_with_table(labels_path):
+    reader = napari_get_reader(labels_path)
+    layers = reader(labels_path)
+
+    labels_layers = [m for _, m, t in layers if t == "labels"]
+    assert len(labels_layers) == 1
+    assert labels_layers[0]["name"] == "cells"
+    properties = labels_layers[0]["properties"]
+    np.testing.assert_array_equal(properties["index"], [3, 7])
+    np.testing.assert_array_equal(properties["area"], [4.0, 4.0])
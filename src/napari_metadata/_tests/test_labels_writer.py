@@ -0,0 +1,214 @@
+import json
+import os
+from typing import Dict
+
+import numpy as np
+import pytest
+import zarr
+from napari.layers import Image, Labels
+
+from .. import _reader
+from .._chunk_cache import CHUNK_CACHE, dataset_key
+from .._labels_writer import write_labels
+from .._metadata_cache import METADATA_CACHE
+from .._painted_array import PaintedArray
+from .._pyramid import PyramidOptions
+from .._reader import read_ome_zarr
+from .._writer import write_image
+
+PYRAMID = PyramidOptions(tile_size=10, method="nearest")
+
+
+@pytest.fixture(autouse=True)
+def paint_multiscale_labels(monkeypatch):
+    monkeypatch.setattr(_reader, "PAINT_MULTISCALE_LABELS", True)
+
+
+def write_dataset(path: str, labels: np.ndarray) -> str:
+    """Writes an image with labels named cells and returns their path."""
+    image = Image(np.zeros(labels.shape, dtype=np.uint8))
+    write_image(path, image.data, image.as_layer_data_tuple()[1])
+    zarr.open_group(path).create_group("labels").attrs["labels"] = ["cells"]
+    cells_path = os.path.join(path, "labels", "cells")
+    layer = Labels(labels, name="cells")
+    write_labels(
+        cells_path, labels, layer.as_layer_data_tuple()[1], pyramid=PYRAMID
+    )
+    return cells_path
+
+
+def read_labels(path: str, **kwargs) -> Labels:
+    """Reads the labels of a dataset into a layer that can be painted."""
+    data, metadata, layer_type = read_ome_zarr(path)[1]
+    assert layer_type == "labels"
+    assert isinstance(data, PaintedArray)
+    # napari does not paint invisible labels.
+    return Labels(data, **dict(metadata, visible=True, **kwargs))
+
+
+def chunk_mtimes(path: str) -> Dict[str, int]:
+    """Sets the modification times of the chunks at path to a time long
+    ago and returns them.
+    """
+    mtimes = {}
+    for directory, _, files in os.walk(path):
+        for name in files:
+            if not name.startswith("."):
+                file_path = os.path.join(directory, name)
+                os.utime(file_path, ns=(0, 0))
+                mtimes[os.path.relpath(file_path, path)] = 0
+    return mtimes
+
+
+def changed_chunks(path: str, mtimes: Dict[str, int]) -> set:
+    return {
+        name
+        for name in mtimes
+        if os.stat(os.path.join(path, name)).st_mtime_ns != mtimes[name]
+    }
+
+
+@pytest.fixture
+def labels(rng) -> np.ndarray:
+    return rng.integers(0, 4, size=(40, 30), dtype=np.int32)
+
+
+def test_write_labels_in_full(path, labels):
+    cells_path = write_dataset(path, labels)
+
+    group = zarr.open_group(cells_path, mode="r")
+    assert group.attrs["image-label"]["version"] == "0.4"
+    multiscale = group.attrs["multiscales"][0]
+    np.testing.assert_array_equal(group["0"][:], labels)
+    np.testing.assert_array_equal(group["1"][:], labels[::2, ::2])
+    np.testing.assert_array_equal(group["2"][:], labels[::4, ::4])
+    # Nearest pixels do not move.
+    transforms = [
+        d["coordinateTransformations"] for d in multiscale["datasets"]
+    ]
+    assert [t[1]["translation"] for t in transforms] == [[0, 0]] * 3
+    assert [t[0]["scale"] for t in transforms] == [[1, 1], [2, 2], [4, 4]]
+
+
+def test_write_labels_only_rewrites_painted_chunks(path, labels):
+    cells_path = write_dataset(path, labels)
+    # Make small chunks, so that painting only touches some of them.
+    group = zarr.open_group(cells_path, mode="r+")
+    for level in ("0", "1", "2"):
+        data = group[level][:]
+        del group[level]
+        group.create_dataset(
+            level, data=data, chunks=(4, 4), dimension_separator="/"
+        )
+    METADATA_CACHE.clear()
+    CHUNK_CACHE.clear(dataset_key(path))
+    layer = read_labels(path)
+    assert layer.data.chunks == (4, 4)
+    mtimes = chunk_mtimes(cells_path)
+
+    layer.paint((13, 21), 7)
+    layer.paint((30, 2), 9)
+    _, attributes, _ = layer.as_layer_data_tuple()
+    write_labels(path, layer.data, attributes)
+
+    painted = np.asarray(layer.data)
+    np.testing.assert_array_equal(group["0"][:], painted)
+    np.testing.assert_array_equal(group["1"][:], painted[::2, ::2])
+    np.testing.assert_array_equal(group["2"][:], painted[::4, ::4])
+    changed = changed_chunks(cells_path, mtimes)
+    assert changed
+    assert len(changed) < len(mtimes)
+    assert len(layer.data.painted) == 0
+
+
+def test_write_labels_updates_image_label_colors(path, labels):
+    write_dataset(path, labels)
+    layer = read_labels(path, color={7: "red"})
+
+    layer.paint((5, 5), 7)
+    write_labels(path, layer.data, layer.as_layer_data_tuple()[1])
+
+    image_label = zarr.open_group(f"{path}/labels/cells").attrs["image-label"]
+    # The transparent background was recorded when the labels were written.
+    assert image_label["colors"] == [
+        {"label-value": 0, "rgba": [0, 0, 0, 0]},
+        {"label-value": 7, "rgba": [255, 0, 0, 255]},
+    ]
+
+
+def test_write_labels_updates_consolidated_colors(path, labels):
+    write_dataset(path, labels)
+    zarr.consolidate_metadata(path)
+    layer = read_labels(path, color={7: "red"})
+
+    layer.paint((5, 5), 7)
+    write_labels(path, layer.data, layer.as_layer_data_tuple()[1])
+
+    with open(os.path.join(path, ".zmetadata")) as f:
+        consolidated = json.load(f)["metadata"]
+    image_label = consolidated["labels/cells/.zattrs"]["image-label"]
+    assert {"label-value": 7, "rgba": [255, 0, 0, 255]} in (
+        image_label["colors"]
+    )
+    _, metadata, _ = read_ome_zarr(path)[1]
+    np.testing.assert_array_equal(metadata["color"][7], [1, 0, 0, 1])
+
+
+def test_read_paint_write_and_reread_labels(path, labels):
+    write_dataset(path, labels)
+    layer = read_labels(path)
+    assert CHUNK_CACHE.stats(dataset_key(path)).size > 0
+
+    layer.paint((5, 5), 7)
+    write_labels(path, layer.data, layer.as_layer_data_tuple()[1])
+
+    assert CHUNK_CACHE.stats(dataset_key(path)).size == 0
+    painted = np.asarray(layer.data)
+    assert painted[5, 5] == 7
+    data, _, _ = read_ome_zarr(path)[1]
+    np.testing.assert_array_equal(data, painted)
+
+
+def test_write_labels_after_undo(path, labels):
+    write_dataset(path, labels)
+    layer = read_labels(path)
+    attributes = layer.as_layer_data_tuple()[1]
+    layer.paint((5, 5), 7)
+    write_labels(path, layer.data, attributes)
+
+    layer.undo()
+    write_labels(path, layer.data, attributes)
+
+    group = zarr.open_group(f"{path}/labels/cells", mode="r")
+    np.testing.assert_array_equal(group["0"][:], labels)
+    np.testing.assert_array_equal(group["1"][:], labels[::2, ::2])
+    np.testing.assert_array_equal(read_ome_zarr(path)[1][0], labels)
+
+
+def test_write_labels_checks_levels_before_writing(path, labels):
+    cells_path = write_dataset(path, labels)
+    layer = read_labels(path)
+    group = zarr.open_group(cells_path, mode="r+")
+    del group["2"]
+    group.create_dataset("2", data=labels[::3, ::3])
+
+    layer.paint((5, 5), 7)
+    with pytest.raises(ValueError, match="not downsampled"):
+        write_labels(path, layer.data, layer.as_layer_data_tuple()[1])
+
+    np.testing.assert_array_equal(group["0"][:], labels)
+
+
+def test_write_labels_elsewhere_in_full(path, labels, tmp_path):
+    write_dataset(path, labels)
+    layer = read_labels(path)
+    layer.paint((5, 5), 7)
+    other = str(tmp_path / "other.zarr")
+
+    write_labels(other, layer.data, layer.as_layer_data_tuple()[1])
+
+    np.testing.assert_array_equal(zarr.open_array(f"{other}/0"), layer.data)
+    np.testing.assert_array_equal(
+        zarr.open_array(f"{path}/labels/cells/0"), labels
+    )
+    assert len(layer.data.painted) == 1
@@ -0,0 +1,201 @@
+import dask.array as da
+import numpy as np
+import pytest
+import zarr
+
+from .._lazy_array import (
+    CroppedArray,
+    IndexedArray,
+    LazyZarrArray,
+    SqueezedArray,
+    expand_key,
+    single_index_axis,
+)
+
+
+@pytest.fixture(params=["numpy", "dask", "zarr", "lazy_zarr"])
+def array(request, rng):
+    data = rng.integers(0, 10, size=(3, 1, 4, 5))
+    if request.param == "dask":
+        return da.from_array(data, chunks=(1, 1, 2, 2))
+    if request.param == "zarr":
+        return zarr.array(data, chunks=(1, 1, 2, 2))
+    if request.param == "lazy_zarr":
+        return LazyZarrArray(zarr.array(data, chunks=(1, 1, 2, 2)))
+    return data
+
+
+def test_squeezed_array_attributes(array):
+    squeezed = SqueezedArray(array, 1)
+
+    assert squeezed.shape == (3, 4, 5)
+    assert squeezed.ndim == 3
+    assert squeezed.dtype == array.dtype
+    assert len(squeezed) == 3
+
+
+@pytest.mark.parametrize(
+    "key",
+    [
+        0,
+        (slice(None), 2),
+        (1, slice(1, 3), slice(None, None, 2)),
+        (Ellipsis, 4),
+        (2, Ellipsis),
+        Ellipsis,
+    ],
+)
+def test_squeezed_array_getitem(array, key):
+    squeezed = SqueezedArray(array, 1)
+    expected = np.squeeze(np.asarray(array), axis=1)[key]
+
+    np.testing.assert_array_equal(np.asarray(squeezed[key]), expected)
+
+
+def test_squeezed_array_with_negative_axis(array):
+    squeezed = SqueezedArray(array, -3)
+
+    np.testing.assert_array_equal(
+        np.asarray(squeezed), np.squeeze(np.asarray(array), axis=1)
+    )
+
+
+def test_squeezed_array_with_non_unit_axis(array):
+    with pytest.raises(ValueError):
+        SqueezedArray(array, 0)
+
+
+@pytest.mark.parametrize("axis", [0, 2, -1])
+def test_indexed_array_getitem(array, axis):
+    indexed = IndexedArray(array, axis, 1)
+    expected = np.take(np.asarray(array), 1, axis=axis)
+
+    assert indexed.shape == expected.shape
+    np.testing.assert_array_equal(np.asarray(indexed), expected)
+    np.testing.assert_array_equal(np.asarray(indexed[1:, 0]), expected[1:, 0])
+
+
+def test_indexed_array_with_index_out_of_bounds(array):
+    with pytest.raises(IndexError):
+        IndexedArray(array, 0, 3)
+
+
+def test_single_index_axis():
+    full = slice(None)
+    assert single_index_axis((full, 2, full)) == 1
+    assert single_index_axis((full, full)) is None
+    assert single_index_axis((1, 2, full)) is None
+    assert single_index_axis((1, slice(0, 2), full)) is None
+    assert single_index_axis((1, np.array([0, 1]))) is None
+
+
+def test_expand_key():
+    assert expand_key(1, 3) == (1, slice(None), slice(None))
+    assert expand_key((Ellipsis, 2), 3) == (slice(None), slice(None), 2)
+    with pytest.raises(IndexError):
+        expand_key((1, 2, 3, 4), 3)
+    with pytest.raises(IndexError):
+        expand_key((None, 1), 3)
+
+
+@pytest.mark.parametrize(
+    "key",
+    [
+        1,
+        (slice(None), 0, 2),
+        (2, 0, slice(1, 4), slice(None, None, 2)),
+        (Ellipsis, np.array([0, 3])),
+        Ellipsis,
+    ],
+)
+def test_lazy_zarr_array_getitem(rng, key):
+    data = rng.integers(0, 10, size=(3, 1, 4, 5))
+    array = LazyZarrArray(zarr.array(data, chunks=(1, 1, 2, 2)))
+
+    np.testing.assert_array_equal(array[key], data[key])
+
+
+def test_lazy_zarr_array_attributes(rng):
+    data = zarr.array(rng.random((3, 4, 5)), chunks=(1, 2, 2))
+
+    array = LazyZarrArray(data)
+
+    assert array.shape == (3, 4, 5)
+    assert array.ndim == 3
+    assert array.dtype == np.float64
+    assert array.chunks == ((1, 1, 1), (2, 2), (2, 2, 1))
+    assert len(array) == 3
+
+
+def test_lazy_zarr_array_split_channel_is_lazy(rng):
+    data = rng.integers(0, 10, size=(3, 4, 5))
+    array = LazyZarrArray(zarr.array(data, chunks=(1, 2, 2)))
+
+    channel = array[:, 1]
+
+    assert isinstance(channel, IndexedArray)
+    np.testing.assert_array_equal(np.asarray(channel), data[:, 1])
+
+
+CROP = (slice(1, 3), slice(None), slice(1, 4), slice(2, 5))
+
+
+@pytest.mark.parametrize(
+    "key",
+    [
+        1,
+        -1,
+        (slice(None), 0, 2),
+        (0, 0, slice(1, 3), slice(1, None, 2)),
+        (Ellipsis, np.array([0, -1])),
+        (Ellipsis, np.array([True, False, True])),
+        Ellipsis,
+    ],
+)
+def test_cropped_array_getitem(array, key):
+    cropped = CroppedArray(array, CROP)
+    expected = np.asarray(array)[CROP][key]
+
+    assert cropped.shape == (2, 1, 3, 3)
+    np.testing.assert_array_equal(np.asarray(cropped[key]), expected)
+
+
+def test_cropped_array_clips_box_to_array(array):
+    cropped = CroppedArray(array, (slice(2, 9),) + CROP[1:])
+
+    assert cropped.starts == (2, 0, 1, 2)
+    assert cropped.shape == (1, 1, 3, 3)
+    np.testing.assert_array_equal(
+        np.asarray(cropped), np.asarray(array)[2:, :, 1:4, 2:5]
+    )
+
+
+def test_cropped_array_with_negative_step(rng):
+    data = rng.integers(0, 10, size=(6, 5))
+    cropped = CroppedArray(data, (slice(1, 4), slice(2, 5)))
+
+    np.testing.assert_array_equal(cropped[::-1, 2::-2], data[3:0:-1, 4:1:-2])
+
+
+def test_cropped_array_with_index_out_of_bounds(array):
+    cropped = CroppedArray(array, CROP)
+
+    with pytest.raises(IndexError):
+        cropped.read((2, 0))
+
+
+def test_cropped_array_rejects_invalid_box(array):
+    with pytest.raises(ValueError):
+        CroppedArray(array, CROP[1:])
+    with pytest.raises(ValueError):
+        CroppedArray(array, (slice(None, None, 2),) + CROP[1:])
+
+
+def test_cropped_array_split_channel_is_lazy(rng):
+    data = rng.integers(0, 10, size=(3, 4, 5))
+    cropped = CroppedArray(data, (slice(None), slice(1, 3), slice(0, 4)))
+
+    channel = cropped[:, 1]
+
+    assert isinstance(channel, IndexedArray)
+    np.testing.assert_array_equal(np.asarray(channel), data[:, 2, :4])
@@ -0,0 +1,166 @@
+import json
+import os
+from types import SimpleNamespace
+from typing import List
+
+import numpy as np
+import ome_zarr.io
+import pytest
+import zarr
+from napari.layers import Image
+from ome_zarr.writer import write_labels
+
+from .. import _reader
+from .._metadata_cache import METADATA_CACHE, MetadataCache
+from .._model import EXTRA_METADATA_KEY, ExtraMetadata, SpaceAxis, SpaceUnits
+from .._reader import napari_get_reader
+from .._writer import write_image
+
+
+@pytest.fixture
+def image_path(rng, path) -> str:
+    image = Image(rng.random((5, 6)), name="kermit", scale=(2, 3))
+    data, metadata, _ = image.as_layer_data_tuple()
+    metadata["metadata"][EXTRA_METADATA_KEY] = ExtraMetadata(
+        axes=[
+            SpaceAxis(name="y", unit=SpaceUnits.MILLIMETER),
+            SpaceAxis(name="x", unit=SpaceUnits.MILLIMETER),
+        ],
+    )
+    write_image(path, data, metadata)
+    return path
+
+
+@pytest.fixture(autouse=True)
+def clear_metadata_cache():
+    METADATA_CACHE.clear()
+    yield
+    METADATA_CACHE.clear()
+
+
+def read_extras(path: str) -> ExtraMetadata:
+    layers = napari_get_reader(path)(path)
+    return layers[0][1]["metadata"][EXTRA_METADATA_KEY]
+
+
+def test_cache_evicts_least_recently_used():
+    cache = MetadataCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.size) == (3, 1, 2)
+
+
+def test_cache_shrinks_when_max_size_is_reduced():
+    cache = MetadataCache(max_size=3)
+    for key in "abc":
+        cache.put(key, key)
+
+    cache.max_size = 1
+
+    assert cache.stats().size == 1
+    assert cache.get("c") == "c"
+
+
+def test_warm_reopen_skips_parsing(image_path, monkeypatch):
+    cold_extras = read_extras(image_path)
+    cold_stats = METADATA_CACHE.stats()
+
+    loads_calls = []
+
+    def loads(*args, **kwargs):
+        loads_calls.append(args)
+        return json.loads(*args, **kwargs)
+
+    def get_axes(*args, **kwargs):
+        raise AssertionError("axes should come from the cache")
+
+    monkeypatch.setattr(ome_zarr.io, "json", SimpleNamespace(loads=loads))
+    monkeypatch.setattr(_reader, "get_axes", get_axes)
+
+    warm_extras = read_extras(image_path)
+
+    assert loads_calls == []
+    assert warm_extras == cold_extras
+    assert warm_extras.axes is not cold_extras.axes
+    assert METADATA_CACHE.stats().hits > cold_stats.hits
+
+
+def test_reopen_after_attributes_change(image_path):
+    assert read_extras(image_path).get_axis_names() == ("y", "x")
+
+    attrs_path = os.path.join(image_path, ".zattrs")
+    with open(attrs_path) as f:
+        attrs = json.load(f)
+    attrs["multiscales"][0]["axes"][0]["name"] = "row"
+    with open(attrs_path, "w") as f:
+        json.dump(attrs, f)
+
+    assert read_extras(image_path).get_axis_names() == ("row", "x")
+
+
+def write_kermit(path: str, *, consolidate: bool) -> None:
+    image = Image(np.arange(30.0).reshape(5, 6), name="kermit")
+    data, metadata, _ = image.as_layer_data_tuple()
+    write_image(path, data, metadata, consolidate=consolidate)
+
+
+def read_metadata_keys(path: str, store_keys: List[str]) -> List[str]:
+    METADATA_CACHE.clear()
+    store_keys.clear()
+    layers = _reader.read_ome_zarr(path)
+    assert layers[0][1]["name"] == "kermit"
+    return [key for key in store_keys if key.split("/")[-1].startswith(".")]
+
+
+def test_consolidated_metadata_is_read_once(tmp_path, store_keys):
+    path = str(tmp_path / "plain.zarr")
+    consolidated_path = str(tmp_path / "consolidated.zarr")
+    write_kermit(path, consolidate=False)
+    write_kermit(consolidated_path, consolidate=True)
+
+    plain_keys = read_metadata_keys(path, store_keys)
+    consolidated_keys = read_metadata_keys(consolidated_path, store_keys)
+
+    assert plain_keys.count(".zattrs") > 0
+    assert plain_keys.count("0/.zarray") + plain_keys.count(".zarray") > 1
+    # The only other reads check for labels that were added later.
+    assert consolidated_keys == [".zmetadata", ".zarray", ".zgroup"]
+    assert len(consolidated_keys) < len(plain_keys)
+
+
+def test_consolidated_metadata_reads_same_data(tmp_path):
+    path = str(tmp_path / "plain.zarr")
+    consolidated_path = str(tmp_path / "consolidated.zarr")
+    write_kermit(path, consolidate=False)
+    write_kermit(consolidated_path, consolidate=True)
+
+    data, metadata, _ = napari_get_reader(path)(path)[0]
+    consolidated_data, consolidated_metadata, _ = napari_get_reader(
+        consolidated_path
+    )(consolidated_path)[0]
+
+    np.testing.assert_array_equal(consolidated_data, data)
+    assert consolidated_metadata["scale"] == metadata["scale"]
+    assert (
+        consolidated_metadata["metadata"][EXTRA_METADATA_KEY]
+        == metadata["metadata"][EXTRA_METADATA_KEY]
+    )
+
+
+def test_consolidated_metadata_reads_groups_added_later(path):
+    write_kermit(path, consolidate=True)
+    root = zarr.group(ome_zarr.io.parse_url(path, mode="w").store)
+    labels = np.ones((5, 6), dtype=np.uint8)
+    write_labels(labels, root, name="cells", scaler=None, axes="yx")
+
+    layers = napari_get_reader(path)(path)
+
+    assert [layer_type for _, _, layer_type in layers] == ["image", "labels"]
@@ -0,0 +1,230 @@
+import json
+import os
+
+import fsspec
+import numpy as np
+import pytest
+import zarr
+from napari.components import ViewerModel
+from napari.layers import Image, Labels
+from napari.layers._source import layer_source
+from ome_zarr.format import FormatV03
+from ome_zarr.writer import write_image as write_ome_image
+
+from .._metadata_writer import (
+    can_save_metadata,
+    metadata_changes,
+    save_metadata,
+)
+from .._model import SpaceUnits, TimeAxis, TimeUnits, extra_metadata
+from .._pyramid import PyramidOptions
+from .._reader import read_ome_zarr
+from .._writer import write_image
+from .test_zarr_v3 import OMERO, TYX_AXES, write_v3_image
+
+
+def read_layer(path: str, channel: int = 0) -> Image:
+    data, metadata, _ = read_ome_zarr(path)[0]
+    with layer_source(path=path, reader_plugin="napari-metadata"):
+        layers = ViewerModel().add_image(data, **metadata)
+    return layers[channel] if isinstance(layers, list) else layers
+
+
+def read_attrs(path: str) -> dict:
+    with open(os.path.join(path, ".zattrs")) as file:
+        return json.load(file)
+
+
+@pytest.fixture
+def image_path(path) -> str:
+    image = Image(
+        np.zeros((3, 8, 6), dtype=np.uint8),
+        name="kermit",
+        scale=(2, 0.5, 0.5),
+        translate=(0, 1, 1),
+    )
+    _, metadata, _ = image.as_layer_data_tuple()
+    write_image(path, image.data, metadata, pyramid=PyramidOptions(4))
+    return path
+
+
+def test_metadata_changes_only_has_changed_fields(image_path):
+    layer = read_layer(image_path)
+    assert metadata_changes(layer).is_empty()
+
+    layer.scale = (2, 0.25, 0.5)
+
+    changes = metadata_changes(layer)
+    assert changes.scale == (2, 0.25, 0.5)
+    assert changes.axes is None
+    assert changes.name is None
+    assert changes.translate is None
+
+
+def test_save_metadata_changes_every_level(image_path):
+    layer = read_layer(image_path)
+    extras = extra_metadata(layer)
+    extras.set_axis_names(("t", "y", "x"))
+    extras.axes[0] = TimeAxis(name="t", unit=TimeUnits.SECOND)
+    extras.set_space_unit(SpaceUnits.MICROMETER)
+    layer.name = "piggy"
+    layer.scale = (3, 0.25, 0.25)
+    layer.translate = (1, 1, 2)
+
+    assert save_metadata(layer)
+
+    multiscale = read_attrs(image_path)["multiscales"][0]
+    assert multiscale["name"] == "piggy"
+    assert multiscale["axes"] == [
+        {"name": "t", "type": "time", "unit": "second"},
+        {"name": "y", "type": "space", "unit": "micrometer"},
+        {"name": "x", "type": "space", "unit": "micrometer"},
+    ]
+    transforms = [
+        d["coordinateTransformations"] for d in multiscale["datasets"]
+    ]
+    assert transforms[0] == [
+        {"type": "scale", "scale": [3, 0.25, 0.25]},
+        {"type": "translation", "translation": [1, 1, 2]},
+    ]
+    assert transforms[1] == [
+        {"type": "scale", "scale": [3, 0.5, 0.5]},
+        {"type": "translation", "translation": [1, 1.25, 2.25]},
+    ]
+    reread = read_layer(image_path)
+    assert reread.name == "piggy"
+    assert tuple(reread.scale) == (3, 0.25, 0.25)
+    assert tuple(reread.translate) == (1, 1, 2)
+    assert tuple(extra_metadata(reread).axes) == tuple(extras.axes)
+    # The saved metadata is now what the layer was read with.
+    assert metadata_changes(layer).is_empty()
+    assert extras.original == extra_metadata(reread).original
+
+
+def test_save_metadata_does_not_open_arrays(image_path, store_keys):
+    layer = read_layer(image_path)
+    layer.translate = (0, 2, 2)
+    store_keys.clear()
+
+    save_metadata(layer)
+
+    assert store_keys
+    names = {key.split("/")[-1] for key in store_keys}
+    assert names <= {".zattrs", ".zmetadata"}
+    assert not any(
+        name.startswith(".zattrs.") for name in os.listdir(image_path)
+    )
+
+
+def test_save_metadata_only_rewrites_changes(image_path):
+    attrs = read_attrs(image_path)
+    attrs["kermit"] = {"frog": True}
+    with open(os.path.join(image_path, ".zattrs"), "w") as file:
+        json.dump(attrs, file)
+    layer = read_layer(image_path)
+
+    assert not save_metadata(layer)
+
+    layer.name = "piggy"
+    assert save_metadata(layer)
+    saved = read_attrs(image_path)
+    assert saved["kermit"] == {"frog": True}
+    assert (
+        saved["multiscales"][0]["datasets"]
+        == attrs["multiscales"][0]["datasets"]
+    )
+
+
+def test_save_metadata_updates_consolidated_metadata(image_path):
+    zarr.consolidate_metadata(image_path)
+    layer = read_layer(image_path)
+    layer.scale = (1, 1, 1)
+
+    save_metadata(layer)
+
+    with open(os.path.join(image_path, ".zmetadata")) as file:
+        consolidated = json.load(file)
+    assert consolidated["metadata"][".zattrs"] == read_attrs(image_path)
+    assert tuple(read_layer(image_path).scale) == (1, 1, 1)
+
+
+def test_save_metadata_of_channel_keeps_channel_axis(path, rng):
+    data = rng.integers(0, 255, size=(2, 4, 5), dtype=np.uint8)
+    root = zarr.group(zarr.storage.FSStore(path))
+    write_ome_image(data, root, scaler=None, axes="cyx")
+    layer = read_layer(path, channel=1)
+    extra_metadata(layer).set_axis_names(("v", "u"))
+    layer.translate = (3, 4)
+
+    save_metadata(layer)
+
+    multiscale = read_attrs(path)["multiscales"][0]
+    assert [a["name"] for a in multiscale["axes"]] == ["c", "v", "u"]
+    assert multiscale["axes"][0] == {"name": "c", "type": "channel"}
+    translation = multiscale["datasets"][0]["coordinateTransformations"][1]
+    assert translation == {"type": "translation", "translation": [0, 3, 4]}
+
+
+def test_cannot_save_metadata_of_other_layers(image_path):
+    layer = read_layer(image_path)
+    assert can_save_metadata(layer)
+    assert not can_save_metadata(None)
+    assert not can_save_metadata(Image(np.zeros((4, 3))))
+    with layer_source(path=image_path, reader_plugin="napari-metadata"):
+        labels = Labels(np.zeros((4, 3), dtype=int))
+    assert not can_save_metadata(labels)
+
+    with pytest.raises(ValueError, match="cannot save"):
+        save_metadata(Image(np.zeros((4, 3))))
+
+
+def test_save_metadata_without_multiscales(image_path, tmp_path):
+    # e.g. the root of a plate or of bioformats2raw series
+    other = str(tmp_path / "other.zarr")
+    zarr.group(zarr.storage.FSStore(other)).attrs["plate"] = {}
+    data, metadata, _ = read_ome_zarr(image_path)[0]
+    with layer_source(path=other, reader_plugin="napari-metadata"):
+        layer = Image(data, **metadata)
+    layer.name = "piggy"
+
+    assert not can_save_metadata(layer)
+    with pytest.raises(ValueError, match="no multiscales"):
+        save_metadata(layer)
+
+
+def test_cannot_save_metadata_of_earlier_versions(path):
+    root = zarr.group(zarr.storage.FSStore(path))
+    write_ome_image(
+        np.zeros((4, 5), dtype=np.uint8), root, scaler=None, fmt=FormatV03()
+    )
+    layer = read_layer(path)
+    layer.name = "piggy"
+
+    assert not can_save_metadata(layer)
+    with pytest.raises(ValueError, match="NGFF 0.3"):
+        save_metadata(layer)
+    assert read_attrs(path)["multiscales"][0]["axes"] == ["y", "x"]
+
+
+def test_cannot_save_metadata_of_v3_images(path, rng):
+    data = rng.integers(0, 255, size=(3, 8, 8), dtype=np.uint8)
+    write_v3_image(
+        path, data, axes=TYX_AXES, chunk_shape=(1, 4, 4), attributes=OMERO
+    )
+    layer = read_layer(path)
+    layer.name = "piggy"
+
+    assert not can_save_metadata(layer)
+    with pytest.raises(ValueError, match="Zarr v3"):
+        save_metadata(layer)
+
+
+def test_cannot_save_metadata_of_remote_images(image_path):
+    url = "memory://image.zarr"
+    fsspec.filesystem("memory").put(image_path, "/image.zarr", recursive=True)
+    layer = read_layer(url)
+    layer.name = "piggy"
+
+    assert not can_save_metadata(layer)
+    with pytest.raises(ValueError, match="not local"):
+        save_metadata(layer)
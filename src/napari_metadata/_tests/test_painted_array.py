@@ -0,0 +1,93 @@
+import dask.array as da
+import numpy as np
+import pytest
+from napari.layers import Labels
+
+from .._painted_array import PaintedArray, PaintedChunks, chunk_shape
+
+
+@pytest.fixture
+def labels(rng) -> np.ndarray:
+    return rng.integers(0, 4, size=(3, 20, 16), dtype=np.int32)
+
+
+def test_painted_chunks_marks_chunks_and_values():
+    painted = PaintedChunks((10, 8))
+
+    painted.add((np.array([0, 9, 25]), np.array([3, 7, 16])), 5)
+    painted.add((np.array([11]), np.array([1])), np.array([2]))
+
+    assert len(painted) == 3
+    assert painted.values == {2, 5}
+    assert painted.regions((30, 20)) == [
+        (slice(0, 10), slice(0, 8)),
+        (slice(10, 20), slice(0, 8)),
+        (slice(20, 30), slice(16, 20)),
+    ]
+    painted.clear()
+    assert len(painted) == 0
+
+
+def test_chunk_shape():
+    assert chunk_shape(da.zeros((3, 20, 16), chunks=(1, 8, 8))) == (1, 8, 8)
+    assert chunk_shape(np.zeros((3, 20, 16))) == (1, 20, 16)
+
+
+def test_painted_array_reads_painted_chunks(labels):
+    source = da.from_array(labels, chunks=(1, 8, 8))
+    array = PaintedArray(source)
+    expected = labels.copy()
+
+    array[np.array([0, 2]), np.array([3, 19]), np.array([1, 15])] = 9
+    expected[[0, 2], [3, 19], [1, 15]] = 9
+    array[1, 2:12, 5] = 7
+    expected[1, 2:12, 5] = 7
+
+    assert array.chunks == (1, 8, 8)
+    assert len(array.painted) == 4
+    assert array.painted.values == {7, 9}
+    np.testing.assert_array_equal(array, expected)
+    np.testing.assert_array_equal(array[1, ::3, ::-2], expected[1, ::3, ::-2])
+    np.testing.assert_array_equal(array[:, 3], expected[:, 3])
+    assert array[2, 19, 15] == 9
+    points = (np.array([0, 1, 1]), np.array([3, 4, 0]), np.array([1, 5, 0]))
+    np.testing.assert_array_equal(array[points], expected[points])
+    # The wrapped array is not changed.
+    np.testing.assert_array_equal(source, labels)
+
+
+def test_painted_array_clear_reads_wrapped_array(labels):
+    array = PaintedArray(labels.copy())
+
+    array[0, 0, 0] = 9
+    array.clear()
+
+    assert len(array.painted) == 0
+    np.testing.assert_array_equal(array, labels)
+
+
+def test_painted_array_rejects_mixed_indices(labels):
+    array = PaintedArray(labels)
+
+    with pytest.raises(IndexError):
+        array[np.array([0]), 1:3]
+    with pytest.raises(IndexError):
+        array[np.array([0]), 1:3] = 2
+
+
+def test_paint_fill_undo_and_redo_labels(labels):
+    array = PaintedArray(da.from_array(labels, chunks=(1, 8, 8)))
+    layer = Labels(array, visible=True)
+
+    layer.paint((1, 10, 10), 5)
+    painted = np.array(array)
+    layer.fill((0, 0, 0), 8)
+    assert array[0, 0, 0] == 8
+    layer.undo()
+    np.testing.assert_array_equal(array, painted)
+    layer.undo()
+    np.testing.assert_array_equal(array, labels)
+    layer.redo()
+
+    np.testing.assert_array_equal(array, painted)
+    assert array.painted.values >= {5, 8}
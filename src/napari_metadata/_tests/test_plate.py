@@ -0,0 +1,130 @@
+from typing import Dict, Tuple
+
+import numpy as np
+import pytest
+import zarr
+from ome_zarr.io import parse_url
+from ome_zarr.writer import (
+    write_image,
+    write_plate_metadata,
+    write_well_metadata,
+)
+
+from .._metadata_cache import METADATA_CACHE, parse_cached_url
+from .._plate import PlateMosaic, discover_plate
+from .._reader import napari_get_reader
+
+# Contrast limits, so that opening a plate does not need to read any data.
+OMERO = {"channels": [{"label": "field", "window": {"start": 0, "end": 9}}]}
+
+
+@pytest.fixture(autouse=True)
+def clear_metadata_cache():
+    METADATA_CACHE.clear()
+    yield
+    METADATA_CACHE.clear()
+
+
+def write_plate(
+    path: str, fields: Dict[Tuple[str, str], int], tile_shape=(4, 6)
+) -> Dict[str, np.ndarray]:
+    """Writes a plate with 2 rows and 3 columns of wells.
+
+    Only the given wells are written, each with the given number of
+    fields. Returns the data of each field by its path.
+    """
+    rows = ["A", "B"]
+    columns = ["1", "2", "3"]
+    root = zarr.group(parse_url(path, mode="w").store)
+    wells = [f"{r}/{c}" for r, c in fields]
+    write_plate_metadata(root, rows, columns, wells, name="test-plate")
+    data = {}
+    value = 1
+    for (row, column), n_fields in fields.items():
+        well = root.require_group(row).require_group(column)
+        write_well_metadata(well, [str(f) for f in range(n_fields)])
+        for f in range(n_fields):
+            field_data = np.full(tile_shape, value, dtype=np.uint16)
+            field = well.require_group(str(f))
+            write_image(
+                field_data,
+                field,
+                scaler=None,
+                axes="yx",
+                storage_options={"chunks": tile_shape},
+            )
+            field.attrs["omero"] = OMERO
+            data[f"{row}/{column}/{f}"] = field_data
+            value += 1
+    return data
+
+
+def is_chunk_key(key: str) -> bool:
+    return not key.split("/")[-1].startswith(".")
+
+
+def test_discover_plate_lays_out_fields_in_wells(path):
+    write_plate(path, {("A", "1"): 3, ("B", "3"): 1})
+
+    layout = discover_plate(parse_cached_url(path))
+
+    assert layout.row_names == ("A", "B")
+    assert layout.column_names == ("1", "2", "3")
+    assert (layout.field_rows, layout.field_columns) == (2, 2)
+    assert layout.field_path(0, 0) == "A/1/0"
+    assert layout.field_path(0, 1) == "A/1/1"
+    assert layout.field_path(1, 0) == "A/1/2"
+    assert layout.field_path(1, 1) is None
+    assert layout.field_path(2, 4) == "B/3/0"
+    assert layout.field_path(0, 2) is None
+
+
+def test_read_plate_reads_no_chunks(path, store_keys):
+    write_plate(path, {("A", "1"): 1, ("A", "2"): 1, ("B", "3"): 1})
+    store_keys.clear()
+
+    layers = napari_get_reader(path)(path)
+
+    assert len(layers) == 1
+    data, metadata, layer_type = layers[0]
+    assert layer_type == "image"
+    assert isinstance(data, PlateMosaic)
+    assert data.shape == (2 * 4, 3 * 6)
+    assert metadata["metadata"]["plate"]["name"] == "test-plate"
+    assert not any(is_chunk_key(k) for k in store_keys)
+
+
+def test_read_plate_mosaic_places_fields_in_wells(path):
+    fields = write_plate(path, {("A", "1"): 1, ("A", "2"): 1, ("B", "3"): 1})
+    data = napari_get_reader(path)(path)[0][0]
+
+    mosaic = np.asarray(data)
+
+    np.testing.assert_array_equal(mosaic[:4, :6], fields["A/1/0"])
+    np.testing.assert_array_equal(mosaic[:4, 6:12], fields["A/2/0"])
+    np.testing.assert_array_equal(mosaic[4:, 12:], fields["B/3/0"])
+    np.testing.assert_array_equal(mosaic[4:, :12], 0)
+    np.testing.assert_array_equal(mosaic[:4, 12:], 0)
+
+
+def test_read_plate_slice_matches_mosaic(path):
+    write_plate(path, {("A", "1"): 2, ("B", "2"): 1})
+    data = napari_get_reader(path)(path)[0][0]
+    mosaic = np.asarray(data)
+
+    np.testing.assert_array_equal(data[1:7:2, 3:20:3], mosaic[1:7:2, 3:20:3])
+    np.testing.assert_array_equal(data[5], mosaic[5])
+    np.testing.assert_array_equal(data[:, -4], mosaic[:, -4])
+    assert data[5, 13] == mosaic[5, 13]
+
+
+def test_read_plate_slice_reads_only_overlapping_fields(path, store_keys):
+    write_plate(path, {("A", "1"): 1, ("A", "2"): 1, ("B", "3"): 1})
+    data = napari_get_reader(path)(path)[0][0]
+    store_keys.clear()
+
+    data[:4, 6:12]
+
+    chunk_keys = [k for k in store_keys if is_chunk_key(k)]
+    assert chunk_keys
+    assert all(k.startswith("A/2/0/") for k in chunk_keys)
@@ -0,0 +1,199 @@
+import threading
+from typing import List
+
+import numpy as np
+import pytest
+import zarr
+from ome_zarr.io import parse_url
+from ome_zarr.writer import write_image
+
+from .. import _reader
+from .._chunk_cache import CHUNK_CACHE, ChunkCache, dataset_key
+from .._lazy_array import IndexedArray
+from .._prefetch import TimePrefetch, TimeSeriesArray
+
+
+class RecordingArray:
+    """Wraps a numpy array and records the timepoints that are read."""
+
+    def __init__(self, data: np.ndarray) -> None:
+        self.data = data
+        self.shape = data.shape
+        self.dtype = data.dtype
+        self.timepoints: List[int] = []
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key):
+        with self._lock:
+            self.timepoints.append(key[0])
+        return self.data[key]
+
+
+@pytest.fixture
+def data(rng) -> np.ndarray:
+    return rng.integers(0, 255, size=(10, 2, 4, 5), dtype=np.uint8)
+
+
+def wait(array: TimeSeriesArray) -> None:
+    """Waits for all timepoints that are being prefetched."""
+    for timepoints in list(array._regions.values()):
+        for future in list(timepoints.values()):
+            future.result()
+
+
+def test_time_prefetch_rejects_invalid_options():
+    with pytest.raises(ValueError):
+        TimePrefetch(radius=-1)
+    with pytest.raises(ValueError):
+        TimePrefetch(radius=3, window=2)
+    with pytest.raises(ValueError):
+        TimePrefetch(max_regions=0)
+
+
+def test_read_prefetches_nearby_timepoints(data):
+    recording = RecordingArray(data)
+    array = TimeSeriesArray(recording, 0, TimePrefetch(radius=2))
+
+    np.testing.assert_array_equal(array[3, 1], data[3, 1])
+    wait(array)
+
+    assert sorted(recording.timepoints) == [1, 2, 3, 4, 5]
+    stats = array.stats()
+    assert (stats.hits, stats.misses, stats.prefetched) == (0, 1, 4)
+
+
+def test_read_of_prefetched_timepoint_is_hit(data):
+    recording = RecordingArray(data)
+    array = TimeSeriesArray(recording, 0, TimePrefetch(radius=1))
+    array[0, 0]
+    wait(array)
+
+    np.testing.assert_array_equal(array[1, 0], data[1, 0])
+    np.testing.assert_array_equal(array[1, 0], data[1, 0])
+
+    stats = array.stats()
+    assert (stats.hits, stats.misses) == (2, 1)
+    assert stats.hit_rate == pytest.approx(2 / 3)
+    assert stats.hit_seconds >= 0
+    assert stats.mean_miss_seconds == stats.miss_seconds
+    assert recording.timepoints.count(1) == 1
+
+
+def test_read_evicts_timepoints_outside_window(data):
+    array = TimeSeriesArray(
+        RecordingArray(data), 0, TimePrefetch(radius=1, window=2)
+    )
+    array[0, 0]
+    wait(array)
+
+    array[5, 0]
+    wait(array)
+
+    assert [sorted(t) for t in array._regions.values()] == [[4, 5, 6]]
+    assert array.stats().evicted == 2
+
+
+def test_read_keeps_timepoints_of_each_region(data):
+    array = TimeSeriesArray(RecordingArray(data), 0, TimePrefetch(radius=1))
+    array[4, 0]
+    array[4, 1]
+    wait(array)
+
+    np.testing.assert_array_equal(array[5, 0], data[5, 0])
+    np.testing.assert_array_equal(array[5, 1], data[5, 1])
+
+    stats = array.stats()
+    assert (stats.hits, stats.misses, stats.evicted) == (2, 2, 0)
+
+
+def test_read_evicts_least_recently_read_region(data):
+    array = TimeSeriesArray(
+        RecordingArray(data), 0, TimePrefetch(radius=1, max_regions=1)
+    )
+    array[4, 0]
+    wait(array)
+
+    np.testing.assert_array_equal(array[5, 1], data[5, 1])
+
+    stats = array.stats()
+    assert (stats.hits, stats.misses, stats.evicted) == (0, 2, 3)
+
+
+def test_prefetched_timepoints_are_within_cache_budget(data):
+    timepoint_bytes = data[0, 0].nbytes
+    cache = ChunkCache(max_bytes=2 * timepoint_bytes)
+    recording = RecordingArray(data)
+    array = TimeSeriesArray(
+        recording, 0, TimePrefetch(radius=2), dataset="a.zarr", cache=cache
+    )
+
+    array[4, 0]
+    wait(array)
+
+    assert cache.stats("a.zarr").nbytes <= 2 * timepoint_bytes
+    assert cache.stats("a.zarr").size == 2
+    # Timepoints that no longer fit are read again.
+    for t in (2, 3, 5, 6):
+        np.testing.assert_array_equal(array[t, 0], data[t, 0])
+    assert array.stats().misses > 1
+
+
+def test_clear_discards_cached_timepoints(data):
+    cache = ChunkCache()
+    array = TimeSeriesArray(
+        RecordingArray(data), 0, TimePrefetch(radius=1), cache=cache
+    )
+    array[4, 0]
+    wait(array)
+    assert cache.stats().size == 3
+
+    array.clear()
+
+    assert cache.stats().size == 0
+
+
+def test_read_of_many_timepoints_does_not_prefetch(data):
+    array = TimeSeriesArray(RecordingArray(data), 0)
+
+    np.testing.assert_array_equal(array[2:4, 0], data[2:4, 0])
+
+    assert array.stats().prefetched == 0
+
+
+def test_split_channel_is_lazy_and_prefetches(data):
+    array = TimeSeriesArray(RecordingArray(data), 0, TimePrefetch(radius=1))
+
+    channel = array[:, 1]
+
+    assert isinstance(channel, IndexedArray)
+    assert array.stats().prefetched == 0
+    np.testing.assert_array_equal(channel[6], data[6, 1])
+    assert array.stats().prefetched == 2
+
+
+def test_read_ome_zarr_prefetches_images_with_time_axis(path, data):
+    root = zarr.group(parse_url(path, mode="w").store)
+    write_image(data, root, scaler=None, axes="tcyx")
+
+    layers = _reader.read_ome_zarr(path, time_prefetch=TimePrefetch(radius=1))
+
+    array = layers[0][0]
+    assert isinstance(array, TimeSeriesArray)
+    assert array.time_axis == 0
+    np.testing.assert_array_equal(array[2, 1], data[2, 1])
+    assert array.stats().prefetched == 2
+    wait(array)
+    # Prefetched timepoints are cleared with the other chunks of the dataset.
+    assert CHUNK_CACHE.stats(dataset_key(path)).size > 0
+    CHUNK_CACHE.clear(dataset_key(path))
+    np.testing.assert_array_equal(array[3, 1], data[3, 1])
+    assert array.stats().misses == 2
+
+
+def test_read_ome_zarr_does_not_prefetch_by_default(path, data):
+    root = zarr.group(parse_url(path, mode="w").store)
+    write_image(data, root, scaler=None, axes="tcyx")
+
+    layers = _reader.read_ome_zarr(path)
+
+    assert not isinstance(layers[0][0], TimeSeriesArray)
@@ -1,20 +1,40 @@
+import json
+import os
+import tracemalloc
+from copy import deepcopy
 from typing import List
 
 import numpy as np
 import pytest
-from napari.layers import Image
+import zarr
+from napari.layers import Image, Labels
 from npe2.types import LayerData
+from ome_zarr.io import parse_url
+from ome_zarr.writer import write_multiscale, write_multiscale_labels
 
+from .. import _metadata_cache, _reader
+from .._lazy_array import LazyZarrArray
 from .._model import (
     EXTRA_METADATA_KEY,
     ChannelAxis,
     ExtraMetadata,
+    OriginalMetadata,
     SpaceAxis,
     SpaceUnits,
     TimeAxis,
     TimeUnits,
 )
-from .._reader import napari_get_reader
+from .._painted_array import PaintedArray
+from .._reader import (
+    ROOT_METADATA_KEYS,
+    LevelSelection,
+    RegionOfInterest,
+    compute_contrast_limits,
+    make_extras,
+    napari_get_reader,
+    read_paths,
+    transform_properties,
+)
 from .._writer import write_image
 
 
@@ -217,3 +237,596 @@ def test_read_multichannel_2d_image_with_extras(rng, path):
     assert read_extras.axes[1] == extras.axes[2]
     # Check the other is the same.
     assert read_extras == read_metadata["metadata"][1][EXTRA_METADATA_KEY]
+
+
+def test_get_reader_only_probes_root_metadata(rng, path, store_keys):
+    image = Image(rng.random((5, 6)))
+    data, metadata, _ = image.as_layer_data_tuple()
+    write_image(path, data, metadata)
+    store_keys.clear()
+
+    reader = napari_get_reader(path)
+
+    assert reader is not None
+    assert set(store_keys) <= set(ROOT_METADATA_KEYS)
+
+    layers = reader(path)
+
+    assert len(layers) == 1
+    assert "0/.zarray" in store_keys
+
+
+def test_get_reader_rejects_non_zarr_path(tmp_path, store_keys):
+    assert napari_get_reader(str(tmp_path / "missing.zarr")) is None
+    assert set(store_keys) <= set(ROOT_METADATA_KEYS)
+
+
+def write_named_images(rng, tmp_path, names) -> List[str]:
+    paths = []
+    for name in names:
+        image = Image(rng.random((5, 6)), name=name)
+        data, metadata, _ = image.as_layer_data_tuple()
+        path = str(tmp_path / f"{name}.zarr")
+        paths.extend(write_image(path, data, metadata))
+    return paths
+
+
+def break_axes(path: str) -> None:
+    attrs_path = os.path.join(path, ".zattrs")
+    with open(attrs_path) as f:
+        attrs = json.load(f)
+    for axis in attrs["multiscales"][0]["axes"]:
+        del axis["type"]
+    with open(attrs_path, "w") as f:
+        json.dump(attrs, f)
+
+
+def test_read_many_paths_in_order(rng, tmp_path):
+    names = [f"image-{i}" for i in range(10)]
+    paths = write_named_images(rng, tmp_path, names)
+
+    read_layers = read_ome_zarr(paths)
+
+    assert [m["name"] for _, m, _ in read_layers] == names
+
+
+def test_read_many_paths_with_one_failure(rng, tmp_path):
+    paths = write_named_images(rng, tmp_path, ["ernie", "bert", "elmo"])
+    break_axes(paths[1])
+
+    with pytest.warns(UserWarning, match="bert"):
+        read_layers = read_ome_zarr(paths)
+
+    assert [m["name"] for _, m, _ in read_layers] == ["ernie", "elmo"]
+
+
+def test_read_paths_reports_timing_and_errors(rng, tmp_path):
+    paths = write_named_images(rng, tmp_path, ["ernie", "bert"])
+    break_axes(paths[0])
+
+    results = read_paths(paths, max_workers=2)
+
+    assert [r.path for r in results] == paths
+    assert isinstance(results[0].error, ValueError)
+    assert results[0].layers == []
+    assert results[1].error is None
+    assert len(results[1].layers) == 1
+    assert all(r.seconds > 0 for r in results)
+
+
+def test_read_many_paths_when_all_fail(rng, tmp_path):
+    paths = write_named_images(rng, tmp_path, ["ernie"])
+    break_axes(paths[0])
+
+    with pytest.raises(ValueError):
+        read_ome_zarr(paths)
+
+
+def test_transform_properties_with_missing_keys():
+    props = {
+        1: {"area": 10, "kind": "round"},
+        2: {"area": 12},
+        5: {"area": 9, "kind": "square"},
+    }
+
+    properties = transform_properties(props)
+
+    assert tuple(properties) == ("area", "kind", "index")
+    np.testing.assert_array_equal(properties["index"], [1, 2, 5])
+    np.testing.assert_array_equal(properties["area"], [10, 12, 9])
+    assert properties["area"].dtype.kind == "i"
+    assert properties["kind"].tolist() == ["round", None, "square"]
+
+
+def test_transform_properties_with_missing_numbers():
+    props = {
+        1: {"count": 2**40, "valid": True},
+        2: {},
+        3: {"count": 7, "valid": False},
+    }
+
+    properties = transform_properties(props)
+
+    np.testing.assert_array_equal(properties["count"], [2**40, np.nan, 7])
+    np.testing.assert_array_equal(properties["valid"], [1, np.nan, 0])
+    assert properties["count"].dtype == np.float64
+    assert properties["valid"].dtype == np.float64
+
+
+def test_transform_properties_with_list_values():
+    props = {1: {"v": [1, 2]}, 2: {"v": [3, 4]}, 3: {}}
+
+    properties = transform_properties(props)
+
+    assert properties["v"].shape == (3,)
+    assert properties["v"].tolist() == [[1, 2], [3, 4], None]
+    complete = transform_properties({1: {"v": [1, 2]}, 2: {"v": [3, 4]}})
+    assert complete["v"].shape == (2,)
+
+
+def test_transform_properties_keeps_mixed_values():
+    properties = transform_properties({1: {"id": 3}, 2: {"id": "a"}})
+
+    assert properties["id"].dtype == object
+    assert properties["id"].tolist() == [3, "a"]
+
+
+def test_read_multichannel_image_shares_axes_until_edited(rng, path):
+    image = Image(rng.random((3, 6, 7)))
+    data, metadata, _ = image.as_layer_data_tuple()
+    metadata["metadata"][EXTRA_METADATA_KEY] = ExtraMetadata(
+        axes=[
+            ChannelAxis(name="c"),
+            SpaceAxis(name="y", unit=SpaceUnits.MILLIMETER),
+            SpaceAxis(name="x", unit=SpaceUnits.MILLIMETER),
+        ],
+    )
+    write_image(path, data, metadata)
+
+    _, read_metadata, _ = read_ome_zarr(path)[0]
+
+    extras = [m[EXTRA_METADATA_KEY] for m in read_metadata["metadata"]]
+    assert len({id(m) for m in read_metadata["metadata"]}) == 3
+    assert extras[0].original.axes is extras[1].original.axes
+    assert all(a is b for a, b in zip(extras[0].axes, extras[2].axes))
+
+    extras[0].set_axis_names(("row", "x"))
+    extras[0].set_space_unit(SpaceUnits.METER)
+
+    assert extras[0].get_axis_names() == ("row", "x")
+    assert extras[0].get_space_unit() == SpaceUnits.METER
+    assert extras[1].get_axis_names() == ("y", "x")
+    assert extras[1].get_space_unit() == SpaceUnits.MILLIMETER
+    assert extras[0].original.axes == extras[1].original.axes
+
+
+def make_extras_by_copying(*, metadata, axes, name) -> ExtraMetadata:
+    """The previous implementation of make_extras, for comparison."""
+    original = OriginalMetadata(
+        axes=deepcopy(axes),
+        name=name,
+        scale=tuple(metadata["scale"]),
+        translate=tuple(metadata["translate"]),
+    )
+    return ExtraMetadata(axes=deepcopy(axes), original=original)
+
+
+def peak_extras_allocation(make, n_channels: int) -> int:
+    axes = (
+        TimeAxis(name="t", unit=TimeUnits.SECOND),
+        SpaceAxis(name="z", unit=SpaceUnits.MICROMETER),
+        SpaceAxis(name="y", unit=SpaceUnits.MICROMETER),
+        SpaceAxis(name="x", unit=SpaceUnits.MICROMETER),
+    )
+    metadata = {"scale": (1, 2, 0.5, 0.5), "translate": (0, 0, 0, 0)}
+    tracemalloc.start()
+    extras = [  # noqa: F841
+        make(metadata=metadata, axes=axes, name="channel")
+        for _ in range(n_channels)
+    ]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def test_make_extras_allocates_less_than_copying():
+    copying_peak = peak_extras_allocation(make_extras_by_copying, 1000)
+    sharing_peak = peak_extras_allocation(make_extras, 1000)
+
+    assert sharing_peak < copying_peak / 4
+
+
+def is_chunk_key(key: str) -> bool:
+    return not key.split("/")[-1].startswith(".")
+
+
+def add_omero_window(path: str, start: float, end: float) -> None:
+    attrs_path = os.path.join(path, ".zattrs")
+    with open(attrs_path) as f:
+        attrs = json.load(f)
+    window = {"start": start, "end": end}
+    attrs["omero"] = {"channels": [{"label": "kermit", "window": window}]}
+    with open(attrs_path, "w") as f:
+        json.dump(attrs, f)
+
+
+def test_read_multiscale_labels_with_channel_reads_no_chunks(
+    rng, path, store_keys
+):
+    image = Image(rng.random((8, 10)))
+    data, metadata, _ = image.as_layer_data_tuple()
+    write_image(path, data, metadata)
+    add_omero_window(path, 0, 1)
+    root = zarr.group(store=parse_url(path, mode="w").store)
+    labels = rng.integers(0, 5, size=(1, 8, 10)).astype(np.uint8)
+    write_multiscale_labels(
+        [labels, labels[:, ::2, ::2]],
+        root,
+        name="cells",
+        axes=[
+            {"name": "c", "type": "channel"},
+            {"name": "y", "type": "space"},
+            {"name": "x", "type": "space"},
+        ],
+    )
+    store_keys.clear()
+
+    layers = read_ome_zarr(path)
+
+    assert not any(is_chunk_key(key) for key in store_keys)
+    read_data = [d for d, _, t in layers if t == "labels"][0]
+    assert len(read_data) == 2
+    assert read_data[0].shape == (8, 10)
+    assert read_data[1].shape == (4, 5)
+    np.testing.assert_array_equal(read_data[1][1:3], labels[0, ::2, ::2][1:3])
+    Labels(read_data)
+
+
+def test_read_single_level_labels_that_can_be_painted(
+    rng, path, store_keys
+):
+    write_image(path, *Image(rng.random((8, 10))).as_layer_data_tuple()[:2])
+    add_omero_window(path, 0, 1)
+    root = zarr.group(store=parse_url(path, mode="w").store)
+    labels = rng.integers(0, 5, size=(8, 10)).astype(np.uint8)
+    write_multiscale_labels([labels], root, name="cells", axes="yx")
+    store_keys.clear()
+
+    layers = read_ome_zarr(path)
+
+    assert not any(is_chunk_key(key) for key in store_keys)
+    read_data = [d for d, _, t in layers if t == "labels"][0]
+    assert isinstance(read_data, PaintedArray)
+    assert os.path.normpath(read_data.url) == os.path.join(
+        path, "labels", "cells"
+    )
+    layer = Labels(read_data, visible=True)
+    layer.paint((1, 2), 7)
+    assert layer.data[1, 2] == 7
+    assert len(read_data.painted) == 1
+    np.testing.assert_array_equal(
+        zarr.open_array(f"{path}/labels/cells/0"), labels
+    )
+
+
+@pytest.mark.parametrize("paint_multiscale", [False, True])
+def test_read_multiscale_labels_to_paint(
+    rng, path, monkeypatch, paint_multiscale
+):
+    write_image(path, *Image(rng.random((8, 10))).as_layer_data_tuple()[:2])
+    root = zarr.group(store=parse_url(path, mode="w").store)
+    labels = rng.integers(0, 5, size=(8, 10)).astype(np.uint8)
+    write_multiscale_labels(
+        [labels, labels[::2, ::2]], root, name="cells", axes="yx"
+    )
+    monkeypatch.setattr(
+        _reader, "PAINT_MULTISCALE_LABELS", paint_multiscale
+    )
+
+    layers = read_ome_zarr(path)
+
+    read_data = [d for d, _, t in layers if t == "labels"][0]
+    if paint_multiscale:
+        assert isinstance(read_data, PaintedArray)
+        assert read_data.url is not None
+        np.testing.assert_array_equal(read_data, labels)
+    else:
+        assert [level.shape for level in read_data] == [(8, 10), (4, 5)]
+
+
+def test_read_labels_of_coarser_level_cannot_be_saved_in_place(rng, path):
+    write_image(path, *Image(rng.random((8, 10))).as_layer_data_tuple()[:2])
+    root = zarr.group(store=parse_url(path, mode="w").store)
+    labels = rng.integers(0, 5, size=(8, 10)).astype(np.uint8)
+    write_multiscale_labels(
+        [labels, labels[::2, ::2]], root, name="cells", axes="yx"
+    )
+
+    layers = _reader.read_ome_zarr(path, levels=LevelSelection(drop_finest=1))
+
+    read_data = [d for d, _, t in layers if t == "labels"][0]
+    assert isinstance(read_data, PaintedArray)
+    assert read_data.url is None
+    np.testing.assert_array_equal(read_data, labels[::2, ::2])
+
+
+def test_read_image_with_many_chunks_is_not_dask(
+    rng, path, store_keys, monkeypatch
+):
+    data = rng.random((6, 8))
+    image = Image(data, name="kermit")
+    write_image(path, *image.as_layer_data_tuple()[:2])
+    add_omero_window(path, 0, 1)
+    monkeypatch.setattr(_metadata_cache, "MAX_DASK_CHUNKS", 0)
+    store_keys.clear()
+
+    layer_data = read_ome_zarr(path)[0][0]
+
+    assert isinstance(layer_data, LazyZarrArray)
+    assert not any(is_chunk_key(k) for k in store_keys)
+    np.testing.assert_array_equal(layer_data[2:5, 1], data[2:5, 1])
+    np.testing.assert_array_equal(Image(layer_data).data[...], data)
+
+
+def write_pyramid(path: str, pyramid: List[np.ndarray], axes: str) -> None:
+    root = zarr.group(store=parse_url(path, mode="w").store)
+    write_multiscale(pyramid, root, axes=axes, name="kermit")
+
+
+def test_read_contrast_limits_from_omero_window(rng, path, store_keys):
+    data = rng.random((8, 10))
+    write_pyramid(path, [data, data[::2, ::2]], "yx")
+    add_omero_window(path, 0.25, 0.5)
+    store_keys.clear()
+
+    _, metadata, _ = read_ome_zarr(path)[0]
+
+    assert metadata["contrast_limits"] == [0.25, 0.5]
+    assert not any(is_chunk_key(key) for key in store_keys)
+
+
+def test_read_contrast_limits_only_reads_smallest_level(rng, path, store_keys):
+    data = rng.integers(0, 1000, size=(2, 16, 20)).astype(np.uint16)
+    write_pyramid(path, [data, data[:, ::2, ::2], data[:, ::4, ::4]], "zyx")
+    store_keys.clear()
+
+    _, metadata, _ = read_ome_zarr(path)[0]
+
+    chunk_keys = [key for key in store_keys if is_chunk_key(key)]
+    assert chunk_keys
+    assert all(key.startswith("2/") for key in chunk_keys)
+    smallest = data[1, ::4, ::4].astype(np.float64)
+    np.testing.assert_allclose(
+        metadata["contrast_limits"],
+        np.percentile(smallest, [0.1, 99.9]),
+    )
+
+
+def test_read_contrast_limits_per_channel_fills_missing_windows(
+    rng, path, store_keys
+):
+    data = np.stack([rng.random((8, 10)), 10 + rng.random((8, 10))])
+    write_pyramid(path, [data], "cyx")
+    attrs_path = os.path.join(path, ".zattrs")
+    with open(attrs_path) as f:
+        attrs = json.load(f)
+    attrs["omero"] = {"channels": [{"window": {"start": 0.1, "end": 0.9}}, {}]}
+    with open(attrs_path, "w") as f:
+        json.dump(attrs, f)
+
+    _, metadata, _ = read_ome_zarr(path)[0]
+
+    first, second = metadata["contrast_limits"]
+    assert first == [0.1, 0.9]
+    assert 10 <= second[0] < second[1] <= 11
+
+
+def test_read_contrast_limits_are_cached(rng, path, store_keys):
+    data = rng.random((8, 10))
+    write_pyramid(path, [data, data[::2, ::2]], "yx")
+    _, metadata, _ = read_ome_zarr(path)[0]
+    store_keys.clear()
+
+    _, cached_metadata, _ = read_ome_zarr(path)[0]
+
+    assert cached_metadata["contrast_limits"] == metadata["contrast_limits"]
+    assert not any(is_chunk_key(key) for key in store_keys)
+
+
+def test_compute_contrast_limits_of_constant_data():
+    limits = compute_contrast_limits(
+        np.zeros((3, 4)), None, percentile=1, max_samples=100
+    )
+
+    assert limits == [[0.0, 1.0]]
+
+
+def test_compute_contrast_limits_subsamples_large_data(rng):
+    data = rng.random((4, 100, 100))
+
+    limits = compute_contrast_limits(data, None, percentile=0, max_samples=100)
+
+    sample = data[2, ::10, ::10]
+    assert limits == [[sample.min(), sample.max()]]
+
+
+def write_transformed_pyramid(path: str, data: np.ndarray) -> None:
+    root = zarr.group(store=parse_url(path, mode="w").store)
+    pyramid = [data, data[::2, ::2], data[::4, ::4]]
+    transforms = [
+        [
+            {"type": "scale", "scale": [0.5 * 2**i, 0.25 * 2**i]},
+            {"type": "translation", "translation": [0.1 * i, 1 + 0.2 * i]},
+        ]
+        for i in range(len(pyramid))
+    ]
+    write_multiscale(
+        pyramid,
+        root,
+        axes="yx",
+        coordinate_transformations=transforms,
+        name="kermit",
+    )
+
+
+def test_read_dropping_finest_levels_uses_their_transforms(
+    rng, path, store_keys
+):
+    data = rng.random((16, 20))
+    write_transformed_pyramid(path, data)
+    store_keys.clear()
+
+    layers = _reader.read_ome_zarr(path, levels=LevelSelection(drop_finest=1))
+
+    levels, metadata, _ = layers[0]
+    assert [level.shape for level in levels] == [(8, 10), (4, 5)]
+    assert metadata["scale"] == (1.0, 0.5)
+    assert metadata["translate"] == (0.1, 1.2)
+    extras = metadata["metadata"][EXTRA_METADATA_KEY]
+    assert extras.original.scale == (1.0, 0.5)
+    assert not any(
+        key.startswith("0/") for key in store_keys if is_chunk_key(key)
+    )
+
+
+def test_read_levels_within_byte_budget(rng, path):
+    data = rng.random((16, 20))
+    write_transformed_pyramid(path, data)
+    max_bytes = data[::2, ::2].nbytes
+
+    layers = _reader.read_ome_zarr(
+        path, levels=LevelSelection(max_bytes=max_bytes)
+    )
+
+    levels, metadata, _ = layers[0]
+    assert [level.shape for level in levels] == [(8, 10), (4, 5)]
+    assert metadata["scale"] == (1.0, 0.5)
+
+
+def test_read_keeps_coarsest_level_over_budget(rng, path):
+    data = rng.random((16, 20))
+    write_transformed_pyramid(path, data)
+
+    layers = _reader.read_ome_zarr(
+        path, levels=LevelSelection(max_bytes=1, drop_finest=5)
+    )
+
+    level, metadata, _ = layers[0]
+    assert level.shape == (4, 5)
+    np.testing.assert_array_equal(level, data[::4, ::4])
+    assert metadata["scale"] == (2.0, 1.0)
+    assert metadata["translate"] == (0.2, 1.4)
+
+
+def test_read_uses_default_level_selection(rng, path, monkeypatch):
+    data = rng.random((16, 20))
+    write_transformed_pyramid(path, data)
+    monkeypatch.setattr(
+        _reader, "LEVEL_SELECTION", LevelSelection(drop_finest=2)
+    )
+
+    level, _, _ = napari_get_reader(path)(path)[0]
+
+    assert level.shape == (4, 5)
+
+
+def test_read_region_of_interest_crops_every_level(rng, path):
+    data = rng.random((16, 20))
+    write_transformed_pyramid(path, data)
+    roi = RegionOfInterest(start=(1.0, 2.0), stop=(3.0, 3.0))
+
+    layers = _reader.read_ome_zarr(path, roi=roi)
+
+    levels, metadata, _ = layers[0]
+    np.testing.assert_array_equal(levels[0], data[2:7, 4:9])
+    np.testing.assert_array_equal(levels[1], data[::2, ::2][1:4, 2:5])
+    np.testing.assert_array_equal(levels[2], data[::4, ::4][0:2, 1:3])
+    assert metadata["scale"] == (0.5, 0.25)
+    assert metadata["translate"] == (1.0, 2.0)
+
+
+def test_read_region_of_interest_only_reads_its_chunks(rng, path, store_keys):
+    data = rng.integers(0, 1000, size=(16, 20)).astype(np.uint16)
+    root = zarr.group(store=parse_url(path, mode="w").store)
+    write_multiscale(
+        [data, data[::2, ::2]],
+        root,
+        axes="yx",
+        name="kermit",
+        storage_options={"chunks": (4, 4)},
+    )
+    roi = RegionOfInterest(start=(2.0, 4.0), stop=(6.5, 8.5))
+    store_keys.clear()
+
+    levels, metadata, _ = _reader.read_ome_zarr(path, roi=roi)[0]
+    np.testing.assert_array_equal(levels[0], data[2:7, 4:9])
+
+    chunk_keys = {key for key in store_keys if is_chunk_key(key)}
+    assert chunk_keys == {
+        "0/0/1",
+        "0/0/2",
+        "0/1/1",
+        "0/1/2",
+        "1/0/0",
+        "1/0/1",
+    }
+    coarsest = data[::2, ::2][1:4, 2:5].astype(np.float64)
+    np.testing.assert_allclose(
+        metadata["contrast_limits"],
+        np.percentile(coarsest, [0.1, 99.9]),
+    )
+
+
+def test_read_region_of_interest_of_last_dims_with_channels(rng, path):
+    data = rng.random((2, 3, 8, 10))
+    write_pyramid(path, [data], "tcyx")
+    roi = RegionOfInterest(start=(2.0, 3.0), stop=(4.0, 5.0))
+
+    layer_data, metadata, _ = _reader.read_ome_zarr(path, roi=roi)[0]
+
+    assert metadata["channel_axis"] == 1
+    assert metadata["translate"] == (0.0, 2.0, 3.0)
+    np.testing.assert_array_equal(layer_data, data[:, :, 2:5, 3:6])
+    image = Image(layer_data[:, 1])
+    np.testing.assert_array_equal(image.data[1], data[1, 1, 2:5, 3:6])
+
+
+def test_read_region_of_interest_of_labels(rng, path):
+    image = Image(rng.random((8, 10)))
+    write_image(path, *image.as_layer_data_tuple()[:2])
+    add_omero_window(path, 0, 1)
+    root = zarr.group(store=parse_url(path, mode="w").store)
+    labels = rng.integers(0, 5, size=(1, 8, 10)).astype(np.uint8)
+    write_multiscale_labels(
+        [labels],
+        root,
+        name="cells",
+        axes=[
+            {"name": "c", "type": "channel"},
+            {"name": "y", "type": "space"},
+            {"name": "x", "type": "space"},
+        ],
+    )
+    roi = RegionOfInterest(start=(1.0, 2.0), stop=(3.0, 4.0))
+
+    layers = _reader.read_ome_zarr(path, roi=roi)
+
+    read_labels, metadata, _ = [x for x in layers if x[2] == "labels"][0]
+    assert read_labels.shape == (3, 3)
+    np.testing.assert_array_equal(read_labels, labels[0, 1:4, 2:5])
+    assert metadata["translate"] == (1.0, 2.0)
+
+
+def test_region_of_interest_outside_of_data(rng, path):
+    write_pyramid(path, [rng.random((8, 10))], "yx")
+    roi = RegionOfInterest(start=(10.0, 0.0), stop=(12.0, 1.0))
+
+    with pytest.raises(ValueError):
+        _reader.read_ome_zarr(path, roi=roi)
+
+
+def test_region_of_interest_rejects_invalid_bounds():
+    with pytest.raises(ValueError):
+        RegionOfInterest(start=(0, 0), stop=(1,))
+    with pytest.raises(ValueError):
+        RegionOfInterest(start=(0, 2), stop=(1, 1))
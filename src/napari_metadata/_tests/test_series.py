@@ -0,0 +1,153 @@
+import os
+import shutil
+from typing import List, Optional
+
+import numpy as np
+import pytest
+import zarr
+from ome_zarr.io import parse_url
+from ome_zarr.writer import write_image
+
+from .. import _reader
+from .._metadata_cache import METADATA_CACHE, parse_cached_url
+from .._reader import napari_get_reader, read_ome_zarr
+from .._series import SeriesSummary, list_series, summarize_series
+
+AXES = [
+    {"name": "c", "type": "channel"},
+    {"name": "y", "type": "space", "unit": "micrometer"},
+    {"name": "x", "type": "space", "unit": "micrometer"},
+]
+
+
+def write_series(
+    path: str, images: List[np.ndarray], listed: Optional[List[str]] = None
+) -> None:
+    """Writes images as the series of a bioformats2raw dataset, which are
+    unnamed, except for the second which is named kermit.
+    """
+    root = zarr.group(parse_url(path, mode="w").store)
+    root.attrs["bioformats2raw.layout"] = 3
+    for i, image in enumerate(images):
+        group = root.create_group(str(i))
+        axes = AXES[-image.ndim :]  # noqa
+        write_image(image, group, scaler=None, axes=axes)
+        multiscales = group.attrs["multiscales"]
+        multiscales[0]["name"] = "kermit" if i == 1 else None
+        group.attrs["multiscales"] = multiscales
+    if listed is not None:
+        root.create_group("OME").attrs["series"] = listed
+    METADATA_CACHE.clear()
+
+
+@pytest.fixture
+def images(rng) -> List[np.ndarray]:
+    return [
+        rng.integers(0, 255, size=(2, 8, 10), dtype=np.uint8),
+        rng.random((6, 4)),
+        rng.integers(0, 9, size=(5, 3), dtype=np.uint16),
+    ]
+
+
+def test_list_series_from_ome_group(path, images):
+    write_series(path, images, listed=["2", "0"])
+
+    assert list_series(parse_cached_url(path)) == ["2", "0"]
+
+
+def test_list_series_without_ome_group(path, images):
+    write_series(path, images)
+
+    assert list_series(parse_cached_url(path)) == ["0", "1", "2"]
+
+
+def test_summarize_series_only_reads_metadata(path, images, store_keys):
+    write_series(path, images)
+
+    summaries = summarize_series(path)
+
+    assert summaries == [
+        SeriesSummary(
+            path="0",
+            name="0",
+            shape=(2, 8, 10),
+            dtype=np.dtype(np.uint8),
+            axes=("c", "y", "x"),
+            units=(None, "micrometer", "micrometer"),
+        ),
+        SeriesSummary(
+            path="1",
+            name="kermit",
+            shape=(6, 4),
+            dtype=np.dtype(np.float64),
+            axes=("y", "x"),
+            units=("micrometer", "micrometer"),
+        ),
+        SeriesSummary(
+            path="2",
+            name="2",
+            shape=(5, 3),
+            dtype=np.dtype(np.uint16),
+            axes=("y", "x"),
+            units=("micrometer", "micrometer"),
+        ),
+    ]
+    assert str(summaries[1]) == (
+        "kermit (1): y=6 micrometer, x=4 micrometer, float64"
+    )
+    assert all(key.split("/")[-1].startswith(".") for key in store_keys)
+
+
+def test_summarize_series_of_other_data(path, rng):
+    root = zarr.group(parse_url(path, mode="w").store)
+    write_image(rng.random((8, 10)), root, scaler=None, axes="yx")
+
+    assert summarize_series(path) == []
+
+
+def test_read_first_series_from_napari(path, images, caplog, store_keys):
+    write_series(path, images, listed=["2", "0", "1"])
+
+    reader = napari_get_reader(path)
+    with caplog.at_level("INFO", logger="napari_metadata._reader"):
+        layers = reader(path)
+
+    assert len(layers) == 1
+    assert layers[0][1]["name"] == "2"
+    np.testing.assert_array_equal(np.asarray(layers[0][0]), images[2])
+    assert "Reading 1 of the 3 series" in caplog.text
+    assert "kermit (1): y=6 micrometer" in caplog.text
+    # The other series only have their metadata read to be summarized.
+    chunks = [k for k in store_keys if not k.split("/")[-1].startswith(".")]
+    assert chunks == ["0/0/0"]
+
+
+def test_read_all_series(path, images, monkeypatch):
+    monkeypatch.setattr(_reader, "SERIES_COUNT", None)
+    write_series(path, images, listed=["0", "1", "2"])
+
+    layers = read_ome_zarr(path)
+
+    assert [m["name"] for _, m, _ in layers] == ["0", "kermit", "2"]
+    assert layers[0][1]["channel_axis"] == 0
+    for (data, _, _), image in zip(layers, images):
+        np.testing.assert_array_equal(np.asarray(data), image)
+
+
+def test_read_selected_series_only_opens_their_arrays(path, images):
+    write_series(path, images)
+    # Reading the other series would fail without their arrays.
+    shutil.rmtree(os.path.join(path, "0", "0"))
+    shutil.rmtree(os.path.join(path, "1", "0"))
+
+    layers = read_ome_zarr(path, series=["2"])
+
+    assert len(layers) == 1
+    np.testing.assert_array_equal(np.asarray(layers[0][0]), images[2])
+
+
+def test_read_unknown_series(path, images):
+    write_series(path, images)
+
+    with pytest.raises(ValueError, match="no series"):
+        read_ome_zarr(path, series=["3"])
@@ -0,0 +1,169 @@
+import json
+import os
+from copy import deepcopy
+
+import numpy as np
+import pytest
+import zarr
+from ome_zarr.io import parse_url
+from ome_zarr.writer import write_image
+
+from .._metadata_cache import METADATA_CACHE
+from .._reader import read_ome_zarr
+from .._validation import (
+    NgffValidationError,
+    ValidationIssue,
+    compiled_schema,
+    ngff_version,
+    validate_multiscales,
+)
+
+ATTRS = {
+    "multiscales": [
+        {
+            "version": "0.4",
+            "axes": [
+                {"name": "c", "type": "channel"},
+                {"name": "y", "type": "space", "unit": "micrometer"},
+                {"name": "x", "type": "space", "unit": "micrometer"},
+            ],
+            "datasets": [
+                {
+                    "path": "0",
+                    "coordinateTransformations": [
+                        {"type": "scale", "scale": [1, 0.5, 0.5]},
+                        {"type": "translation", "translation": [0, 1, 2]},
+                    ],
+                },
+            ],
+        }
+    ]
+}
+
+
+def issues(attrs) -> list:
+    with pytest.raises(NgffValidationError) as info:
+        validate_multiscales(attrs, url="test.zarr")
+    return list(info.value.issues)
+
+
+def test_validate_valid_multiscales():
+    validate_multiscales(ATTRS)
+
+
+def test_validate_reports_every_problem():
+    attrs = deepcopy(ATTRS)
+    multiscale = attrs["multiscales"][0]
+    del multiscale["axes"][0]["type"]
+    multiscale["axes"][1]["unit"] = 1
+    multiscale["datasets"].append({"path": 1})
+
+    assert issues(attrs) == [
+        ValidationIssue("multiscales/0/axes/0", "'type' is required"),
+        ValidationIssue("multiscales/0/axes/1/unit", "must be a string: 1"),
+        ValidationIssue(
+            "multiscales/0/datasets/1",
+            "'coordinateTransformations' is required",
+        ),
+        ValidationIssue(
+            "multiscales/0/datasets/1/path", "must be a string: 1"
+        ),
+    ]
+
+
+def test_validate_checks_transforms_match_axes():
+    attrs = deepcopy(ATTRS)
+    dataset = attrs["multiscales"][0]["datasets"][0]
+    dataset["coordinateTransformations"][1]["translation"] = [0, 1]
+
+    assert issues(attrs) == [
+        ValidationIssue(
+            "multiscales/0/datasets/0/"
+            "coordinateTransformations/1/translation",
+            "must have one value per axis (3), not 2",
+        )
+    ]
+
+
+def test_validate_checks_order_of_transforms():
+    attrs = deepcopy(ATTRS)
+    dataset = attrs["multiscales"][0]["datasets"][0]
+    dataset["coordinateTransformations"].reverse()
+
+    (issue,) = issues(attrs)
+
+    assert issue.path == "multiscales/0/datasets/0/coordinateTransformations"
+    assert "['translation', 'scale']" in issue.message
+
+
+def test_validate_checks_axes():
+    attrs = deepcopy(ATTRS)
+    attrs["multiscales"][0]["axes"][0] = {"name": "x", "type": "channel"}
+    attrs["multiscales"][0]["axes"][1]["type"] = "channel"
+
+    assert [str(issue) for issue in issues(attrs)] == [
+        "multiscales/0/axes: names must be unique: ['x', 'y', 'x']",
+        "multiscales/0/axes: must have 2 or 3 space axes, not 1",
+        "multiscales/0/axes: must have at most one channel axis",
+    ]
+
+
+def test_validate_missing_multiscales():
+    assert issues({}) == [ValidationIssue("", "'multiscales' is required")]
+
+
+def test_validate_version_0_3_axes():
+    attrs = {
+        "multiscales": [
+            {"version": "0.3", "axes": ["c", "y", "q"], "datasets": []}
+        ]
+    }
+
+    assert [str(issue) for issue in issues(attrs)] == [
+        "multiscales/0/axes/2: "
+        "must be one of ['t', 'c', 'z', 'y', 'x']: 'q'",
+        "multiscales/0/datasets: must have at least 1 items",
+    ]
+
+
+def test_ngff_version_defaults_to_latest():
+    assert ngff_version(ATTRS) == "0.4"
+    assert ngff_version({"multiscales": [{"version": "0.1"}]}) == "0.1"
+    assert ngff_version({"multiscales": [{"version": "9.9"}]}) == "0.4"
+    assert ngff_version({"multiscales": "kermit"}) == "0.4"
+
+
+def test_compiled_schema_is_cached():
+    assert compiled_schema("0.4") is compiled_schema("0.4")
+    assert compiled_schema("0.3") is not compiled_schema("0.4")
+
+
+def test_read_invalid_image_fails_before_reading_arrays(rng, path, store_keys):
+    root = zarr.group(parse_url(path, mode="w").store)
+    write_image(rng.random((2, 8, 10)), root, scaler=None, axes="cyx")
+    attrs_path = os.path.join(path, ".zattrs")
+    with open(attrs_path) as f:
+        attrs = json.load(f)
+    for axis in attrs["multiscales"][0]["axes"]:
+        del axis["type"]
+    with open(attrs_path, "w") as f:
+        json.dump(attrs, f)
+    METADATA_CACHE.clear()
+    store_keys.clear()
+
+    with pytest.raises(NgffValidationError) as info:
+        read_ome_zarr(path)
+
+    assert len(info.value.issues) == 3
+    assert path in str(info.value)
+    assert not any(key.startswith("0/") for key in store_keys)
+
+
+def test_valid_image_passes_validation(rng, path):
+    root = zarr.group(parse_url(path, mode="w").store)
+    data = rng.random((2, 8, 10))
+    write_image(data, root, scaler=None, axes="cyx")
+
+    layers = read_ome_zarr(path)
+
+    np.testing.assert_array_equal(np.asarray(layers[0][0]), data)
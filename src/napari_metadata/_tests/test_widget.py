@@ -1,7 +1,9 @@
+import threading
 from typing import TYPE_CHECKING, Tuple
 
 import numpy as np
 import pytest
+import zarr
 from napari.components import ViewerModel
 from napari.layers import (
     Image,
@@ -12,10 +14,15 @@ from napari.layers import (
     Tracks,
     Vectors,
 )
+from napari.layers._source import layer_source
+from ome_zarr.writer import write_image as write_ome_image
+from zarr.storage import FSStore
 
-from napari_metadata import MetadataWidget
+from napari_metadata import MetadataWidget, _async_reader
+from napari_metadata._async_reader import ReadTask
 from napari_metadata._axes_widget import AxesWidget
 from napari_metadata._axis_type import AxisType
+from napari_metadata._metadata_writer import can_save_metadata
 from napari_metadata._model import (
     EXTRA_METADATA_KEY,
     ExtraMetadata,
@@ -25,7 +32,10 @@ from napari_metadata._model import (
     TimeAxis,
     TimeUnits,
     extra_metadata,
+    source_path,
 )
+from napari_metadata._reader import napari_get_reader
+from napari_metadata._writer import write_image
 
 if TYPE_CHECKING:
     from pytestqt.qtbot import QtBot
@@ -451,6 +461,99 @@ def are_axis_widgets_visible(widget: MetadataWidget) -> Tuple[bool, ...]:
     )
 
 
+def test_readonly_chunk_cache_stats(qtbot: "QtBot", tmp_path):
+    path = str(tmp_path / "image.zarr")
+    image = Image(np.zeros((4, 3)), name="kermit")
+    write_image(path, *image.as_layer_data_tuple()[:2])
+    data, metadata, _ = napari_get_reader(path)(path)[0]
+    with layer_source(path=path, reader_plugin="napari-metadata"):
+        layer = Image(data, **metadata)
+    viewer = ViewerModel()
+    viewer.add_layer(layer)
+    widget = make_metadata_widget(qtbot, viewer)
+
+    np.asarray(layer.data)
+    widget._show_readonly()
+
+    text = widget._readonly_widget.chunk_cache.text()
+    assert text.startswith("96.00 bytes in 1 chunks")
+    assert "0 hits" not in text
+
+
+def test_save_metadata(qtbot: "QtBot", tmp_path):
+    path = str(tmp_path / "image.zarr")
+    image = Image(np.zeros((4, 3)), name="kermit")
+    write_image(path, *image.as_layer_data_tuple()[:2])
+    data, metadata, _ = napari_get_reader(path)(path)[0]
+    with layer_source(path=path, reader_plugin="napari-metadata"):
+        layer = Image(data, **metadata)
+    viewer = ViewerModel()
+    viewer.add_layer(layer)
+    widget = make_metadata_widget(qtbot, viewer)
+    save_button = widget._editable_widget._save_button
+    assert not save_button.isEnabled()
+
+    layer.scale = (2, 3)
+
+    assert save_button.isEnabled()
+    save_button.click()
+    assert not save_button.isEnabled()
+    data, metadata, _ = napari_get_reader(path)(path)[0]
+    assert tuple(metadata["scale"]) == (2, 3)
+
+
+def test_add_read_shows_placeholders_until_layers_are_added(
+    qtbot: "QtBot", tmp_path, monkeypatch
+):
+    path = str(tmp_path / "image.zarr")
+    image = Image(np.zeros((4, 3)), name="kermit")
+    write_image(path, *image.as_layer_data_tuple()[:2])
+    ready = threading.Event()
+    transform_node = _async_reader.transform_node
+
+    def gated_transform_node(node, **kwargs):
+        assert ready.wait(timeout=10)
+        return transform_node(node, **kwargs)
+
+    monkeypatch.setattr(_async_reader, "transform_node", gated_transform_node)
+    viewer = ViewerModel()
+    widget = make_metadata_widget(qtbot, viewer)
+    loading_widget = widget._loading_widgets[0]
+
+    widget.add_read(ReadTask(path))
+
+    qtbot.waitUntil(
+        lambda: loading_widget.placeholder_texts() == ["kermit (loading)"]
+    )
+    assert loading_widget.isVisibleTo(widget)
+    assert len(viewer.layers) == 0
+
+    ready.set()
+
+    qtbot.waitUntil(lambda: len(viewer.layers) == 1)
+    assert viewer.layers[0].name == "kermit"
+    assert source_path(viewer.layers[0]) == path
+    assert can_save_metadata(viewer.layers[0])
+    qtbot.waitUntil(lambda: loading_widget.placeholder_texts() == [])
+    assert not loading_widget.isVisibleTo(widget)
+
+
+def test_add_read_records_source_path_of_each_channel(
+    qtbot: "QtBot", tmp_path, rng
+):
+    path = str(tmp_path / "channels.zarr")
+    data = rng.integers(0, 255, size=(2, 4, 5), dtype=np.uint8)
+    write_ome_image(data, zarr.group(FSStore(path)), scaler=None, axes="cyx")
+    viewer = ViewerModel()
+    widget = make_metadata_widget(qtbot, viewer)
+
+    widget.add_read(ReadTask(path))
+
+    qtbot.waitUntil(lambda: len(viewer.layers) == 2)
+    assert [source_path(layer) for layer in viewer.layers] == [path, path]
+    assert all(layer.source.path is None for layer in viewer.layers)
+
+
 def make_metadata_widget(
     qtbot: "QtBot", viewer: ViewerModel
 ) -> MetadataWidget:
@@ -2,11 +2,13 @@ from typing import Dict, Optional, Sequence, Tuple
 
 import numpy as np
 import pytest
+import zarr
 from napari.layers import Image
 from npe2.types import ArrayLike
 from ome_zarr.io import parse_url
 from ome_zarr.reader import Reader
 
+from .._chunk_writer import WriteOptions
 from .._model import (
     EXTRA_METADATA_KEY,
     ExtraMetadata,
@@ -15,6 +17,7 @@ from .._model import (
     TimeAxis,
     TimeUnits,
 )
+from .._pyramid import PyramidOptions, write_downsampled
 from .._writer import write_image
 
 
@@ -209,3 +212,85 @@ def test_write_3d_image_with_extras(rng, path):
     assert len(transforms[0]) == 2
     assert tuple(transforms[0][0]["scale"]) == (1, 3, 4)
     assert tuple(transforms[0][1]["translation"]) == (9000, -1, 1)
+
+
+def test_write_image_with_pyramid(rng, path):
+    image = Image(
+        rng.random((3, 70, 100)),
+        name="kermit",
+        scale=(5, 2, 3),
+        translate=(9000, -1, 1),
+    )
+    data, metadata, _ = image.as_layer_data_tuple()
+
+    write_image(path, data, metadata, pyramid=PyramidOptions(tile_size=20))
+
+    read_data, read_metadata = read_ome_zarr(path)
+    assert [d.shape for d in read_data] == [
+        (3, 70, 100),
+        (3, 35, 50),
+        (3, 18, 25),
+        (3, 9, 13),
+    ]
+    np.testing.assert_allclose(
+        read_data[1][:, :2, :2],
+        data[:, :4, :4].reshape(3, 2, 2, 2, 2).mean(axis=(2, 4)),
+    )
+    # The last row of an odd-sized level has no row after it.
+    np.testing.assert_allclose(
+        read_data[2][:, -1, :2],
+        np.asarray(read_data[1])[:, -1, :4].reshape(3, 2, 2).mean(axis=2),
+    )
+    transforms = read_metadata["coordinateTransformations"]
+    assert [tuple(t[0]["scale"]) for t in transforms] == [
+        (5, 2, 3),
+        (5, 4, 6),
+        (5, 8, 12),
+        (5, 16, 24),
+    ]
+    assert [tuple(t[1]["translation"]) for t in transforms] == [
+        (9000, -1, 1),
+        (9000, 0, 2.5),
+        (9000, 2, 5.5),
+        (9000, 6, 11.5),
+    ]
+
+
+def test_write_image_with_pyramid_in_parallel(rng, path):
+    data = rng.integers(0, 255, size=(300, 260), dtype=np.uint8)
+    image = Image(data, multiscale=False)
+    _, metadata, _ = image.as_layer_data_tuple()
+    store = zarr.storage.MemoryStore()
+    serial = zarr.group(store=store)
+    serial.create_dataset("0", data=data, chunks=(64, 64))
+    serial.create_dataset(
+        "1", shape=(150, 130), chunks=(64, 64), dtype=data.dtype
+    )
+    write_downsampled(serial["0"], serial["1"], [0, 1])
+
+    write_image(
+        path,
+        data,
+        metadata,
+        pyramid=PyramidOptions(tile_size=64),
+        write_options=WriteOptions(max_workers=4),
+    )
+
+    read_data, _ = read_ome_zarr(path)
+    assert len(read_data) == 4
+    assert read_data[1].dtype == np.uint8
+    np.testing.assert_array_equal(read_data[1], serial["1"][:])
+    np.testing.assert_array_equal(
+        read_data[1][:1, :1],
+        np.rint(data[:2, :2].mean()).astype(np.uint8).reshape(1, 1),
+    )
+
+
+def test_write_image_without_pyramid_when_it_fits_a_tile(rng, path):
+    image = Image(rng.random((5, 6)))
+    data, metadata, _ = image.as_layer_data_tuple()
+
+    write_image(path, data, metadata, pyramid=PyramidOptions(tile_size=6))
+
+    read_data, _ = read_ome_zarr(path)
+    assert len(read_data) == 1
@@ -0,0 +1,327 @@
+import itertools
+import json
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numcodecs
+import numpy as np
+import pytest
+from fsspec.implementations.local import LocalFileSystem
+
+from .._chunk_cache import CHUNK_CACHE
+from .._metadata_cache import METADATA_CACHE, parse_cached_url
+from .._model import EXTRA_METADATA_KEY, SpaceAxis, TimeAxis
+from .._reader import napari_get_reader
+from .._space_units import SpaceUnits
+from .._time_units import TimeUnits
+from .._zarr_v3 import ZarrV3Array, decode_chunk, ngff_attributes
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    METADATA_CACHE.clear()
+    CHUNK_CACHE.clear()
+    yield
+    METADATA_CACHE.clear()
+    CHUNK_CACHE.clear()
+
+
+@pytest.fixture
+def read_ranges(monkeypatch) -> List[Tuple]:
+    """Records every byte range that is read from a local file."""
+    ranges = []
+    cat_ranges = LocalFileSystem.cat_ranges
+
+    def record_cat_ranges(self, paths, starts, ends, **kwargs):
+        ranges.extend(zip(paths, starts, ends))
+        return cat_ranges(self, paths, starts, ends, **kwargs)
+
+    monkeypatch.setattr(LocalFileSystem, "cat_ranges", record_cat_ranges)
+    return ranges
+
+
+def write_json(path: str, value: Dict) -> None:
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, "zarr.json"), "w") as f:
+        json.dump(value, f)
+
+
+def write_v3_array(
+    path: str,
+    data: np.ndarray,
+    *,
+    chunk_shape: Sequence[int],
+    shard_shape: Optional[Sequence[int]] = None,
+) -> None:
+    """Writes a Zarr v3 array whose (inner) chunks are gzipped.
+
+    Chunks that only have the fill value of zero are not written.
+    """
+    little_endian = {"name": "bytes", "configuration": {"endian": "little"}}
+    codecs = [little_endian, {"name": "gzip", "configuration": {"level": 1}}]
+    grid_shape = chunk_shape if shard_shape is None else shard_shape
+    if shard_shape is not None:
+        codecs = [
+            {
+                "name": "sharding_indexed",
+                "configuration": {
+                    "chunk_shape": list(chunk_shape),
+                    "codecs": codecs,
+                    "index_codecs": [little_endian],
+                    "index_location": "end",
+                },
+            }
+        ]
+    write_json(
+        path,
+        {
+            "zarr_format": 3,
+            "node_type": "array",
+            "shape": list(data.shape),
+            "data_type": str(data.dtype),
+            "chunk_grid": {
+                "name": "regular",
+                "configuration": {"chunk_shape": list(grid_shape)},
+            },
+            "chunk_key_encoding": {"name": "default"},
+            "fill_value": 0,
+            "codecs": codecs,
+        },
+    )
+    for grid_id in _grid(data.shape, grid_shape):
+        if shard_shape is None:
+            encoded = _encode_chunk(data, grid_id, chunk_shape)
+        else:
+            encoded = _encode_shard(data, grid_id, shard_shape, chunk_shape)
+        if encoded is not None:
+            chunk_path = os.path.join(path, "c", *map(str, grid_id))
+            os.makedirs(os.path.dirname(chunk_path), exist_ok=True)
+            with open(chunk_path, "wb") as f:
+                f.write(encoded)
+
+
+def _grid(shape, chunk_shape) -> List[Tuple[int, ...]]:
+    return list(
+        itertools.product(
+            *(range(-(-s // c)) for s, c in zip(shape, chunk_shape))
+        )
+    )
+
+
+def _encode_chunk(data, chunk_id, chunk_shape) -> Optional[bytes]:
+    chunk = np.zeros(chunk_shape, dtype=data.dtype.newbyteorder("<"))
+    region = tuple(
+        slice(i * c, (i + 1) * c) for i, c in zip(chunk_id, chunk_shape)
+    )
+    values = data[region]
+    if not values.any():
+        return None
+    chunk[tuple(slice(0, s) for s in values.shape)] = values
+    return numcodecs.GZip(level=1).encode(chunk.tobytes())
+
+
+def _encode_shard(data, shard_id, shard_shape, chunk_shape) -> Optional[bytes]:
+    per_shard = tuple(s // c for s, c in zip(shard_shape, chunk_shape))
+    index = np.full(per_shard + (2,), 2**64 - 1, dtype="<u8")
+    encoded = b""
+    for inner in _grid(shard_shape, chunk_shape):
+        chunk_id = tuple(
+            s * n + i for s, n, i in zip(shard_id, per_shard, inner)
+        )
+        region_start = [c * n for c, n in zip(chunk_id, chunk_shape)]
+        if any(r >= s for r, s in zip(region_start, data.shape)):
+            continue
+        if (chunk := _encode_chunk(data, chunk_id, chunk_shape)) is None:
+            continue
+        index[inner] = (len(encoded), len(chunk))
+        encoded += chunk
+    if not encoded:
+        return None
+    return encoded + index.tobytes()
+
+
+def write_v3_image(
+    path: str,
+    data: np.ndarray,
+    *,
+    axes: List[Dict],
+    chunk_shape: Sequence[int],
+    shard_shape: Optional[Sequence[int]] = None,
+    attributes: Optional[Dict] = None,
+) -> None:
+    """Writes a single level OME-NGFF 0.5 image."""
+    ome = {
+        "version": "0.5",
+        "multiscales": [
+            {
+                "axes": axes,
+                "datasets": [
+                    {
+                        "path": "0",
+                        "coordinateTransformations": [
+                            {"type": "scale", "scale": [1.0] * data.ndim}
+                        ],
+                    }
+                ],
+            }
+        ],
+    }
+    ome.update(attributes or {})
+    write_json(
+        path,
+        {"zarr_format": 3, "node_type": "group", "attributes": {"ome": ome}},
+    )
+    write_v3_array(
+        os.path.join(path, "0"),
+        data,
+        chunk_shape=chunk_shape,
+        shard_shape=shard_shape,
+    )
+
+
+TYX_AXES = [
+    {"name": "t", "type": "time", "unit": "second"},
+    {"name": "y", "type": "space", "unit": "micrometer"},
+    {"name": "x", "type": "space", "unit": "micrometer"},
+]
+
+# Contrast limits, so that opening an image does not need to read data.
+OMERO = {"omero": {"channels": [{"window": {"start": 0, "end": 255}}]}}
+
+
+@pytest.mark.parametrize("shard_shape", [None, (2, 8, 8)])
+def test_read_v3_image(path, rng, shard_shape):
+    data = rng.integers(1, 255, size=(3, 10, 13), dtype=np.uint16)
+    write_v3_image(
+        path,
+        data,
+        axes=TYX_AXES,
+        chunk_shape=(1, 4, 4),
+        shard_shape=shard_shape,
+    )
+
+    layers = napari_get_reader(path)(path)
+
+    assert len(layers) == 1
+    layer_data, metadata, layer_type = layers[0]
+    assert layer_type == "image"
+    np.testing.assert_array_equal(np.asarray(layer_data), data)
+    extras = metadata["metadata"][EXTRA_METADATA_KEY]
+    assert extras.axes == [
+        TimeAxis(name="t", unit=TimeUnits.SECOND),
+        SpaceAxis(name="y", unit=SpaceUnits.MICROMETER),
+        SpaceAxis(name="x", unit=SpaceUnits.MICROMETER),
+    ]
+
+
+def test_read_v3_image_with_labels(path, rng):
+    data = rng.integers(1, 255, size=(3, 10, 13), dtype=np.uint16)
+    labels = np.zeros(data.shape, dtype=np.uint8)
+    labels[:, 2:5, 3:9] = 2
+    write_v3_image(path, data, axes=TYX_AXES, chunk_shape=(1, 4, 4))
+    write_json(
+        os.path.join(path, "labels"),
+        {
+            "zarr_format": 3,
+            "node_type": "group",
+            "attributes": {"ome": {"version": "0.5", "labels": ["cells"]}},
+        },
+    )
+    write_v3_image(
+        os.path.join(path, "labels", "cells"),
+        labels,
+        axes=TYX_AXES,
+        chunk_shape=(1, 4, 4),
+        attributes={"image-label": {"colors": []}},
+    )
+
+    layers = napari_get_reader(path)(path)
+
+    assert [layer_type for _, _, layer_type in layers] == ["image", "labels"]
+    np.testing.assert_array_equal(np.asarray(layers[1][0]), labels)
+
+
+def test_read_sharded_tile_reads_only_overlapping_inner_chunks(
+    path, rng, read_ranges
+):
+    data = rng.integers(1, 255, size=(1, 16, 16), dtype=np.uint16)
+    write_v3_image(
+        path,
+        data,
+        axes=TYX_AXES,
+        chunk_shape=(1, 4, 4),
+        shard_shape=(1, 16, 16),
+        attributes=OMERO,
+    )
+    layer_data = napari_get_reader(path)(path)[0][0]
+    shard_path = os.path.join(path, "0", "c", "0", "0", "0")
+    read_ranges.clear()
+
+    tile = np.asarray(layer_data[0, 5:7, 9:11])
+
+    np.testing.assert_array_equal(tile, data[0, 5:7, 9:11])
+    # The shard index is read first, then the one inner chunk.
+    index_nbytes = 16 * 16
+    assert [(s, e) for _, s, e in read_ranges][0] == (-index_nbytes, None)
+    assert len(read_ranges) == 2
+    _, start, end = read_ranges[1]
+    assert end - start < os.path.getsize(shard_path) - index_nbytes
+    assert all(os.path.samefile(p, shard_path) for p, _, _ in read_ranges)
+
+
+def test_read_v3_array_fills_missing_chunks_and_shards(path, rng):
+    data = np.zeros((2, 12, 12), dtype=np.int32)
+    data[0, 1:3, 1:3] = rng.integers(1, 9, size=(2, 2))
+    write_v3_array(path, data, chunk_shape=(1, 2, 2), shard_shape=(1, 4, 4))
+    with open(os.path.join(path, "zarr.json")) as f:
+        metadata = json.load(f)
+    array = ZarrV3Array(
+        LocalFileSystem(), path, metadata, url=path, dataset=path
+    )
+
+    np.testing.assert_array_equal(array[...], data)
+    np.testing.assert_array_equal(
+        array[0, 1, [1, 2, 11]], data[0, 1, [1, 2, 11]]
+    )
+    assert not os.path.exists(os.path.join(path, "c", "1"))
+
+
+def test_decode_chunk_with_transpose_and_big_endian():
+    chunk = np.arange(6, dtype=np.int32).reshape(2, 3)
+    codecs = [
+        {"name": "transpose", "configuration": {"order": [1, 0]}},
+        {"name": "bytes", "configuration": {"endian": "big"}},
+    ]
+    encoded = chunk.T.astype(">i4").tobytes()
+
+    decoded = decode_chunk(encoded, codecs, (2, 3), np.dtype(np.int32))
+
+    np.testing.assert_array_equal(decoded, chunk)
+
+
+def test_ngff_attributes_moves_ome_to_top_level():
+    attributes = {
+        "ome": {
+            "version": "0.5",
+            "multiscales": [{"datasets": []}],
+            "omero": {"channels": []},
+        },
+        "other": 1,
+    }
+
+    assert ngff_attributes(attributes) == {
+        "multiscales": [{"datasets": [], "version": "0.4"}],
+        "omero": {"channels": []},
+        "other": 1,
+    }
+
+
+def test_v3_location_children_share_format(path, rng):
+    data = rng.integers(1, 255, size=(3, 10, 13), dtype=np.uint16)
+    write_v3_image(path, data, axes=TYX_AXES, chunk_shape=(1, 4, 4))
+
+    location = parse_cached_url(path)
+
+    assert location.zarr_format == 3
+    assert location.create("0").zarr_format == 3
+    assert location.create("0").zarray["shape"] == [3, 10, 13]
@@ -0,0 +1,189 @@
+import os
+import threading
+import zipfile
+from typing import List
+
+import numpy as np
+import pytest
+import zarr
+from ome_zarr.io import parse_url
+from ome_zarr.writer import write_image
+
+from .._chunk_cache import CHUNK_CACHE, dataset_key
+from .._metadata_cache import METADATA_CACHE
+from .._reader import napari_get_reader
+from .._zip_store import (
+    ZipArchive,
+    ZipArchiveFileSystem,
+    split_archive_path,
+    zip_url,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    METADATA_CACHE.clear()
+    CHUNK_CACHE.clear()
+    yield
+    METADATA_CACHE.clear()
+    CHUNK_CACHE.clear()
+
+
+def write_zipped_image(
+    tmp_path,
+    data: np.ndarray,
+    *,
+    compression: int = zipfile.ZIP_STORED,
+    with_root_directory: bool = False,
+) -> str:
+    """Writes an image and zips it, optionally in its root directory."""
+    image_path = tmp_path / "image.zarr"
+    root = zarr.group(parse_url(str(image_path), mode="w").store)
+    write_image(
+        data,
+        root,
+        scaler=None,
+        axes="cyx",
+        storage_options={"chunks": (1, 8, 8)},
+    )
+    zip_path = tmp_path / "image.zarr.zip"
+    start = tmp_path if with_root_directory else image_path
+    with zipfile.ZipFile(zip_path, "w", compression) as f:
+        for directory, _, names in os.walk(image_path):
+            for name in names:
+                path = os.path.join(directory, name)
+                f.write(path, os.path.relpath(path, start))
+    return str(zip_path)
+
+
+@pytest.mark.parametrize(
+    "compression", [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED]
+)
+@pytest.mark.parametrize("with_root_directory", [False, True])
+def test_read_zipped_image(tmp_path, rng, compression, with_root_directory):
+    data = rng.integers(0, 255, size=(2, 16, 16), dtype=np.uint8)
+    zip_path = write_zipped_image(
+        tmp_path,
+        data,
+        compression=compression,
+        with_root_directory=with_root_directory,
+    )
+    files = set(os.listdir(tmp_path))
+
+    reader = napari_get_reader(zip_path)
+    layers = reader(zip_path)
+
+    assert len(layers) == 1
+    np.testing.assert_array_equal(np.asarray(layers[0][0][1]), data[1])
+    assert set(os.listdir(tmp_path)) == files
+
+
+def test_zip_url_finds_root_directory(tmp_path, rng):
+    data = rng.integers(0, 255, size=(2, 16, 16), dtype=np.uint8)
+    zip_path = write_zipped_image(tmp_path, data, with_root_directory=True)
+
+    url = zip_url(zip_path)
+
+    assert url == f"zarrzip://{zip_path}/image.zarr"
+
+
+def test_get_reader_rejects_zip_without_zarr(tmp_path):
+    zip_path = str(tmp_path / "other.zip")
+    with zipfile.ZipFile(zip_path, "w") as f:
+        f.writestr("readme.txt", "not zarr")
+
+    assert napari_get_reader(zip_path) is None
+
+
+def test_archive_reads_member_ranges(tmp_path):
+    zip_path = str(tmp_path / "test.zip")
+    with zipfile.ZipFile(zip_path, "w") as f:
+        f.writestr("a/b", b"0123456789")
+        f.writestr("a/c", b"xyz", compress_type=zipfile.ZIP_DEFLATED)
+
+    archive = ZipArchive(zip_path)
+
+    assert archive.read("a/b") == b"0123456789"
+    assert archive.read("a/b", 2, 5) == b"234"
+    assert archive.read("a/c") == b"xyz"
+    assert archive.is_directory("a")
+    assert archive.list_directory("a") == ["a/b", "a/c"]
+    with pytest.raises(FileNotFoundError):
+        archive.read("a/d")
+
+
+def replace_zip(zip_path: str, data: bytes, mtime_ns: int) -> None:
+    """Replaces an archive with a new file, like saving a copy over it."""
+    new_path = f"{zip_path}.new"
+    with zipfile.ZipFile(new_path, "w") as f:
+        f.writestr("a", data)
+    os.utime(new_path, ns=(mtime_ns, mtime_ns))
+    os.replace(new_path, zip_path)
+
+
+def test_archive_keeps_changed_archive_readable(tmp_path):
+    zip_path = str(tmp_path / "test.zip")
+    replace_zip(zip_path, b"old", 0)
+    fs = ZipArchiveFileSystem(skip_instance_cache=True)
+    old = fs.archive(zip_path)
+
+    replace_zip(zip_path, b"newer", 10**9)
+    new = fs.archive(zip_path, check=True)
+
+    assert new is not old
+    assert new.read("a") == b"newer"
+    # A read that started before the change can still finish.
+    assert old.read("a") == b"old"
+    assert fs.archive(zip_path, check=True) is new
+
+
+def test_read_archive_while_it_is_replaced(tmp_path):
+    zip_path = str(tmp_path / "test.zip")
+    values = [b"%d" % i * (i + 1) for i in range(20)]
+    replace_zip(zip_path, values[0], 0)
+    fs = ZipArchiveFileSystem(skip_instance_cache=True)
+    stop = threading.Event()
+    errors: List[BaseException] = []
+    read: List[bytes] = []
+
+    def read_until_stopped() -> None:
+        try:
+            while not stop.is_set():
+                read.append(fs.cat_file(f"{zip_path}/a"))
+        except BaseException as e:
+            errors.append(e)
+
+    readers = [threading.Thread(target=read_until_stopped) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    try:
+        for i, value in enumerate(values[1:], 1):
+            replace_zip(zip_path, value, i * 10**9)
+            assert fs.info(f"{zip_path}/a")["size"] == len(value)
+    finally:
+        stop.set()
+        for reader in readers:
+            reader.join()
+
+    assert not errors
+    assert read
+    assert set(read) <= set(values)
+
+
+def test_split_archive_path():
+    assert split_archive_path("/data/x.zarr.zip/0/.zarray") == (
+        "/data/x.zarr.zip",
+        "0/.zarray",
+    )
+    assert split_archive_path("/data/x.zarr.zip") == ("/data/x.zarr.zip", "")
+    with pytest.raises(FileNotFoundError):
+        split_archive_path("/data/x.zarr/0")
+
+
+def test_zipped_image_shares_chunk_cache_key_with_archive(tmp_path, rng):
+    data = rng.integers(0, 255, size=(2, 16, 16), dtype=np.uint8)
+    zip_path = write_zipped_image(tmp_path, data, with_root_directory=True)
+
+    napari_get_reader(zip_path)(zip_path)
+
+    assert CHUNK_CACHE.stats(dataset_key(zip_path)).size > 0
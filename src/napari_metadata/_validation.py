@@ -0,0 +1,392 @@
+"""Validates the NGFF metadata of images before any of their data is read.
+
+Each version of the NGFF specification has a schema of its multiscales
+metadata, which is written here in a small subset of JSON schema (type,
+enum, required, properties, items, minItems and maxItems) plus checks
+across fields that JSON schema cannot express (e.g. that each scale has
+one value per axis). Schemas are compiled into nested functions once per
+version, so that validating metadata is only a few calls per field, and
+every problem that is found is reported at once.
+"""
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+LOGGER = logging.getLogger("napari_metadata._validation")
+
+# The version whose schema is used for metadata without a known version.
+LATEST_VERSION = "0.4"
+
+# Adds the problems of a value at a path to a list.
+Validator = Callable[[Any, str, List["ValidationIssue"]], None]
+
+
+@dataclass(frozen=True)
+class ValidationIssue:
+    """A problem with the value at a path of some metadata."""
+
+    path: str
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.path or '<root>'}: {self.message}"
+
+
+class NgffValidationError(ValueError):
+    """Raised when the NGFF metadata of an image is invalid."""
+
+    def __init__(
+        self, url: str, version: str, issues: Sequence[ValidationIssue]
+    ) -> None:
+        self.url = url
+        self.version = version
+        self.issues = tuple(issues)
+        lines = "\n".join(f"  {issue}" for issue in self.issues)
+        super().__init__(
+            f"{len(self.issues)} problem(s) with the NGFF {version} "
+            f"metadata of {url}:\n{lines}"
+        )
+
+
+def validate_multiscales(attrs: Dict, *, url: str = "") -> None:
+    """Raises an NgffValidationError with every problem with the
+    multiscales metadata in some attributes, if there are any.
+    """
+    version = ngff_version(attrs)
+    issues: List[ValidationIssue] = []
+    compiled_schema(version)(attrs, "", issues)
+    if issues:
+        raise NgffValidationError(url, version, issues)
+
+
+def ngff_version(attrs: Dict) -> str:
+    """Returns the version of the multiscales metadata in attributes."""
+    multiscales = attrs.get("multiscales")
+    if isinstance(multiscales, list) and len(multiscales) > 0:
+        if isinstance(multiscales[0], dict):
+            version = multiscales[0].get("version")
+            if version in _SCHEMAS:
+                return version
+    return LATEST_VERSION
+
+
+@lru_cache(maxsize=None)
+def compiled_schema(version: str) -> Validator:
+    """Returns the compiled schema of the attributes of a version."""
+    LOGGER.debug(f"compiling the NGFF {version} schema")
+    return compile_schema(_SCHEMAS[version])
+
+
+def compile_schema(schema: Dict[str, Any]) -> Validator:
+    """Compiles a schema into a function that validates values.
+
+    The checks of a schema are only run on values that match the rest of
+    it, so that they can assume the structure that it describes.
+    """
+    type_validator: Optional[Validator] = None
+    if (type_name := schema.get("type")) is not None:
+        type_validator = _type_validator(type_name)
+    validators: List[Validator] = []
+    if (enum := schema.get("enum")) is not None:
+        validators.append(_enum_validator(tuple(enum)))
+    if (required := schema.get("required")) is not None:
+        validators.append(_required_validator(tuple(required)))
+    if (properties := schema.get("properties")) is not None:
+        validators.append(
+            _properties_validator(
+                {k: compile_schema(v) for k, v in properties.items()}
+            )
+        )
+    if "minItems" in schema or "maxItems" in schema:
+        validators.append(
+            _length_validator(schema.get("minItems"), schema.get("maxItems"))
+        )
+    if (items := schema.get("items")) is not None:
+        validators.append(_items_validator(compile_schema(items)))
+    check: Optional[Validator] = schema.get("check")
+
+    def validate(value: Any, path: str, issues: List[ValidationIssue]):
+        n_issues = len(issues)
+        if type_validator is not None:
+            type_validator(value, path, issues)
+            # The other validators assume the type is right.
+            if len(issues) > n_issues:
+                return
+        for validator in validators:
+            validator(value, path, issues)
+        if check is not None and len(issues) == n_issues:
+            check(value, path, issues)
+
+    return validate
+
+
+_TYPES: Dict[str, Tuple[type, ...]] = {
+    "object": (dict,),
+    "array": (list, tuple),
+    "string": (str,),
+    "number": (int, float),
+    "integer": (int,),
+}
+
+
+def _type_validator(type_name: str) -> Validator:
+    types = _TYPES[type_name]
+
+    def validate(value: Any, path: str, issues: List[ValidationIssue]):
+        # bool is an int in Python, but not a number in JSON.
+        if not isinstance(value, types) or isinstance(value, bool):
+            issues.append(
+                ValidationIssue(path, f"must be a {type_name}: {value!r}")
+            )
+
+    return validate
+
+
+def _enum_validator(enum: Tuple) -> Validator:
+    def validate(value: Any, path: str, issues: List[ValidationIssue]):
+        if value not in enum:
+            issues.append(
+                ValidationIssue(
+                    path, f"must be one of {list(enum)}: {value!r}"
+                )
+            )
+
+    return validate
+
+
+def _required_validator(required: Tuple[str, ...]) -> Validator:
+    def validate(value: Any, path: str, issues: List[ValidationIssue]):
+        for key in required:
+            if key not in value:
+                issues.append(ValidationIssue(path, f"{key!r} is required"))
+
+    return validate
+
+
+def _properties_validator(properties: Dict[str, Validator]) -> Validator:
+    def validate(value: Any, path: str, issues: List[ValidationIssue]):
+        for key, validator in properties.items():
+            if key in value:
+                validator(value[key], _join(path, key), issues)
+
+    return validate
+
+
+def _length_validator(
+    min_items: Optional[int], max_items: Optional[int]
+) -> Validator:
+    def validate(value: Any, path: str, issues: List[ValidationIssue]):
+        if min_items is not None and len(value) < min_items:
+            issues.append(
+                ValidationIssue(path, f"must have at least {min_items} items")
+            )
+        if max_items is not None and len(value) > max_items:
+            issues.append(
+                ValidationIssue(path, f"must have at most {max_items} items")
+            )
+
+    return validate
+
+
+def _items_validator(item_validator: Validator) -> Validator:
+    def validate(value: Any, path: str, issues: List[ValidationIssue]):
+        for i, item in enumerate(value):
+            item_validator(item, _join(path, i), issues)
+
+    return validate
+
+
+def _join(path: str, key: Any) -> str:
+    return f"{path}/{key}" if path else str(key)
+
+
+def _check_multiscale_04(
+    multiscale: Dict, path: str, issues: List[ValidationIssue]
+) -> None:
+    axes = multiscale["axes"]
+    names = [axis["name"] for axis in axes]
+    if len(set(names)) != len(names):
+        issues.append(
+            ValidationIssue(
+                _join(path, "axes"), f"names must be unique: {names}"
+            )
+        )
+    types = [axis["type"] for axis in axes]
+    n_space = types.count("space")
+    if not 2 <= n_space <= 3:
+        issues.append(
+            ValidationIssue(
+                _join(path, "axes"),
+                f"must have 2 or 3 space axes, not {n_space}",
+            )
+        )
+    for axis_type in ("time", "channel"):
+        if types.count(axis_type) > 1:
+            issues.append(
+                ValidationIssue(
+                    _join(path, "axes"),
+                    f"must have at most one {axis_type} axis",
+                )
+            )
+    datasets_path = _join(path, "datasets")
+    for i, dataset in enumerate(multiscale["datasets"]):
+        _check_transforms_04(
+            dataset["coordinateTransformations"],
+            _join(_join(datasets_path, i), "coordinateTransformations"),
+            len(axes),
+            issues,
+        )
+    if (transforms := multiscale.get("coordinateTransformations")) is not None:
+        _check_transforms_04(
+            transforms,
+            _join(path, "coordinateTransformations"),
+            len(axes),
+            issues,
+        )
+
+
+def _check_transforms_04(
+    transforms: List[Dict],
+    path: str,
+    ndim: int,
+    issues: List[ValidationIssue],
+) -> None:
+    types = [t["type"] for t in transforms]
+    if types not in (["scale"], ["scale", "translation"]):
+        issues.append(
+            ValidationIssue(
+                path,
+                "must be one scale, optionally followed by one "
+                f"translation: {types}",
+            )
+        )
+    for i, transform in enumerate(transforms):
+        key = {"scale": "scale", "translation": "translation"}.get(
+            transform["type"]
+        )
+        if key is None:
+            continue
+        if key not in transform:
+            issues.append(
+                ValidationIssue(_join(path, i), f"{key!r} is required")
+            )
+        elif len(transform[key]) != ndim:
+            issues.append(
+                ValidationIssue(
+                    _join(_join(path, i), key),
+                    f"must have one value per axis ({ndim}), "
+                    f"not {len(transform[key])}",
+                )
+            )
+
+
+_NUMBERS = {"type": "array", "items": {"type": "number"}}
+
+_TRANSFORM_04 = {
+    "type": "object",
+    "required": ["type"],
+    "properties": {
+        "type": {
+            "type": "string",
+            "enum": ["identity", "scale", "translation"],
+        },
+        "scale": _NUMBERS,
+        "translation": _NUMBERS,
+    },
+}
+
+_MULTISCALE_04 = {
+    "type": "object",
+    "required": ["axes", "datasets"],
+    "properties": {
+        "axes": {
+            "type": "array",
+            "minItems": 2,
+            "maxItems": 5,
+            "items": {
+                "type": "object",
+                # The type is only recommended by the specification, but
+                # the reader needs it to find the channel and time axes.
+                "required": ["name", "type"],
+                "properties": {
+                    "name": {"type": "string"},
+                    "type": {"type": "string"},
+                    "unit": {"type": "string"},
+                },
+            },
+        },
+        "datasets": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "required": ["path", "coordinateTransformations"],
+                "properties": {
+                    "path": {"type": "string"},
+                    "coordinateTransformations": {
+                        "type": "array",
+                        "minItems": 1,
+                        "items": _TRANSFORM_04,
+                    },
+                },
+            },
+        },
+        "coordinateTransformations": {
+            "type": "array",
+            "minItems": 1,
+            "items": _TRANSFORM_04,
+        },
+    },
+    "check": _check_multiscale_04,
+}
+
+_MULTISCALE_03 = {
+    "type": "object",
+    "required": ["axes", "datasets"],
+    "properties": {
+        "axes": {
+            "type": "array",
+            "minItems": 2,
+            "maxItems": 5,
+            "items": {"type": "string", "enum": ["t", "c", "z", "y", "x"]},
+        },
+        "datasets": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "required": ["path"],
+                "properties": {"path": {"type": "string"}},
+            },
+        },
+    },
+}
+
+_MULTISCALE_01 = {
+    "type": "object",
+    "required": ["datasets"],
+    "properties": {"datasets": _MULTISCALE_03["properties"]["datasets"]},
+}
+
+
+def _attributes_schema(multiscale: Dict) -> Dict:
+    return {
+        "type": "object",
+        "required": ["multiscales"],
+        "properties": {
+            "multiscales": {
+                "type": "array",
+                "minItems": 1,
+                "items": multiscale,
+            }
+        },
+    }
+
+
+_SCHEMAS: Dict[str, Dict] = {
+    "0.1": _attributes_schema(_MULTISCALE_01),
+    "0.2": _attributes_schema(_MULTISCALE_01),
+    "0.3": _attributes_schema(_MULTISCALE_03),
+    "0.4": _attributes_schema(_MULTISCALE_04),
+}
@@ -1,7 +1,9 @@
-from copy import deepcopy
-from typing import TYPE_CHECKING, Optional, Sequence
+import os
+import warnings
+from concurrent.futures import CancelledError
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
 
-from qtpy.QtCore import Qt
+from qtpy.QtCore import QObject, Qt, Signal
 from qtpy.QtGui import QShowEvent
 from qtpy.QtWidgets import (
     QComboBox,
@@ -15,10 +17,17 @@ from qtpy.QtWidgets import (
     QWidget,
 )
 
+from napari_metadata._async_reader import ReadTask
 from napari_metadata._axes_widget import AxesWidget, ReadOnlyAxesWidget
+from napari_metadata._metadata_writer import (
+    can_save_metadata,
+    save_metadata,
+)
 from napari_metadata._model import (
+    SOURCE_PATH_KEY,
     coerce_extra_metadata,
     is_metadata_equal_to_original,
+    source_path,
 )
 from napari_metadata._space_units import SpaceUnits
 from napari_metadata._spatial_units_combo_box import SpatialUnitsComboBox
@@ -28,7 +37,11 @@ from napari_metadata._transform_widget import (
     TransformWidget,
 )
 from napari_metadata._widget_utils import readonly_lineedit
-from napari_metadata._file_size import generate_display_size
+from napari_metadata._chunk_cache import CHUNK_CACHE, dataset_key
+from napari_metadata._file_size import (
+    generate_display_size,
+    generate_text_for_size,
+)
 
 
 if TYPE_CHECKING:
@@ -111,6 +124,7 @@ class EditableMetadataWidget(QWidget):
         control_layout.addWidget(self.cancel_button)
         self._save_button = QPushButton("Save")
         self._save_button.setEnabled(False)
+        self._save_button.clicked.connect(self._on_save_clicked)
         control_layout.addWidget(self._save_button)
 
         layout.addWidget(self._control_widget)
@@ -189,7 +203,7 @@ class EditableMetadataWidget(QWidget):
         layer = self._selected_layer
         extras = coerce_extra_metadata(self._viewer, layer)
         if original := extras.original:
-            extras.axes = list(deepcopy(original.axes))
+            extras.axes = list(original.axes)
             if name := original.name:
                 layer.name = name
             if scale := original.scale:
@@ -201,9 +215,22 @@ class EditableMetadataWidget(QWidget):
             time_unit = str(extras.get_time_unit())
             self._temporal_units.setCurrentText(time_unit)
 
+    def _on_save_clicked(self) -> None:
+        assert self._selected_layer is not None
+        layer = self._selected_layer
+        try:
+            save_metadata(layer)
+        except Exception as e:
+            warnings.warn(
+                f"Failed to save metadata of {layer.name}: {e}", UserWarning
+            )
+        self._update_restore_enabled()
+
     def _update_restore_enabled(self) -> None:
-        enabled = not is_metadata_equal_to_original(self._selected_layer)
+        layer = self._selected_layer
+        enabled = not is_metadata_equal_to_original(layer)
         self._restore_defaults.setEnabled(enabled)
+        self._save_button.setEnabled(enabled and can_save_metadata(layer))
 
 
 class ReadOnlyMetadataWidget(QWidget):
@@ -234,6 +261,7 @@ class ReadOnlyMetadataWidget(QWidget):
         self.data_shape = self._add_attribute_row("Array shape")
         self.data_type = self._add_attribute_row("Data type")
         self.file_size = self._add_attribute_row("File size")
+        self.chunk_cache = self._add_attribute_row("Chunk cache")
 
         self._axes_widget = ReadOnlyAxesWidget(viewer)
         self._add_attribute_row("Axes", self._axes_widget)
@@ -278,7 +306,7 @@ class ReadOnlyMetadataWidget(QWidget):
 
         if layer is not None:
             self.name.setText(layer.name)
-            self.file_path.setText(str(layer.source.path))
+            self.file_path.setText(str(source_path(layer)))
             self.plugin.setText(_layer_plugin_info(layer))
             self.data_shape.setText(_layer_data_shape(layer))
             self.data_type.setText(_layer_data_dtype(layer))
@@ -286,6 +314,7 @@ class ReadOnlyMetadataWidget(QWidget):
             self.spatial_units.setText(str(extras.get_space_unit()))
             self.temporal_units.setText(str(extras.get_time_unit()))
             self.file_size.setText(generate_display_size(layer))
+            self.chunk_cache.setText(_layer_chunk_cache_info(layer))
 
             layer.events.name.connect(self._on_selected_layer_name_changed)
             layer.events.data.connect(self._on_selected_layer_data_changed)
@@ -299,6 +328,10 @@ class ReadOnlyMetadataWidget(QWidget):
     def set_spatial_units(self, units: str) -> None:
         self.spatial_units.setText(units)
 
+    def update_chunk_cache(self) -> None:
+        if (layer := self._selected_layer) is not None:
+            self.chunk_cache.setText(_layer_chunk_cache_info(layer))
+
     def set_temporal_units(self, units: str) -> None:
         self.temporal_units.setText(units)
 
@@ -334,6 +367,48 @@ class InfoWidget(QWidget):
         self.setLayout(layout)
 
 
+class LoadingWidget(QWidget):
+    """Shows a placeholder for each layer that is still being read."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(layout)
+        self._labels: List[QLabel] = []
+        self.setVisible(False)
+
+    def placeholder_texts(self) -> List[str]:
+        return [label.text() for label in self._labels]
+
+    def set_tasks(self, tasks: Sequence[ReadTask]) -> None:
+        texts = []
+        for task in tasks:
+            placeholders = task.placeholders()
+            texts.extend(
+                f"{p.name} (loading)" for p in placeholders if p.loading
+            )
+            # Nothing is known about the layers of a path until its first
+            # node is found.
+            if not placeholders and not task.done():
+                name = os.path.basename(str(task.path).rstrip("/"))
+                texts.append(f"{name} (loading)")
+        for label in self._labels:
+            self.layout().removeWidget(label)
+            label.deleteLater()
+        self._labels = [QLabel(text) for text in texts]
+        for label in self._labels:
+            label.setStyleSheet("font-style: italic")
+            self.layout().addWidget(label)
+        self.setVisible(len(texts) > 0)
+
+
+class _ReadTaskSignals(QObject):
+    # Listeners of read tasks are called from other threads, so they emit
+    # this to handle changes on the thread of the widget.
+    changed = Signal(object)
+
+
 class MetadataWidget(QStackedWidget):
     def __init__(self, napari_viewer: "ViewerModel"):
         super().__init__()
@@ -371,9 +446,35 @@ class MetadataWidget(QStackedWidget):
         self._viewer.layers.selection.events.changed.connect(
             self._on_selected_layers_changed
         )
+        # Slicing may read chunks, so update the cache statistics.
+        self._viewer.dims.events.current_step.connect(
+            self._readonly_widget.update_chunk_cache
+        )
+
+        # Show the layers that are still being read on every page.
+        self._reads: Dict[ReadTask, int] = {}
+        self._read_signals = _ReadTaskSignals()
+        self._read_signals.changed.connect(self._on_read_changed)
+        self._loading_widgets = []
+        for page in (
+            self._info_widget,
+            self._editable_widget,
+            self._readonly_widget,
+        ):
+            loading_widget = LoadingWidget()
+            page.layout().insertWidget(0, loading_widget)
+            self._loading_widgets.append(loading_widget)
 
         self._on_selected_layers_changed()
 
+    def add_read(self, task: ReadTask) -> None:
+        """Adds the layers of a read to the viewer as soon as each is
+        ready, showing placeholders for the others until then.
+        """
+        self._reads[task] = 0
+        task.add_listener(self._emit_read_changed)
+        self._on_read_changed(task)
+
     def showEvent(self, event: QShowEvent) -> None:
         self._viewer.axes.colored = False
         self._viewer.axes.visible = True
@@ -381,6 +482,7 @@ class MetadataWidget(QStackedWidget):
         return super().showEvent(event)
 
     def _show_readonly(self) -> None:
+        self._readonly_widget.update_chunk_cache()
         self.setCurrentWidget(self._readonly_widget)
 
     def _show_editable(self) -> None:
@@ -409,6 +511,29 @@ class MetadataWidget(QStackedWidget):
 
         self._selected_layer = layer
 
+    def _emit_read_changed(self, task: ReadTask) -> None:
+        self._read_signals.changed.emit(task)
+
+    def _on_read_changed(self, task: ReadTask) -> None:
+        if (n_added := self._reads.get(task)) is None:
+            return
+        layers = task.layers()
+        for data, metadata, layer_type in layers[n_added:]:
+            metadata = _with_source_path(metadata, str(task.path))
+            getattr(self._viewer, f"add_{layer_type}")(data, **metadata)
+        self._reads[task] = len(layers)
+        if task.done():
+            del self._reads[task]
+            task.remove_listener(self._emit_read_changed)
+            try:
+                task.result()
+            except CancelledError:
+                pass
+            except Exception as e:
+                warnings.warn(f"Failed to read {task.path}: {e}", UserWarning)
+        for loading_widget in self._loading_widgets:
+            loading_widget.set_tasks(list(self._reads))
+
     def _remove_dock_widget(self) -> None:
         # To constrain our implementation and for testing, we only want
         # the type of _viewer to be ViewerModel and not Viewer.
@@ -417,8 +542,23 @@ class MetadataWidget(QStackedWidget):
             window.remove_dock_widget(self)
 
 
+def _with_source_path(metadata: Dict, path: str) -> Dict:
+    """Returns layer metadata that records the path that it was read from.
+
+    Layers split by channel have a list of metadata, one for each channel.
+    """
+    extras = metadata.get("metadata")
+    if isinstance(extras, list):
+        extras = [dict(e, **{SOURCE_PATH_KEY: path}) for e in extras]
+    else:
+        extras = dict(extras or {}, **{SOURCE_PATH_KEY: path})
+    return dict(metadata, metadata=extras)
+
+
 def _layer_plugin_info(layer: "Layer") -> str:
     source = layer.source
+    if source.reader_plugin is None and SOURCE_PATH_KEY in layer.metadata:
+        return "napari-metadata"
     return (
         str(source.reader_plugin)
         if source.sample is None
@@ -426,6 +566,19 @@ def _layer_plugin_info(layer: "Layer") -> str:
     )
 
 
+def _layer_chunk_cache_info(layer: "Layer") -> str:
+    if (path := source_path(layer)) is None:
+        return "Not cached"
+    stats = CHUNK_CACHE.stats(dataset_key(str(path)))
+    if stats.hits + stats.misses == 0:
+        return "Not cached"
+    size = generate_text_for_size(stats.nbytes)
+    return (
+        f"{size} in {stats.size} chunks "
+        f"({stats.hits} hits, {stats.misses} misses)"
+    )
+
+
 def _layer_data_shape(layer: "Layer") -> str:
     data = layer.data
     if hasattr(data, "shape"):
@@ -1,18 +1,84 @@
 import os
-from typing import Any, Dict, List, Sequence
+from typing import Any, Dict, List, Optional, Sequence
 
 import numpy as np
 import zarr
 from npe2.types import ArrayLike
 from ome_zarr.io import parse_url
-from ome_zarr.writer import write_multiscale
+from ome_zarr.writer import write_multiscales_metadata
 
+from ._chunk_writer import WriteOptions, write_array
+from ._encoding import ENCODING_KEY, EncodingOptions, choose_encoding
 from ._model import EXTRA_METADATA_KEY, Axis
+from ._pyramid import DOWNSAMPLE_FACTOR, PyramidOptions, write_downsampled
+
+# The pyramid that is built when an image is written, unless other options
+# are given. No pyramid is built if this is None.
+PYRAMID: Optional[PyramidOptions] = None
+
+# How the chunks of images are written, unless other options are given.
+WRITE_OPTIONS = WriteOptions()
+
+# How the chunks of images are shaped and compressed, unless other options
+# are given.
+ENCODING = EncodingOptions()
 
 
 def write_image(
-    path: str, data: ArrayLike, attributes: Dict[str, Any]
+    path: str,
+    data: ArrayLike,
+    attributes: Dict[str, Any],
+    *,
+    consolidate: bool = False,
+    pyramid: Optional[PyramidOptions] = None,
+    write_options: Optional[WriteOptions] = None,
+    encoding: Optional[EncodingOptions] = None,
 ) -> List[str]:
+    """Writes image layer data to path as OME-Zarr.
+
+    If pyramid is None, a pyramid is built as set by PYRAMID. If a pyramid
+    is built, coarser levels are added after the given ones by
+    downsampling the last two spatial dimensions. Every level is written
+    chunk by chunk as set by write_options, or WRITE_OPTIONS if it is None,
+    so lazy data is never read into memory all at once.
+
+    The chunks and compressor of every level are chosen as set by
+    encoding, or ENCODING if it is None, and recorded in the attributes
+    of the image.
+    """
+    if pyramid is None:
+        pyramid = PYRAMID
+    root = write_multiscale_image(
+        path,
+        data,
+        attributes,
+        pyramid=pyramid,
+        write_options=write_options,
+        encoding=encoding,
+    )
+
+    # Consolidate all metadata into one file, so that the image can be
+    # opened with a single metadata read.
+    if consolidate:
+        zarr.consolidate_metadata(root.store)
+
+    return [path]
+
+
+def write_multiscale_image(
+    path: str,
+    data: ArrayLike,
+    attributes: Dict[str, Any],
+    *,
+    pyramid: Optional[PyramidOptions],
+    write_options: Optional[WriteOptions] = None,
+    encoding: Optional[EncodingOptions] = None,
+) -> zarr.Group:
+    """Writes the levels and multiscales metadata of layer data to path
+    like write_image, and returns its group.
+
+    No pyramid is built if pyramid is None.
+    """
     # Based on https://ome-zarr.readthedocs.io/en/stable/python.html#writing-ome-ngff-images # noqa
     os.mkdir(path)
 
@@ -51,15 +117,91 @@ def write_image(
         for scale_factor in scale_factors
     ]
 
-    write_multiscale(
-        pyramid=multiscale_data,
-        group=root,
+    if write_options is None:
+        write_options = WRITE_OPTIONS
+    if encoding is None:
+        encoding = ENCODING
+    chosen = choose_encoding(multiscale_data[0], axes, encoding)
+
+    for level, level_data in enumerate(multiscale_data):
+        target = root.create_dataset(
+            str(level),
+            shape=level_data.shape,
+            chunks=chosen.level_chunks(level_data.shape),
+            dtype=level_data.dtype,
+            compressor=chosen.compressor,
+        )
+        write_array(level_data, target, write_options)
+
+    if pyramid is not None:
+        dims = downsampled_dims(axes)
+        for shape in pyramid.level_shapes(multiscale_data[-1].shape, dims):
+            source = root[str(len(transforms) - 1)]
+            target = root.create_dataset(
+                str(len(transforms)),
+                shape=shape,
+                chunks=chosen.level_chunks(shape),
+                dtype=source.dtype,
+                compressor=chosen.compressor,
+            )
+            write_downsampled(
+                source, target, dims, write_options, method=pyramid.method
+            )
+            transforms.append(
+                downsampled_transforms(transforms[-1], dims, pyramid.method)
+            )
+
+    write_multiscales_metadata(
+        root,
+        [
+            {"path": str(level), "coordinateTransformations": t}
+            for level, t in enumerate(transforms)
+        ],
         axes=axes,
-        coordinate_transformations=transforms,
         name=name,
     )
+    root.attrs[ENCODING_KEY] = chosen.to_json()
+    return root
 
-    return [path]
+
+def downsampled_dims(axes: List[Dict[str, str]]) -> List[int]:
+    """Returns the dimensions that are downsampled to build a pyramid,
+    which are the last two spatial dimensions.
+    """
+    dims = [i for i, axis in enumerate(axes) if axis["type"] == "space"]
+    if len(dims) < 2:
+        dims = list(range(len(axes)))
+    return dims[-2:]
+
+
+def downsampled_transforms(
+    transforms: List[Dict[str, Any]],
+    dims: Sequence[int],
+    method: str = "mean",
+) -> List[Dict[str, Any]]:
+    """Returns the transforms of the level that is downsampled from a
+    level with the given transforms.
+
+    The pixels of the downsampled level are twice as large in dims. The
+    centers of means are at the centers of the blocks that they are the
+    means of, which moves them by half a pixel of the finer level, while
+    nearest pixels stay where they were.
+    """
+    scale = np.asarray(transforms[0]["scale"], dtype=float)
+    translate = np.asarray(transforms[1]["translation"], dtype=float)
+    factors = np.ones_like(scale)
+    factors[list(dims)] = DOWNSAMPLE_FACTOR
+    if method == "nearest":
+        shift = np.zeros_like(scale)
+    else:
+        shift = scale * (factors - 1) / 2
+    return [
+        {"type": "scale", "scale": tuple((scale * factors).tolist())},
+        {
+            "type": "translation",
+            "translation": tuple((translate + shift).tolist()),
+        },
+    ]
 
 
 def axis_to_ome(axis: Axis) -> Dict[str, str]:
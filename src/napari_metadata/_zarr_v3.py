@@ -0,0 +1,452 @@
+"""Reads Zarr v3 arrays and OME-NGFF 0.5 metadata.
+
+ome-zarr and zarr only read Zarr v2, so the metadata of each Zarr v3 node
+(i.e. its ``zarr.json``) is presented to them as the Zarr v2 metadata
+files that it replaces, with the NGFF 0.5 attributes under ``ome`` moved
+to the top level like in NGFF 0.4, which has the same structure.
+
+Arrays are read here instead of by zarr. Sharded arrays are read one
+inner chunk at a time using the index of each shard, so that reading a
+small region only reads the bytes of the inner chunks that overlap it,
+rather than whole shards.
+"""
+import itertools
+import logging
+import operator
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numcodecs
+import numpy as np
+from ome_zarr.types import JSONDict
+
+from ._chunk_cache import CHUNK_CACHE, ChunkCache
+from ._lazy_array import IndexedArray, expand_key, single_index_axis
+
+try:
+    from numcodecs.checksum32 import CRC32C
+except ImportError:
+    # Checksums are not verified if the crc32c package is not installed.
+    CRC32C = None
+
+LOGGER = logging.getLogger("napari_metadata._zarr_v3")
+
+# The key of the file that stores the metadata of a Zarr v3 group or array.
+ZARR_JSON_KEY = "zarr.json"
+
+# The NGFF version that NGFF 0.5 metadata is presented as, which ome-zarr
+# can read.
+NGFF_VERSION = "0.4"
+
+# The offset and number of bytes of an inner chunk that is missing from
+# its shard.
+_MISSING_CHUNK = 2**64 - 1
+
+_BYTES_CODECS = {
+    "blosc": numcodecs.Blosc,
+    "gzip": numcodecs.GZip,
+    "zstd": numcodecs.Zstd,
+}
+
+
+def v2_metadata(zarr_json: JSONDict, name: str) -> JSONDict:
+    """Returns the Zarr v2 metadata file called name (e.g. ``.zattrs``)
+    that corresponds to the metadata of a Zarr v3 node.
+
+    The metadata of an array is returned as is for ``.zarray``, because
+    only its existence matters to ome-zarr.
+    """
+    node_type = zarr_json.get("node_type")
+    if name == ".zgroup":
+        return {"zarr_format": 2} if node_type == "group" else {}
+    if name == ".zarray":
+        return dict(zarr_json) if node_type == "array" else {}
+    if name == ".zattrs":
+        return ngff_attributes(zarr_json.get("attributes", {}))
+    return {}
+
+
+def ngff_attributes(attributes: JSONDict) -> JSONDict:
+    """Moves NGFF 0.5 attributes under ``ome`` to the top level."""
+    attributes = dict(attributes)
+    ome = attributes.pop("ome", None)
+    if not isinstance(ome, dict):
+        return attributes
+    for key, value in ome.items():
+        if key == "version":
+            continue
+        if key == "multiscales":
+            value = [dict(m, version=NGFF_VERSION) for m in value]
+        elif key in ("plate", "well", "image-label"):
+            value = dict(value, version=NGFF_VERSION)
+        attributes[key] = value
+    return attributes
+
+
+class ZarrV3Array:
+    """A read-only Zarr v3 array that is read one (inner) chunk at a time.
+
+    Decoded chunks are shared with all other arrays that are read through
+    a chunk cache. Sharded arrays must only have the sharding codec, so
+    that inner chunks can be read without reading whole shards.
+    """
+
+    def __init__(
+        self,
+        fs: Any,
+        path: str,
+        metadata: JSONDict,
+        *,
+        url: str,
+        dataset: str,
+        cache: ChunkCache = CHUNK_CACHE,
+    ) -> None:
+        if metadata.get("zarr_format") != 3:
+            raise ValueError(f"{url} is not a Zarr v3 array")
+        grid = metadata["chunk_grid"]
+        if grid.get("name") != "regular":
+            raise NotImplementedError(
+                f"Unsupported chunk grid: {grid.get('name')}"
+            )
+        self._fs = fs
+        self._path = path.rstrip("/")
+        self._url = url
+        self._dataset = dataset
+        self._cache = cache
+        self._shape = tuple(metadata["shape"])
+        self._dtype = np.dtype(metadata["data_type"])
+        self._fill_value = _fill_value(metadata.get("fill_value"), self._dtype)
+        self._key_encoding = metadata.get(
+            "chunk_key_encoding", {"name": "default"}
+        )
+        grid_shape = tuple(grid["configuration"]["chunk_shape"])
+        codecs = metadata["codecs"]
+        if any(c["name"] == "sharding_indexed" for c in codecs):
+            if len(codecs) != 1:
+                raise NotImplementedError(
+                    "Sharding must be the only codec of a sharded array"
+                )
+            config = codecs[0]["configuration"]
+            self._shard_shape: Optional[Tuple[int, ...]] = grid_shape
+            self._chunk_shape = tuple(config["chunk_shape"])
+            self._codecs = config["codecs"]
+            self._index_codecs = config.get(
+                "index_codecs", [{"name": "bytes"}, {"name": "crc32c"}]
+            )
+            self._index_location = config.get("index_location", "end")
+            self._chunks_per_shard = tuple(
+                s // c for s, c in zip(self._shard_shape, self._chunk_shape)
+            )
+        else:
+            self._shard_shape = None
+            self._chunk_shape = grid_shape
+            self._codecs = codecs
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self._shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._dtype
+
+    @property
+    def ndim(self) -> int:
+        return len(self._shape)
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self._shape))
+
+    @property
+    def chunk_shape(self) -> Tuple[int, ...]:
+        """The shape of the chunks that are read, which are the inner
+        chunks of a sharded array.
+        """
+        return self._chunk_shape
+
+    @property
+    def shard_shape(self) -> Optional[Tuple[int, ...]]:
+        return self._shard_shape
+
+    @property
+    def chunks(self) -> Tuple[Tuple[int, ...], ...]:
+        """The sizes of the chunks along each dimension, like dask."""
+        return tuple(
+            (c,) * (s // c) + ((s % c,) if s % c else ())
+            for s, c in zip(self._shape, self._chunk_shape)
+        )
+
+    @property
+    def nchunks(self) -> int:
+        return int(np.prod([len(c) for c in self.chunks]))
+
+    def __len__(self) -> int:
+        return self._shape[0]
+
+    def __getitem__(self, key: Any) -> Any:
+        key = expand_key(key, self.ndim)
+        if (axis := single_index_axis(key)) is not None:
+            return IndexedArray(self, axis, key[axis])
+        return self.read(key)
+
+    def read(self, key: Any) -> np.ndarray:
+        """Reads the data at key, which is never a lazy view.
+
+        Integers, slices and integer arrays are supported, where arrays
+        index each dimension independently.
+        """
+        key = expand_key(key, self.ndim)
+        indices = [_indices(k, s) for k, s in zip(key, self._shape)]
+        out = np.full(
+            tuple(len(i) for i in indices), self._fill_value, self._dtype
+        )
+        ids = [np.unique(i // c) for i, c in zip(indices, self._chunk_shape)]
+        chunk_ids = list(itertools.product(*(i.tolist() for i in ids)))
+        chunks = self._read_chunks(chunk_ids) if out.size > 0 else {}
+        for chunk_id, chunk in chunks.items():
+            out_index = []
+            chunk_index = []
+            for i, c, n in zip(indices, chunk_id, self._chunk_shape):
+                in_chunk = (i // n) == c
+                out_index.append(np.nonzero(in_chunk)[0])
+                chunk_index.append(i[in_chunk] - c * n)
+            out[np.ix_(*out_index)] = chunk[np.ix_(*chunk_index)]
+        return out[
+            tuple(
+                0 if isinstance(k, (int, np.integer)) else slice(None)
+                for k in key
+            )
+        ]
+
+    def __array__(self, dtype=None) -> np.ndarray:
+        return np.asarray(self.read(...), dtype=dtype)
+
+    def __dask_tokenize__(self) -> Tuple:
+        return (type(self).__name__, self._url, self._shape, str(self._dtype))
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(shape={self.shape}, dtype={self.dtype}, "
+            f"chunk_shape={self._chunk_shape}, "
+            f"shard_shape={self._shard_shape})"
+        )
+
+    def _read_chunks(
+        self, chunk_ids: List[Tuple[int, ...]]
+    ) -> Dict[Tuple[int, ...], np.ndarray]:
+        """Reads the chunks that exist, from the cache if possible."""
+        chunks = {}
+        missing = []
+        for chunk_id in chunk_ids:
+            cached = self._cache.get(self._dataset, (self._url, chunk_id))
+            if cached is not None:
+                chunks[chunk_id] = cached
+            else:
+                missing.append(chunk_id)
+        if not missing:
+            return chunks
+        if self._shard_shape is None:
+            encoded = self._read_whole_chunks(missing)
+        else:
+            encoded = self._read_inner_chunks(missing)
+        for chunk_id, data in encoded.items():
+            chunk = decode_chunk(
+                data, self._codecs, self._chunk_shape, self._dtype
+            )
+            self._cache.put(self._dataset, (self._url, chunk_id), chunk)
+            chunks[chunk_id] = chunk
+        return chunks
+
+    def _read_whole_chunks(
+        self, chunk_ids: List[Tuple[int, ...]]
+    ) -> Dict[Tuple[int, ...], bytes]:
+        n = len(chunk_ids)
+        data = self._fs.cat_ranges(
+            [self._chunk_path(c) for c in chunk_ids],
+            [None] * n,
+            [None] * n,
+            on_error="return",
+        )
+        return {
+            chunk_id: d
+            for chunk_id, d in zip(chunk_ids, data)
+            if not _raise_unless_missing(d)
+        }
+
+    def _read_inner_chunks(
+        self, chunk_ids: List[Tuple[int, ...]]
+    ) -> Dict[Tuple[int, ...], bytes]:
+        shard_chunks: Dict[Tuple[int, ...], List[Tuple[int, ...]]] = {}
+        for chunk_id in chunk_ids:
+            shard_id = tuple(
+                c // n for c, n in zip(chunk_id, self._chunks_per_shard)
+            )
+            shard_chunks.setdefault(shard_id, []).append(chunk_id)
+        indexes = self._read_shard_indexes(list(shard_chunks))
+        paths, starts, ends, read_ids = [], [], [], []
+        for shard_id, ids in shard_chunks.items():
+            if (index := indexes.get(shard_id)) is None:
+                continue
+            for chunk_id in ids:
+                inner = tuple(
+                    c % n for c, n in zip(chunk_id, self._chunks_per_shard)
+                )
+                offset, nbytes = index[inner].tolist()
+                if offset == _MISSING_CHUNK:
+                    continue
+                paths.append(self._chunk_path(shard_id))
+                starts.append(offset)
+                ends.append(offset + nbytes)
+                read_ids.append(chunk_id)
+        if not paths:
+            return {}
+        data = self._fs.cat_ranges(paths, starts, ends, on_error="return")
+        return {
+            chunk_id: d
+            for chunk_id, d in zip(read_ids, data)
+            if not _raise_unless_missing(d)
+        }
+
+    def _read_shard_indexes(
+        self, shard_ids: List[Tuple[int, ...]]
+    ) -> Dict[Tuple[int, ...], np.ndarray]:
+        """Reads the index of each shard that exists, whose entries are
+        the offset and number of bytes of each of its inner chunks.
+        """
+        indexes = {}
+        missing = []
+        for shard_id in shard_ids:
+            key = (self._url, shard_id, "index")
+            if (index := self._cache.get(self._dataset, key)) is not None:
+                indexes[shard_id] = index
+            else:
+                missing.append(shard_id)
+        if not missing:
+            return indexes
+        index_shape = self._chunks_per_shard + (2,)
+        nbytes = int(np.prod(index_shape)) * 8 + sum(
+            4 for c in self._index_codecs if c["name"] == "crc32c"
+        )
+        if self._index_location == "start":
+            starts, ends = [0] * len(missing), [nbytes] * len(missing)
+        else:
+            starts, ends = [-nbytes] * len(missing), [None] * len(missing)
+        data = self._fs.cat_ranges(
+            [self._chunk_path(s) for s in missing],
+            starts,
+            ends,
+            on_error="return",
+        )
+        for shard_id, d in zip(missing, data):
+            if _raise_unless_missing(d):
+                continue
+            index = decode_chunk(
+                d, self._index_codecs, index_shape, np.dtype("uint64")
+            )
+            key = (self._url, shard_id, "index")
+            self._cache.put(self._dataset, key, index)
+            indexes[shard_id] = index
+        return indexes
+
+    def _chunk_path(self, chunk_id: Tuple[int, ...]) -> str:
+        return f"{self._path}/{chunk_key(chunk_id, self._key_encoding)}"
+
+
+def chunk_key(chunk_id: Sequence[int], encoding: JSONDict) -> str:
+    """Returns the key of a chunk (or shard) of a Zarr v3 array."""
+    name = encoding.get("name", "default")
+    config = encoding.get("configuration", {})
+    if name == "default":
+        separator = config.get("separator", "/")
+        return separator.join(["c"] + [str(i) for i in chunk_id])
+    if name == "v2":
+        separator = config.get("separator", ".")
+        return separator.join(str(i) for i in chunk_id) or "0"
+    raise NotImplementedError(f"Unsupported chunk key encoding: {name}")
+
+
+def decode_chunk(
+    data: bytes,
+    codecs: Sequence[JSONDict],
+    shape: Tuple[int, ...],
+    dtype: np.dtype,
+) -> np.ndarray:
+    """Decodes the bytes of a chunk with its Zarr v3 codecs.
+
+    The codecs are in the order that they encode, where those before the
+    bytes codec transform arrays and those after it transform bytes.
+    """
+    names = [c["name"] for c in codecs]
+    if names.count("bytes") != 1:
+        raise NotImplementedError(f"Unsupported codecs: {names}")
+    bytes_index = names.index("bytes")
+    for codec in reversed(codecs[bytes_index + 1 :]):  # noqa
+        data = _decode_bytes(codec, data)
+    encoded_shape = shape
+    for codec in codecs[:bytes_index]:
+        encoded_shape = tuple(encoded_shape[i] for i in _order(codec))
+    endian = codecs[bytes_index].get("configuration", {}).get("endian")
+    encoded_dtype = dtype
+    if endian is not None and dtype.itemsize > 1:
+        encoded_dtype = dtype.newbyteorder("<" if endian == "little" else ">")
+    chunk = np.frombuffer(data, encoded_dtype).reshape(encoded_shape)
+    for codec in reversed(codecs[:bytes_index]):
+        chunk = chunk.transpose(np.argsort(_order(codec)))
+    return chunk.astype(dtype, copy=False)
+
+
+def _decode_bytes(codec: JSONDict, data: bytes) -> bytes:
+    name = codec["name"]
+    if name == "crc32c":
+        if CRC32C is not None:
+            return bytes(CRC32C().decode(data))
+        return bytes(data[:-4])
+    if name in _BYTES_CODECS:
+        return bytes(_BYTES_CODECS[name]().decode(data))
+    raise NotImplementedError(f"Unsupported codec: {name}")
+
+
+def _order(codec: JSONDict) -> Tuple[int, ...]:
+    if codec["name"] != "transpose":
+        raise NotImplementedError(f"Unsupported codec: {codec['name']}")
+    return tuple(codec["configuration"]["order"])
+
+
+def _fill_value(value: Any, dtype: np.dtype) -> Any:
+    if value is None:
+        return 0
+    if isinstance(value, str) and dtype.kind in "fc":
+        return {"NaN": np.nan, "Infinity": np.inf, "-Infinity": -np.inf}.get(
+            value, np.nan
+        )
+    if isinstance(value, list) and dtype.kind == "c":
+        return complex(*(_fill_value(v, np.dtype("f8")) for v in value))
+    return value
+
+
+def _indices(key: Any, size: int) -> np.ndarray:
+    """Returns the indices along a dimension that are selected by key."""
+    if isinstance(key, slice):
+        return np.arange(size)[key]
+    if isinstance(key, (int, np.integer)):
+        index = operator.index(key)
+        if not -size <= index < size:
+            raise IndexError(f"index {index} is out of bounds for size {size}")
+        return np.array([index % size])
+    indices = np.asarray(key)
+    if indices.dtype == bool:
+        return np.nonzero(indices)[0]
+    if np.any((indices < -size) | (indices >= size)):
+        raise IndexError(f"index out of bounds for size {size}")
+    return indices % size
+
+
+def _raise_unless_missing(data: Any) -> bool:
+    """Returns True if data is a missing file error, raises any other
+    error and otherwise returns False.
+    """
+    if isinstance(data, (FileNotFoundError, KeyError)):
+        return True
+    if isinstance(data, Exception):
+        raise data
+    return False
@@ -0,0 +1,272 @@
+"""Reads zarr datasets directly from zip archives (e.g. ``.zarr.zip``).
+
+Paths in an archive are exposed as URLs with the ``zarrzip`` protocol,
+such as ``zarrzip:///data/image.zarr.zip/0/.zarray``, so that zarr's and
+ome-zarr's usual stores and locations can read them without extracting
+the archive.
+
+The central directory of each archive is parsed once into an index of its
+members, and the archive is memory-mapped so that reading a member is a
+lookup and a slice (plus inflating it if it is compressed). Zarr chunks
+are usually stored uncompressed in archives, because they are already
+compressed.
+"""
+import logging
+import mmap
+import os
+import struct
+import threading
+import zipfile
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from fsspec import AbstractFileSystem, register_implementation
+
+LOGGER = logging.getLogger("napari_metadata._zip_store")
+
+ZIP_PROTOCOL = "zarrzip"
+
+# The size and format of the fixed part of a member's local file header.
+_LOCAL_HEADER_SIZE = 30
+_LOCAL_HEADER_NAME_LENGTHS = struct.Struct("<HH")
+
+
+@dataclass(frozen=True)
+class ZipMember:
+    """Where the data of a member is in an archive and how it is stored."""
+
+    header_offset: int
+    compress_type: int
+    compress_size: int
+    file_size: int
+    crc: int
+
+
+class ZipArchive:
+    """A read-only, memory-mapped zip archive with an index of its members.
+
+    Reads are thread-safe. Members that are not stored or deflated (e.g.
+    bzip2 or lzma) are read through zipfile, one at a time.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        stat = os.stat(path)
+        self._version = (stat.st_mtime, stat.st_size)
+        self._zipfile = zipfile.ZipFile(path)
+        self._members: Dict[str, ZipMember] = {}
+        self._directories = {""}
+        for info in self._zipfile.infolist():
+            name = info.filename.rstrip("/")
+            self._add_parents(name)
+            if info.is_dir():
+                self._directories.add(name)
+                continue
+            self._members[name] = ZipMember(
+                header_offset=info.header_offset,
+                compress_type=info.compress_type,
+                compress_size=info.compress_size,
+                file_size=info.file_size,
+                crc=info.CRC,
+            )
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._data_offsets: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def version(self) -> Tuple[float, int]:
+        """The modification time and size of the archive when opened."""
+        return self._version
+
+    def member(self, name: str) -> Optional[ZipMember]:
+        return self._members.get(name)
+
+    def is_directory(self, name: str) -> bool:
+        return name in self._directories
+
+    def list_directory(self, name: str) -> List[str]:
+        """Returns the names of the members and directories in name."""
+        prefix = f"{name}/" if name else ""
+        names = set()
+        for n in self._members.keys() | self._directories:
+            if n and n.startswith(prefix):
+                names.add(prefix + n[len(prefix) :].split("/")[0])  # noqa
+        return sorted(names)
+
+    def read(
+        self, name: str, start: Optional[int] = None, end: Optional[int] = None
+    ) -> bytes:
+        """Reads the bytes of a member, or raises a FileNotFoundError."""
+        if (member := self._members.get(name)) is None:
+            raise FileNotFoundError(name)
+        if member.compress_type == zipfile.ZIP_STORED:
+            offset = self._data_offset(name, member)
+            data = self._mmap[offset : offset + member.file_size]  # noqa
+        elif member.compress_type == zipfile.ZIP_DEFLATED:
+            offset = self._data_offset(name, member)
+            data = zlib.decompress(
+                self._mmap[offset : offset + member.compress_size],  # noqa
+                -zlib.MAX_WBITS,
+            )
+        else:
+            with self._lock:
+                data = self._zipfile.read(name)
+        return data[start:end]
+
+    def close(self) -> None:
+        self._mmap.close()
+        self._zipfile.close()
+
+    def _data_offset(self, name: str, member: ZipMember) -> int:
+        # The local header may have a different extra field than the
+        # central directory, so its length must be read from the header.
+        if (offset := self._data_offsets.get(name)) is None:
+            start = member.header_offset + _LOCAL_HEADER_SIZE - 4
+            name_length, extra_length = _LOCAL_HEADER_NAME_LENGTHS.unpack(
+                self._mmap[start : start + 4]  # noqa
+            )
+            offset = (
+                member.header_offset
+                + _LOCAL_HEADER_SIZE
+                + name_length
+                + extra_length
+            )
+            self._data_offsets[name] = offset
+        return offset
+
+    def _add_parents(self, name: str) -> None:
+        parts = name.split("/")
+        for i in range(1, len(parts)):
+            self._directories.add("/".join(parts[:i]))
+
+
+class ZipArchiveFileSystem(AbstractFileSystem):
+    """A read-only file system of the members of local zip archives.
+
+    Paths are local paths that continue into an archive, such as
+    ``/data/image.zarr.zip/0/.zarray``. Opened archives are shared and
+    are reopened when their modification time or size changes.
+    """
+
+    protocol = ZIP_PROTOCOL
+    root_marker = "/"
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._archives: Dict[str, ZipArchive] = {}
+        self._archives_lock = threading.Lock()
+
+    @classmethod
+    def _strip_protocol(cls, path: str) -> str:
+        path = str(path)
+        if path.startswith(f"{ZIP_PROTOCOL}://"):
+            path = path[len(ZIP_PROTOCOL) + 3 :]  # noqa
+        return path.rstrip("/") or cls.root_marker
+
+    def archive(self, path: str, *, check: bool = False) -> ZipArchive:
+        """Returns the opened archive at a local path.
+
+        If check is True, the archive is reopened if it has changed. The
+        archive that was opened before is not closed, because other threads
+        may still be reading it, and is closed once they no longer use it.
+        """
+        with self._archives_lock:
+            archive = self._archives.get(path)
+            if archive is not None and check:
+                stat = os.stat(path)
+                if archive.version != (stat.st_mtime, stat.st_size):
+                    archive = None
+            if archive is None:
+                archive = ZipArchive(path)
+                self._archives[path] = archive
+            return archive
+
+    def info(self, path: str, **kwargs: Any) -> Dict[str, Any]:
+        archive_path, name = split_archive_path(self._strip_protocol(path))
+        archive = self.archive(archive_path, check=True)
+        info = {"name": f"{archive_path}/{name}".rstrip("/")}
+        if (member := archive.member(name)) is not None:
+            info.update(type="file", size=member.file_size, crc=member.crc)
+        elif archive.is_directory(name):
+            info.update(type="directory", size=0)
+        else:
+            raise FileNotFoundError(path)
+        # Members change when the archive does.
+        info["mtime"] = archive.version[0]
+        return info
+
+    def ls(self, path: str, detail: bool = True, **kwargs: Any) -> List:
+        archive_path, name = split_archive_path(self._strip_protocol(path))
+        archive = self.archive(archive_path)
+        if not archive.is_directory(name):
+            return [self.info(path)] if detail else [path]
+        paths = [f"{archive_path}/{n}" for n in archive.list_directory(name)]
+        return [self.info(p) for p in paths] if detail else paths
+
+    def cat_file(
+        self,
+        path: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        **kwargs: Any,
+    ) -> bytes:
+        archive_path, name = split_archive_path(self._strip_protocol(path))
+        return self.archive(archive_path).read(name, start, end)
+
+    def _open(self, path: str, mode: str = "rb", **kwargs: Any) -> Any:
+        if mode != "rb":
+            raise PermissionError(f"{ZIP_PROTOCOL} paths are read-only")
+        return super()._open(path, mode=mode, **kwargs)
+
+
+register_implementation(ZIP_PROTOCOL, ZipArchiveFileSystem, clobber=True)
+
+
+def split_archive_path(path: str) -> Tuple[str, str]:
+    """Splits a path into the path of an archive and the name of a member
+    in it, which is empty for the root of the archive.
+    """
+    parts = path.split("/")
+    for i, part in enumerate(parts):
+        if part.endswith(".zip"):
+            return "/".join(parts[: i + 1]), "/".join(parts[i + 1 :])  # noqa
+    raise FileNotFoundError(f"{path} is not in a zip archive")
+
+
+def is_zip_path(path: Any) -> bool:
+    """Returns True if path is a local zip archive."""
+    path = str(path)
+    return path.endswith(".zip") and os.path.isfile(path)
+
+
+def zip_url(path: Any) -> str:
+    """Returns the URL of the root of the zarr dataset in a local archive.
+
+    Archives made by zipping a dataset's directory have that directory
+    at their root, in which case the dataset is in that directory.
+    """
+    path = os.path.abspath(str(path))
+    archive = ZipArchiveFileSystem().archive(path, check=True)
+    url = f"{ZIP_PROTOCOL}://{path}"
+    if any(
+        archive.member(key) is not None
+        for key in (".zgroup", ".zarray", "zarr.json")
+    ):
+        return url
+    top = archive.list_directory("")
+    if len(top) == 1 and archive.is_directory(top[0]):
+        return f"{url}/{top[0]}"
+    return url
+
+
+def archive_path(url: str) -> Optional[str]:
+    """Returns the local path of the archive of a URL, if it has one."""
+    if not url.startswith(f"{ZIP_PROTOCOL}://"):
+        return None
+    return split_archive_path(ZipArchiveFileSystem._strip_protocol(url))[0]